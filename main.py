@@ -19,6 +19,9 @@ from missions.takeoff_land import run_takeoff_land
 from missions.survey import run_survey
 from missions.orbit_rect import run_orbit_rect
 from missions.square import run_square
+from missions.telemetry_hub import get_hub
+from utils.logger import TelemetryLogger
+from utils.streams import PROFILES
 
 
 def setup_logging():
@@ -66,6 +69,13 @@ def build_parser() -> argparse.ArgumentParser:
                    help="Altitude in meters (default: 20)")
     p.add_argument("--speed", type=float, default=float(os.getenv("DEFAULT_SPEED", 5.0)),
                    help="Speed in m/s where applicable (default: 5)")
+    p.add_argument("--log", default=None,
+                   help="Telemetry log path (optional): .csv or a columnar npy dir, e.g. logs/flight.tlm")
+    p.add_argument("--log_profile", default="default", choices=sorted(PROFILES),
+                   help="Telemetry streams to log (minimal/default/nav/full)")
+    p.add_argument("--log_hz", type=float, default=2.0, help="Telemetry log row rate (Hz)")
+    p.add_argument("--optimize_sweep", action="store_true",
+                   help="[survey] Pick sweep heading/entry corner by estimated flight time")
     # פרמטרים ייעודיים למשימות מסוימות? תוכל להוסיף כאן דגלים ייחודיים
     return p
 
@@ -75,16 +85,28 @@ async def run_selected_mission(args):
     log.info("Selected mission: %s", args.mission)
     log.info("Connection: %s | Alt: %.2f | Speed: %.2f", args.conn, args.alt, args.speed)
 
-    if args.mission == "takeoff_land":
-        await run_takeoff_land(args.conn, args.alt)
-    elif args.mission == "survey":
-        await run_survey(args.conn, args.alt, args.speed)
-    elif args.mission == "orbit_rect":
-        await run_orbit_rect(args.conn, args.alt, args.speed)
-    elif args.mission == "square":
-        await run_square(args.conn, args.alt, args.speed)
-    else:
-        log.error("Unknown mission: %s", args.mission)
+    telemetry = None
+    if args.log:
+        # הלוגר והמשימה חולקים את אותו חיבור דרך ה-hub
+        hub = await get_hub(args.conn)
+        telemetry = TelemetryLogger(args.conn, args.log, hz=args.log_hz, profile=args.log_profile, hub=hub)
+        log.info("Telemetry log (%s) -> %s", args.log_profile, args.log)
+        await telemetry.start()
+
+    try:
+        if args.mission == "takeoff_land":
+            await run_takeoff_land(args.conn, args.alt)
+        elif args.mission == "survey":
+            await run_survey(args.conn, args.alt, args.speed, optimize=args.optimize_sweep)
+        elif args.mission == "orbit_rect":
+            await run_orbit_rect(args.conn, args.alt, args.speed)
+        elif args.mission == "square":
+            await run_square(args.conn, args.alt, args.speed)
+        else:
+            log.error("Unknown mission: %s", args.mission)
+    finally:
+        if telemetry:
+            await telemetry.stop()
 
 
 async def main_async():
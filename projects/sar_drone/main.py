@@ -4,6 +4,10 @@ import asyncio
 
 # --- כל הייבואים הרלוונטיים ---
 from src.utils.logger import TelemetryLogger
+from src.utils.streams import PROFILES
+from src.missions.telemetry_hub import get_hub
+from src.missions.coverage import load_area
+from src.missions.georef import CameraModel, TargetMap
 
 # משימות בסיסיות מהפרויקט המקורי
 from src.missions import takeoff_land, survey, orbit_rect, square
@@ -11,6 +15,7 @@ from src.missions import takeoff_land, survey, orbit_rect, square
 # משימות חדשות
 from src.missions import box_orbit
 from src.missions import sar_lawnmower
+from src.missions import partition
 
 
 # -----------------------------------------------------
@@ -26,13 +31,18 @@ def build_parser():
                        "orbit_rect",
                        "square",
                        "box_orbit",
-                       "sar_lawnmower"
+                       "sar_lawnmower",
+                       "swarm_survey"
                    ],
                    help="Select which mission to run")
     p.add_argument("--conn", default="udp://:14540",
                    help="PX4 connection URL (default: udp://:14540)")
     p.add_argument("--log", default=None,
-                   help="Path for CSV telemetry log (optional). Example: logs/out.csv")
+                   help="Telemetry log path (optional). .csv => CSV, otherwise a columnar npy directory. "
+                        "Example: logs/out.csv or logs/out.tlm")
+    p.add_argument("--log_profile", default="default", choices=sorted(PROFILES),
+                   help="Telemetry streams to log (minimal/default/nav/full)")
+    p.add_argument("--log_hz", type=float, default=2.0, help="Telemetry log row rate (Hz)")
 
     # --- generic ---
     p.add_argument("--alt", type=float, default=20.0, help="Flight altitude (m)")
@@ -52,10 +62,47 @@ def build_parser():
     p.add_argument("--box_w", type=float, default=80.0, help="[sar_lawnmower] Search box width (m)")
     p.add_argument("--box_h", type=float, default=60.0, help="[sar_lawnmower] Search box height (m)")
     p.add_argument("--lane", type=float, default=15.0, help="[sar_lawnmower] Lane spacing (m)")
+    p.add_argument("--area", default=None,
+                   help="[sar_lawnmower] Search polygon JSON/GeoJSON with optional no-fly holes "
+                        "(replaces the origin/box rectangle)")
+    p.add_argument("--optimize_sweep", action="store_true",
+                   help="[sar_lawnmower] Pick box sweep heading/entry corner by estimated flight time")
     p.add_argument("--video_src", type=int, default=0, help="[sar_lawnmower] OpenCV video source index")
     p.add_argument("--detect_n", type=int, default=5, help="[sar_lawnmower] Detect every N frames")
+    p.add_argument("--detect_workers", type=int, default=1,
+                   help="[sar_lawnmower] Detector threads (capture and display run in their own threads)")
+    p.add_argument("--no_display", action="store_true", help="[sar_lawnmower] Don't open the video window")
+    p.add_argument("--cadence", choices=["fixed", "adaptive"], default="fixed",
+                   help="[sar_lawnmower] Detection cadence: every --detect_n frames, or adaptive to ground "
+                        "speed/altitude/recent candidates within --detect_budget")
+    p.add_argument("--detect_budget", type=float, default=0.5,
+                   help="[sar_lawnmower] Adaptive cadence: max busy fraction per detector thread")
+    p.add_argument("--latency_budget_ms", type=float, default=500.0,
+                   help="[sar_lawnmower] Adaptive cadence: skip frames older than this at detection end")
+    p.add_argument("--track_conf", type=float, default=0.6,
+                   help="[sar_lawnmower] Track confidence (0-1) needed before approaching a target")
+    p.add_argument("--cam_hfov", type=float, default=78.0, help="[sar_lawnmower] Camera horizontal FOV (deg)")
+    p.add_argument("--cam_tilt", type=float, default=90.0,
+                   help="[sar_lawnmower] Camera axis below the horizon in the body frame (deg, 90 = nadir)")
+    p.add_argument("--gimbal", action="store_true",
+                   help="[sar_lawnmower] Camera is gimbal-stabilized (ignore vehicle roll/pitch in geo-referencing)")
+    p.add_argument("--merge_radius", type=float, default=8.0,
+                   help="[sar_lawnmower] Sightings closer than this (m) are the same target on the map")
+    p.add_argument("--capture_delay_ms", type=float, default=0.0,
+                   help="[sar_lawnmower] Known camera latency (exposure to frame available), subtracted from "
+                        "frame timestamps before looking up the vehicle pose")
+    p.add_argument("--evidence_dir", default="captures",
+                   help="[sar_lawnmower] Evidence images + index.jsonl (pose/detections per image)")
+    p.add_argument("--max_targets", type=int, default=1,
+                   help="[sar_lawnmower] Approach up to N distinct targets (resuming the search between), then RTL")
     p.add_argument("--sar_speed", type=float, default=6.0, help="[sar_lawnmower] Cruise speed (m/s)")
 
+    # --- swarm_survey params (משתמש גם ב-origin/box/lane/area/sar_alt) ---
+    p.add_argument("--swarm_conns", default="udp://:14540,udp://:14541,udp://:14542",
+                   help="[swarm_survey] Comma-separated connection URLs, one per vehicle")
+    p.add_argument("--swarm_speeds", default=None,
+                   help="[swarm_survey] Comma-separated cruise speeds (m/s), one per vehicle (default: --sar_speed)")
+
     return p
 
 
@@ -67,8 +114,10 @@ async def main():
 
     logger = None
     if args.log:
-        logger = TelemetryLogger(args.conn, args.log, hz=2.0)
-        print(f"[LOG] Telemetry -> {args.log}")
+        # אותו hub שהמשימה תקבל מ-get_hub/connect_drone => חיבור MAVSDK אחד לרכב
+        hub = await get_hub(args.conn)
+        logger = TelemetryLogger(args.conn, args.log, hz=args.log_hz, profile=args.log_profile, hub=hub)
+        print(f"[LOG] Telemetry ({args.log_profile}) -> {args.log}")
         await logger.start()
 
     try:
@@ -99,6 +148,7 @@ async def main():
             )
 
         elif args.mission == "sar_lawnmower":
+            polygon, holes = load_area(args.area) if args.area else (None, ())
             await sar_lawnmower.run(
                 conn_url=args.conn,
                 origin_lat=args.origin_lat,
@@ -110,6 +160,38 @@ async def main():
                 video_src=args.video_src,
                 detect_every_n_frames=args.detect_n,
                 cruise_speed_ms=args.sar_speed,
+                polygon=polygon,
+                holes=holes,
+                optimize_sweep=args.optimize_sweep,
+                detect_workers=args.detect_workers,
+                display=not args.no_display,
+                adaptive_cadence=args.cadence == "adaptive",
+                cpu_budget=args.detect_budget,
+                latency_budget_s=args.latency_budget_ms / 1000.0,
+                track_confidence=args.track_conf,
+                camera=CameraModel(hfov_deg=args.cam_hfov, tilt_deg=args.cam_tilt, stabilized=args.gimbal),
+                target_map=TargetMap(merge_radius_m=args.merge_radius),
+                max_targets=args.max_targets,
+                capture_delay_s=args.capture_delay_ms / 1000.0,
+                evidence_dir=args.evidence_dir,
+            )
+
+        elif args.mission == "swarm_survey":
+            conns = [c.strip() for c in args.swarm_conns.split(",") if c.strip()]
+            speeds = ([float(v) for v in args.swarm_speeds.split(",")] if args.swarm_speeds
+                      else [args.sar_speed] * len(conns))
+            polygon, holes = load_area(args.area) if args.area else (None, ())
+            await partition.run(
+                conn_urls=conns,
+                origin_lat=args.origin_lat,
+                origin_lon=args.origin_lon,
+                alt_m=args.sar_alt,
+                box_w_m=args.box_w,
+                box_h_m=args.box_h,
+                lane_m=args.lane,
+                speeds_ms=speeds,
+                polygon=polygon,
+                holes=holes,
             )
 
         else:
@@ -1,29 +1,19 @@
 from typing import List, Tuple
-import math
+
+import numpy as np
+
+from src.missions.geodesy import ne_to_latlon
 
 def build_lawnmower(origin_lat: float, origin_lon: float, altitude_m: float,
                     width_m: float, height_m: float, lane_spacing_m: float) -> List[Tuple[float, float, float]]:
     """
     יוצר רשימת waypoints לסריקה מלבנית בגובה קבוע.
-    ההמרות מ' למעלות מקורבות ומתאימות לשטחים קטנים (דמו).
+    כל הנקודות מומרות יחד (וקטורית) דרך src.missions.geodesy.
     """
-    def meters_to_deg_lat(m: float) -> float:
-        return m / 111_320.0
-
-    def meters_to_deg_lon(m: float, lat_deg: float) -> float:
-        k = 111_320.0 * max(0.3, abs(math.cos(math.radians(lat_deg))))
-        return m / k
-
-    waypoints: List[Tuple[float,float,float]] = []
     lanes = int(height_m // lane_spacing_m) + 1
-    left_lon  = origin_lon - meters_to_deg_lon(width_m/2, origin_lat)
-    right_lon = origin_lon + meters_to_deg_lon(width_m/2, origin_lat)
-    start_lat = origin_lat - meters_to_deg_lat(height_m/2)
-
-    for i in range(lanes):
-        lat_i = start_lat + meters_to_deg_lat(i * lane_spacing_m)
-        if i % 2 == 0:
-            waypoints += [(lat_i, left_lon, altitude_m), (lat_i, right_lon, altitude_m)]
-        else:
-            waypoints += [(lat_i, right_lon, altitude_m), (lat_i, left_lon, altitude_m)]
-    return waypoints
+    north = -height_m / 2 + lane_spacing_m * np.arange(lanes)
+    # מערב->מזרח בקווים הזוגיים, מזרח->מערב באי-זוגיים
+    sign = np.where(np.arange(lanes) % 2 == 0, 1.0, -1.0)
+    east = np.stack([-sign, sign], axis=1).ravel() * (width_m / 2)
+    lats, lons = ne_to_latlon(origin_lat, origin_lon, np.repeat(north, 2), east)
+    return [(lat, lon, altitude_m) for lat, lon in zip(lats.tolist(), lons.tolist())]
@@ -1,10 +1,152 @@
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
 import time
 import cv2
-import os
+
+log = logging.getLogger(__name__)
+
+_SEQ = itertools.count(1)   # מונה לכל התהליך: שמות ייחודיים גם בכמה פריימים באותה שנייה
+
+
+def unique_name(prefix="detect", ext=".jpg"):
+    """<prefix>_<YYYYmmdd-HHMMSS>.<ms>_<seq>.jpg — ייחודי ועולה בתוך התהליך."""
+    now = time.time()
+    ms = int((now % 1) * 1000)
+    return f"{prefix}_{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{ms:03d}_{next(_SEQ):06d}{ext}"
+
 
 def save_frame(frame, prefix="detect", out_dir="captures"):
     os.makedirs(out_dir, exist_ok=True)
-    ts = time.strftime("%Y%m%d-%H%M%S")
-    path = os.path.join(out_dir, f"{prefix}_{ts}.jpg")
+    path = os.path.join(out_dir, unique_name(prefix))
     cv2.imwrite(path, frame)
     return path
+
+
+def _json_default(o):
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "tolist"):        # numpy scalar / array
+        return o.tolist()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return str(o)
+
+
+class EvidenceWriter:
+    """
+    שמירת תמונות ראיה ברקע: submit() לא חוסם — מכניס לתור חסום וחוזר מיד עם הנתיב שישמר.
+    threads של קידוד (cv2.imencode משחרר את ה-GIL) כותבים את ה-JPEG ושורה ב-index.jsonl
+    (קובץ, זמנים, pose, זיהויים וכל meta) — כך שרצף פריימים לא תוקע את ה-event loop ובקרת הטיסה.
+    תור מלא => הפריים נזרק ונספר ב-dropped (לא ממתינים). reserved מקומות בתור שמורים
+    לפריימים עם priority=True (למשל אישור מטרה), כך שרצף פריימים רגילים לא דוחק אותם החוצה.
+    התמונה לא מועתקת: אין לשנות אותה אחרי submit.
+    """
+    def __init__(self, out_dir="captures", workers=2, maxsize=32, quality=90, index_name="index.jsonl",
+                 reserved=4):
+        self.out_dir = out_dir
+        self.quality = int(quality)
+        self.index_path = os.path.join(out_dir, index_name)
+        self.maxsize = max(1, int(maxsize))
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.abandoned = 0      # פריימים שנשארו בתור כש-close הגיע ל-timeout ולא נכתבו
+        self._encoding = 0      # פריימים שנלקחו מהתור ועוד לא נכתבו (מוגן ב-_index_lock)
+        self._q = queue.Queue(maxsize=self.maxsize + max(0, int(reserved)))
+        self._submit_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, name=f"evidence-{i}", daemon=True)
+                         for i in range(max(1, int(workers)))]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, image, prefix="detect", pose=None, detections=None, priority=False, **meta):
+        """נתיב הקובץ שייכתב, או None אם התור מלא והפריים נזרק."""
+        name = unique_name(prefix)
+        row = {"file": name, "wall_time": time.time(), "t": time.monotonic(),
+               "pose": pose, "detections": detections, **meta}
+        with self._submit_lock:     # רק submit מוסיף לתור, כך ש-qsize לא גדל בין הבדיקה ל-put
+            if not priority and self._q.qsize() >= self.maxsize:
+                self.dropped += 1
+                return None
+            try:
+                self._q.put_nowait((image, row))
+            except queue.Full:
+                self.dropped += 1
+                return None
+        return os.path.join(self.out_dir, name)
+
+    def close(self, timeout=5.0):
+        """
+        מחכה שהתור יתרוקן (עד timeout) ועוצר את ה-threads. חוסם — להריץ ב-executor מתוך asyncio.
+        ב-timeout הפריימים שעוד בתור ננטשים (abandoned) כדי שה-threads יקבלו את סימן העצירה.
+        מחזיר את מספר הפריימים שלא נכתבו: שננטשו בתור + שעדיין בקידוד כש-close חוזר.
+        """
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self._q.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        if any(t.is_alive() for t in self._threads):
+            # timeout: מה שעוד בתור לא ייכתב — מרוקנים ושולחים מחדש סימן עצירה לכל thread,
+            # כך שכל thread יוצא אחרי הפריים שהוא מקודד עכשיו
+            abandoned = 0
+            while True:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                abandoned += 1 if item is not None else 0
+            self.abandoned += abandoned
+            for _ in self._threads:
+                try:
+                    self._q.put_nowait(None)
+                except queue.Full:
+                    break
+        with self._index_lock:
+            busy = self._encoding
+        pending = self.abandoned + busy
+        if pending:
+            log.warning("Evidence: %d written, %d dropped, %d failed, %d pending not written "
+                        "(%d abandoned in queue, %d still encoding) after %.1fs -> %s",
+                        self.written, self.dropped, self.failed, pending, self.abandoned, busy,
+                        timeout, self.out_dir)
+        else:
+            log.info("Evidence: %d written, %d dropped, %d failed -> %s",
+                     self.written, self.dropped, self.failed, self.out_dir)
+        return pending
+
+    def _run(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            image, row = item
+            with self._index_lock:
+                self._encoding += 1
+            try:
+                ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if not ok:
+                    raise ValueError("JPEG encode failed")
+                with open(os.path.join(self.out_dir, row["file"]), "wb") as f:
+                    f.write(buf.tobytes())
+                line = json.dumps(row, default=_json_default, ensure_ascii=False)
+                with self._index_lock:
+                    with open(self.index_path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                    self.written += 1
+            except Exception as e:
+                self.failed += 1
+                log.warning("Evidence write failed for %s: %s", row["file"], e)
+            finally:
+                with self._index_lock:
+                    self._encoding -= 1
@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 class ColorTargetDetector:
     """
@@ -17,10 +17,7 @@ class ColorTargetDetector:
         self.hsv_high_2 = np.array(hsv_high_2, dtype=np.uint8)
         self.min_area   = min_area
 
-    def detect(self, frame_bgr) -> Optional[Tuple[int,int,int,int]]:
-        """
-        מחזיר bbox (x,y,w,h) אם נמצא יעד, אחרת None.
-        """
+    def _contours(self, frame_bgr):
         hsv = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2HSV)
         mask1 = cv2.inRange(hsv, self.hsv_low_1, self.hsv_high_1)
         mask2 = cv2.inRange(hsv, self.hsv_low_2, self.hsv_high_2)
@@ -28,6 +25,13 @@ class ColorTargetDetector:
         mask  = cv2.medianBlur(mask, 5)
 
         cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return cnts
+
+    def detect(self, frame_bgr) -> Optional[Tuple[int,int,int,int]]:
+        """
+        מחזיר bbox (x,y,w,h) אם נמצא יעד, אחרת None.
+        """
+        cnts = self._contours(frame_bgr)
         if not cnts:
             return None
         c = max(cnts, key=cv2.contourArea)
@@ -35,3 +39,10 @@ class ColorTargetDetector:
             return None
         x, y, w, h = cv2.boundingRect(c)
         return (x, y, w, h)
+
+    def detect_all(self, frame_bgr) -> List[Tuple[int,int,int,int]]:
+        """
+        כל ה-bboxes מעל min_area (לטרקר), מהגדול לקטן.
+        """
+        cnts = [c for c in self._contours(frame_bgr) if cv2.contourArea(c) >= self.min_area]
+        return [tuple(cv2.boundingRect(c)) for c in sorted(cnts, key=cv2.contourArea, reverse=True)]
@@ -1,22 +1,17 @@
 import asyncio
-from mavsdk import System
+import sys
+from pathlib import Path
 from mavsdk.offboard import OffboardError, VelocityNedYaw
 
+# src/ ב-PYTHONPATH בשביל swarm.connections
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from swarm.connections import connect_first  # noqa: E402
+
 PORTS = [14540 + i for i in range(10)]  # ננסה 14540..14549
 
 async def connect_any():
-    for p in PORTS:
-        d = System()
-        try:
-            print(f"Connecting to udp://:{p}")
-            await d.connect(system_address=f"udp://:{p}")
-            async for s in d.core.connection_state():
-                if s.is_connected:
-                    print(f"Connected on {p}")
-                    return d
-        except Exception as e:
-            print(f"Port {p} failed: {e}")
-    raise RuntimeError("No PX4 found on 14540-14549")
+    # כל הפורטים במקביל עם timeout (swarm/connections.py) — במקום ניסיון טורי שיכול להיתקע
+    return await connect_first(PORTS)
 
 async def wait_until_healthy(d):
     print("Waiting for system health…")
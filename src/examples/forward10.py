@@ -1,22 +1,17 @@
 import asyncio
-from mavsdk import System
+import sys
+from pathlib import Path
 from mavsdk.offboard import OffboardError, VelocityNedYaw
 
+# src/ ב-PYTHONPATH בשביל swarm.connections
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from swarm.connections import connect_first  # noqa: E402
+
 PORTS = [14540 + i for i in range(10)]  # נסה 14540..14549 אם היו לך מופעים קודמים
 
 async def connect_any():
-    for p in PORTS:
-        drone = System()
-        try:
-            print(f"Connecting to udp://:{p} ...")
-            await drone.connect(system_address=f"udp://:{p}")
-            async for state in drone.core.connection_state():
-                if state.is_connected:
-                    print(f"Connected on udp://:{p}")
-                    return drone
-        except Exception as e:
-            print(f"Port {p} failed: {e}")
-    raise RuntimeError("Could not connect to any PX4 port 14540-14549")
+    # כל הפורטים במקביל עם timeout (swarm/connections.py) — במקום ניסיון טורי שיכול להיתקע
+    return await connect_first(PORTS)
 
 async def wait_until_healthy(drone):
     print("Waiting for system health...")
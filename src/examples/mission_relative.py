@@ -1,4 +1,11 @@
-import asyncio, math
+import asyncio
+import sys
+from pathlib import Path
+
+# src/ ב-PYTHONPATH כדי להשתמש ב-missions.geodesy (כמו ב-main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from missions.geodesy import ne_to_latlon  # noqa: E402
+from swarm.connections import connect_first  # noqa: E402
 from mavsdk import System
 from mavsdk.mission import MissionItem, MissionPlan
 
@@ -6,24 +13,12 @@ PORTS = [14540 + i for i in range(10)]  # ננסה 14540..14549
 
 def add_meters(lat_deg, lon_deg, north_m, east_m):
     """המרת היסטים במטרים ל-lat/lon יחסית לנקודת הבית."""
-    dlat = north_m / 111_111.0
-    dlon = east_m / (111_111.0 * math.cos(math.radians(lat_deg)))
-    return lat_deg + dlat, lon_deg + dlon
+    lat, lon = ne_to_latlon(lat_deg, lon_deg, north_m, east_m)
+    return float(lat), float(lon)
 
 async def connect_any():
-    for p in PORTS:
-        d = System()
-        try:
-            print(f"Connecting to udpin://:{p} (udp:// גם יעבוד)")
-            # חלק מהגרסאות מדפיסות אזהרה על udp://; שתי הכתובות תקינות ב-SITL
-            await d.connect(system_address=f"udpin://:{p}")
-            async for s in d.core.connection_state():
-                if s.is_connected:
-                    print(f"Connected on {p}")
-                    return d
-        except Exception as e:
-            print(f"Port {p} failed: {e}")
-    raise RuntimeError("No PX4 found on 14540-14549")
+    # כל הפורטים במקביל עם timeout (swarm/connections.py) — במקום ניסיון טורי שיכול להיתקע
+    return await connect_first(PORTS)
 
 async def wait_until_ready(drone):
     print("Waiting for health and home position…")
@@ -102,7 +97,7 @@ async def main():
 
 if __name__ == "__main__":
     asyncio.run(main())
-import asyncio, math
+import asyncio
 from mavsdk import System
 from mavsdk.mission import MissionItem, MissionPlan
 
@@ -110,24 +105,12 @@ PORTS = [14540 + i for i in range(10)]  # ננסה 14540..14549
 
 def add_meters(lat_deg, lon_deg, north_m, east_m):
     """המרת היסטים במטרים ל-lat/lon יחסית לנקודת הבית."""
-    dlat = north_m / 111_111.0
-    dlon = east_m / (111_111.0 * math.cos(math.radians(lat_deg)))
-    return lat_deg + dlat, lon_deg + dlon
+    lat, lon = ne_to_latlon(lat_deg, lon_deg, north_m, east_m)
+    return float(lat), float(lon)
 
 async def connect_any():
-    for p in PORTS:
-        d = System()
-        try:
-            print(f"Connecting to udpin://:{p} (udp:// גם יעבוד)")
-            # חלק מהגרסאות מדפיסות אזהרה על udp://; שתי הכתובות תקינות ב-SITL
-            await d.connect(system_address=f"udp://:{p}")
-            async for s in d.core.connection_state():
-                if s.is_connected:
-                    print(f"Connected on {p}")
-                    return d
-        except Exception as e:
-            print(f"Port {p} failed: {e}")
-    raise RuntimeError("No PX4 found on 14540-14549")
+    # כל הפורטים במקביל עם timeout (swarm/connections.py) — במקום ניסיון טורי שיכול להיתקע
+    return await connect_first(PORTS)
 
 async def wait_until_ready(drone):
     print("Waiting for health and home position…")
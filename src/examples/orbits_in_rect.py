@@ -1,6 +1,12 @@
 # orbits_in_rect.py
 # דרישות: pip install mavsdk
 import asyncio, math
+import sys
+from pathlib import Path
+
+# src/ ב-PYTHONPATH כדי להשתמש ב-missions.geodesy (כמו ב-main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from missions.geodesy import ne_to_latlon  # noqa: E402
 from mavsdk import System
 from mavsdk.offboard import OffboardError, VelocityNedYaw
 
@@ -25,9 +31,8 @@ SYSTEM_ADDRESS = "udp://:14540"  # נסה גם "udp://:14540" אם צריך
 # ========== עזר גיאו ==========
 
 def meters_to_latlon_offset(d_north_m: float, d_east_m: float, ref_lat_deg: float):
-    dlat = d_north_m / 111320.0
-    dlon = d_east_m / (111320.0 * math.cos(math.radians(ref_lat_deg)))
-    return dlat, dlon
+    lat, lon = ne_to_latlon(ref_lat_deg, 0.0, d_north_m, d_east_m)
+    return float(lat) - ref_lat_deg, float(lon)
 
 def build_grid_centers(center_lat, center_lon, width_m, height_m, spacing_m, serpentine=True):
     """יוצר רשימת מרכזי אורביט בתוך מלבן, מסודר בשורות (צפון->דרום).
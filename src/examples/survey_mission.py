@@ -1,5 +1,10 @@
 import asyncio
-import math
+import sys
+from pathlib import Path
+
+# src/ ב-PYTHONPATH כדי להשתמש ב-missions.geodesy (כמו ב-main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from missions.geodesy import ne_to_latlon  # noqa: E402
 from mavsdk import System
 from mavsdk.mission import (MissionItem, MissionPlan)
 
@@ -18,9 +23,8 @@ CENTER_LON = None              # לדוגמה: 8.5456
 # === פונקציות עזר ===
 def meters_to_latlon_offset(d_north_m: float, d_east_m: float, ref_lat_deg: float):
     """ ממיר היסט מקומי במטרים (N,E) להיסט ב- lat/lon מעל קו רוחב ref_lat_deg. """
-    dlat = d_north_m / 111320.0
-    dlon = d_east_m / (111320.0 * math.cos(math.radians(ref_lat_deg)))
-    return dlat, dlon
+    lat, lon = ne_to_latlon(ref_lat_deg, 0.0, d_north_m, d_east_m)
+    return float(lat) - ref_lat_deg, float(lon)
 
 def build_lawnmower_points(center_lat, center_lon, width_m, height_m, spacing_m, start_east_first=True):
     """
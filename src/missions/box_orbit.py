@@ -1,14 +1,14 @@
 # src/missions/box_orbit.py
-import asyncio, math
+import asyncio
 from typing import Tuple, List
 from mavsdk import System, mission
 from mavsdk.telemetry import FlightMode
+from .geodesy import ne_to_latlon
+from .telemetry_hub import get_hub
 
 def meters_to_latlon(lat_deg: float, lon_deg: float, north_m: float, east_m: float) -> Tuple[float, float]:
-    R = 6378137.0
-    dlat = north_m / R
-    dlon = east_m / (R * math.cos(math.radians(lat_deg)))
-    return lat_deg + math.degrees(dlat), lon_deg + math.degrees(dlon)
+    lat, lon = ne_to_latlon(lat_deg, lon_deg, north_m, east_m)
+    return float(lat), float(lon)
 
 async def _wait_ready(drone: System, min_sats=6):
     # Home + Global position
@@ -30,8 +30,7 @@ async def run(conn_url: str = "udp://:14540",
               orbit_radius_m: float = 20.0,
               orbit_time_s: int = 45,
               cruise_speed_ms: float = 7.0):
-    drone = System()
-    await drone.connect(system_address=conn_url)
+    drone = (await get_hub(conn_url)).drone
     print(f"[BOX-ORBIT] Connecting to {conn_url} ...")
     await _wait_ready(drone)
 
@@ -54,9 +53,12 @@ async def run(conn_url: str = "udp://:14540",
     half_len, half_wid = length_m/2.0, width_m/2.0
     corners_ne = [(+half_len, -half_wid), (+half_len, +half_wid), (-half_len, +half_wid), (-half_len, -half_wid)]
 
+    # כל הפינות בהמרה וקטורית אחת
+    corner_lats, corner_lons = ne_to_latlon(home_lat, home_lon, *zip(*corners_ne))
+    corners_ll = list(zip(corner_lats.tolist(), corner_lons.tolist()))
+
     def add_box_once():
-        for n,e in corners_ne:
-            lat, lon = meters_to_latlon(home_lat, home_lon, n, e)
+        for lat, lon in corners_ll:
             items.append(mission.MissionItem(
                 lat, lon, alt_agl, speed_m_s=cruise_speed_ms, is_fly_through=True,
                 gimbal_pitch_deg=float("nan"), gimbal_yaw_deg=float("nan"),
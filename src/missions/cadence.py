@@ -0,0 +1,106 @@
+# src/missions/cadence.py
+import logging
+import math
+import time
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class CadenceScheduler:
+    """
+    קצב זיהוי אדפטיבי במקום "כל N פריימים" קבוע.
+
+    המרווח בין זיהויים נקבע לפי מה שצריך כדי לא לפספס, ולא יותר:
+      - כיסוי: כל נקודה על הקרקע צריכה להיראות looks פעמים בזמן שהיא עוברת בפריים.
+        אורך ה-footprint לאורך הטיסה הוא 2·alt·tan(vfov/2), ולכן המרווח הוא footprint / (looks·v).
+        בריחוף (v≈0) מספיק max_interval_s.
+      - מועמד: אחרי תוצאה חיובית, למשך candidate_hold_s, הזיהוי רץ בקצב המרבי שה-boost_budget מתיר.
+      - תקציב: המרווח לעולם לא קטן מ-detect_s / (budget·workers), כאשר detect_s הוא EWMA של זמן
+        הזיהוי. כך כל worker עסוק לכל היותר cpu_budget מהזמן (boost_budget בזמן מועמד).
+      - פריים ישן: אם age + detect_s > latency_budget_s, הפריים מדולג. תוצאה עליו תגיע מאוחר מדי.
+        אבל לא יותר מ-max_interval_s בלי זיהוי: אחרי זיהוי איטי אחד (למשל ריצה ראשונה של מודל)
+        כל הפריימים היו "ישנים" לתמיד, כי detect_s מתעדכן רק מזיהויים. לכן פריים טרי עדיין נשלח
+        (forced) וה-EWMA מתאושש.
+    ground_speed_ms ו-alt_m מתעדכנים מבחוץ (מה-event loop, מההיסטוריה).
+    should_detect נקרא מה-dispatcher, record מה-workers, note_candidate מה-loop.
+    """
+    def __init__(self, cpu_budget: float = 0.5, boost_budget: float = 1.0, latency_budget_s: float = 0.5,
+                 alt_m: float = 20.0, vfov_deg: float = 48.0, looks: float = 3.0,
+                 max_interval_s: float = 1.0, candidate_hold_s: float = 3.0, workers: int = 1,
+                 ewma: float = 0.2):
+        self.cpu_budget = cpu_budget
+        self.boost_budget = boost_budget
+        self.latency_budget_s = latency_budget_s
+        self.alt_m = alt_m
+        self.vfov_deg = vfov_deg
+        self.looks = looks
+        self.max_interval_s = max_interval_s
+        self.candidate_hold_s = candidate_hold_s
+        self.workers = max(1, int(workers))
+        self.ewma = ewma
+        self.ground_speed_ms = 0.0
+        self.detect_s: Optional[float] = None
+        self.scheduled = 0
+        self.skipped_stale = 0
+        self.skipped_cadence = 0
+        self.forced = 0
+        self._last_candidate = -math.inf
+        self._last_t = -math.inf
+        self._next_t = 0.0
+        self._slow = False
+
+    @property
+    def footprint_m(self) -> float:
+        """אורך השטח שבפריים לאורך כיוון הטיסה."""
+        return 2.0 * max(self.alt_m, 0.0) * math.tan(math.radians(self.vfov_deg) / 2.0)
+
+    def boosted(self, now: float) -> bool:
+        return now - self._last_candidate < self.candidate_hold_s
+
+    def interval_s(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        boosted = self.boosted(now)
+        budget = self.boost_budget if boosted else self.cpu_budget
+        floor = (self.detect_s or 0.0) / (max(budget, 1e-3) * self.workers)
+        if boosted:
+            need = 0.0
+        else:
+            v = self.ground_speed_ms
+            need = self.footprint_m / (self.looks * v) if v > 0.1 else self.max_interval_s
+        return max(floor, min(need, self.max_interval_s))
+
+    def should_detect(self, frame_t: float, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        starved = now - self._last_t >= self.max_interval_s
+        if now - frame_t + (self.detect_s or 0.0) > self.latency_budget_s:
+            if not starved or now - frame_t > self.latency_budget_s:
+                self.skipped_stale += 1
+                return False
+            self.forced += 1   # רק detect_s חורג מהתקציב — זיהוי אחד לכל max_interval_s בכל זאת
+        elif now < self._next_t:
+            self.skipped_cadence += 1
+            return False
+        self._next_t = now + self.interval_s(now)
+        self._last_t = now
+        self.scheduled += 1
+        return True
+
+    def record(self, duration_s: float):
+        """זמן ריצה של זיהוי אחד (לעדכון ה-EWMA)."""
+        d = self.detect_s
+        self.detect_s = duration_s if d is None else d + self.ewma * (duration_s - d)
+        slow = self.detect_s > self.latency_budget_s
+        if slow and not self._slow:
+            log.warning("Detection takes %.0f ms (EWMA), over the %.0f ms latency budget — "
+                        "only one frame per %.1f s will be detected until it recovers",
+                        1e3 * self.detect_s, 1e3 * self.latency_budget_s, self.max_interval_s)
+        self._slow = slow
+
+    def note_candidate(self, t: Optional[float] = None):
+        self._last_candidate = time.monotonic() if t is None else t
+
+    def summary(self) -> str:
+        return (f"cadence: {self.scheduled} scheduled, {self.skipped_cadence} skipped by cadence, "
+                f"{self.skipped_stale} stale, {self.forced} forced, detect {1e3 * (self.detect_s or 0.0):.0f} ms, "
+                f"interval now {self.interval_s():.2f} s")
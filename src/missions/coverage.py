@@ -0,0 +1,352 @@
+# src/missions/coverage.py
+"""
+תכנון כיסוי לפוליגון גאודטי עם "חורים" (אזורי no-fly) בשיטת Boustrophedon.
+
+1. הפוליגון מומר למישור מקומי (geodesy) ומסובב כך שקווי הסריקה אופקיים.
+2. כל קו סריקה נחתך מול כל צלעות הטבעות (וקטורית: קווים x צלעות) => מקטעים פנויים.
+3. מקטעים בקווים סמוכים שחופפים 1:1 מצטרפים לאותו תא; פיצול/איחוד (חור, קעירות) פותח תאים חדשים.
+4. כל תא נטוס הלוך-חזור; התאים מסודרים בחמדנות לפי קרבה, והמעברים עוקפים חורים (גרף נראות).
+זווית הסריקה נבחרת כך שמספר המקטעים (= מספר הפניות) מינימלי; בין זוויות שוות — המסלול
+הקצר ביותר (או המהיר ביותר לפי sweep.KinematicModel אם ניתן).
+"""
+import heapq
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geodesy import geodetic_to_ned, ned_to_geodetic
+from .sweep import KinematicModel, travel_time
+
+LatLon = Tuple[float, float]
+_EPS = 1e-9
+
+
+@dataclass
+class CoveragePlan:
+    waypoints: List[Tuple[float, float, float]]   # (lat, lon, alt) — מוכן ל-make_mission_plan
+    sweep_angle_deg: float                        # כיוון הקווים (0 = צפון, 90 = מזרח)
+    lanes: int
+    segments: int
+    cells: int
+    length_m: float
+    local_xy: np.ndarray = field(repr=False, default=None)  # (K,2) east/north במטרים
+
+
+def rings_to_local(polygon: Sequence[LatLon], holes: Sequence[Sequence[LatLon]]):
+    """((lat0, lon0), [outer, *holes]) — כל טבעת (K,2) east/north במטרים סביב מרכז הקודקודים."""
+    outer = np.asarray(polygon, dtype=np.float64)
+    lat0, lon0 = float(outer[:, 0].mean()), float(outer[:, 1].mean())
+    rings = []
+    for ring in [outer, *(np.asarray(h, dtype=np.float64) for h in holes)]:
+        n, e, _ = geodetic_to_ned(lat0, lon0, 0.0, ring[:, 0], ring[:, 1])
+        xy = np.stack([e, n], axis=1)
+        if len(xy) > 1 and np.allclose(xy[0], xy[-1]):
+            xy = xy[:-1]  # טבעת סגורה => בלי נקודה כפולה
+        rings.append(xy)
+    return (lat0, lon0), rings
+
+
+def _edges(rings: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(P, Q): מערכי (E,2) של תחילת/סוף כל צלע בכל הטבעות."""
+    p = np.concatenate(rings)
+    q = np.concatenate([np.roll(r, -1, axis=0) for r in rings])
+    return p, q
+
+
+def _rotate(xy: np.ndarray, angle_deg: float) -> np.ndarray:
+    """מסובב כך שכיוון angle_deg (0=צפון, 90=מזרח) הופך לציר u, והניצב לו לציר v."""
+    a = np.radians(angle_deg)
+    d = np.array([np.sin(a), np.cos(a)])      # כיוון הקו (east, north)
+    nrm = np.array([-d[1], d[0]])              # ניצב
+    return np.stack([xy @ d, xy @ nrm], axis=-1)
+
+
+def _unrotate(uv: np.ndarray, angle_deg: float) -> np.ndarray:
+    a = np.radians(angle_deg)
+    d = np.array([np.sin(a), np.cos(a)])
+    nrm = np.array([-d[1], d[0]])
+    return uv[..., :1] * d + uv[..., 1:] * nrm
+
+
+def _lane_intervals(p_uv: np.ndarray, q_uv: np.ndarray, spacing: float):
+    """
+    מחזיר (vs, intervals): קואורדינטת v של כל קו, ולכל קו רשימת (u_start, u_end) פנויים.
+    החיתוך וקטורי על כל הזוגות קו x צלע; כלל חצי-פתוח min<=v<max מונע ספירה כפולה בקודקודים.
+    """
+    vmin = min(p_uv[:, 1].min(), q_uv[:, 1].min())
+    vmax = max(p_uv[:, 1].max(), q_uv[:, 1].max())
+    n_lanes = max(1, int(np.ceil((vmax - vmin) / spacing - _EPS)))
+    # רצועות שוות ברוחב <= spacing והקווים במרכזן: הקווים הקיצוניים במרחק <= spacing/2 מהשפה
+    step = (vmax - vmin) / n_lanes
+    vs = vmin + step * (np.arange(n_lanes) + 0.5)
+    vs = np.clip(vs, vmin + _EPS, vmax - _EPS)
+
+    pv, qv = p_uv[:, 1][None, :], q_uv[:, 1][None, :]
+    lo, hi = np.minimum(pv, qv), np.maximum(pv, qv)
+    v = vs[:, None]
+    hit = (lo <= v) & (v < hi)
+    dv = np.where(qv - pv == 0, 1.0, qv - pv)
+    u = p_uv[:, 0][None, :] + (v - pv) * (q_uv[:, 0] - p_uv[:, 0])[None, :] / dv
+    u = np.where(hit, u, np.inf)
+    u.sort(axis=1)
+    counts = hit.sum(axis=1)
+
+    intervals = []
+    for k in range(n_lanes):
+        xs = u[k, :counts[k] - counts[k] % 2]
+        intervals.append([(float(a), float(b)) for a, b in zip(xs[0::2], xs[1::2]) if b - a > _EPS])
+    return vs, intervals
+
+
+def count_segments(rings: List[np.ndarray], spacing: float, angles_deg: Sequence[float]) -> np.ndarray:
+    """מספר מקטעי הסריקה לכל זווית (מדד למספר הפניות)."""
+    p, q = _edges(rings)
+    out = np.empty(len(angles_deg), dtype=np.int64)
+    for i, ang in enumerate(angles_deg):
+        _, iv = _lane_intervals(_rotate(p, ang), _rotate(q, ang), spacing)
+        out[i] = sum(len(x) for x in iv)
+    return out
+
+
+def _candidate_angles(rings: List[np.ndarray], step_deg: float = 5.0) -> np.ndarray:
+    p, q = _edges(rings)
+    d = q - p
+    edge_angles = np.degrees(np.arctan2(d[:, 0], d[:, 1])) % 180.0
+    grid = np.arange(0.0, 180.0, step_deg)
+    return np.unique(np.round(np.concatenate([edge_angles, grid]), 3))
+
+
+def _decompose(vs: np.ndarray, intervals) -> List[List[Tuple[float, float, float]]]:
+    """מקבץ מקטעים לתאים: כל תא = רשימת (v, u_start, u_end) בקווים עוקבים."""
+    cells: List[List[Tuple[float, float, float]]] = []
+    open_cells: List[int] = []   # אינדקסים לתאים שהמקטע האחרון שלהם בקו הקודם
+    for v, ivs in zip(vs, intervals):
+        prev = [cells[c][-1] for c in open_cells]
+        overlaps = [[j for j, (_, a0, b0) in enumerate(prev) if a < b0 and a0 < b] for a, b in ivs]
+        used_by = [sum(j in o for o in overlaps) for j in range(len(prev))]
+        new_open = []
+        for (a, b), ov in zip(ivs, overlaps):
+            if len(ov) == 1 and used_by[ov[0]] == 1:
+                c = open_cells[ov[0]]          # המשך רציף של אותו תא
+            else:
+                c = len(cells)                 # אירוע קריטי: תא חדש
+                cells.append([])
+            cells[c].append((float(v), a, b))
+            new_open.append(c)
+        open_cells = new_open
+    return cells
+
+
+def _point_in_free(pt: np.ndarray, rings: List[np.ndarray]) -> bool:
+    """even-odd על כל הטבעות: בתוך החיצונית ומחוץ לכל החורים."""
+    p, q = _edges(rings)
+    x, y = pt
+    crosses = ((p[:, 1] > y) != (q[:, 1] > y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xi = p[:, 0] + (y - p[:, 1]) * (q[:, 0] - p[:, 0]) / (q[:, 1] - p[:, 1])
+    return bool(np.count_nonzero(crosses & (x < xi)) % 2)
+
+
+def _on_boundary(pt: np.ndarray, p: np.ndarray, q: np.ndarray, tol: float = 1e-6) -> bool:
+    """האם הנקודה על אחת הצלעות (בטווח tol מטרים)."""
+    d = q - p
+    t = np.clip(((pt - p) * d).sum(axis=1) / np.maximum((d * d).sum(axis=1), _EPS), 0.0, 1.0)
+    return bool((np.hypot(*(p + t[:, None] * d - pt).T) <= tol).any())
+
+
+def _segment_clear(a: np.ndarray, b: np.ndarray, p: np.ndarray, q: np.ndarray, rings) -> bool:
+    """
+    האם הקטע a-b לא חוצה אף צלע (חיתוך ממשי) ונשאר באזור הפנוי. נקודה על השפה נחשבת פנויה:
+    קצוות הקווים יושבים על השפה, והמעבר בין קווים סמוכים רץ לאורך צלע.
+    """
+    def orient(o, s, t):
+        return (s[..., 0] - o[..., 0]) * (t[..., 1] - o[..., 1]) - (s[..., 1] - o[..., 1]) * (t[..., 0] - o[..., 0])
+    d1, d2 = orient(a, b, p), orient(a, b, q)
+    d3, d4 = orient(p, q, a), orient(p, q, b)
+    tol = 1e-7
+    proper = (d1 * d2 < -tol) & (d3 * d4 < -tol)
+    if proper.any():
+        return False
+    for t in (0.25, 0.5, 0.75):
+        m = a + t * (b - a)
+        if not (_on_boundary(m, p, q) or _point_in_free(m, rings)):
+            return False
+    return True
+
+
+class _Router:
+    """מעברים בין נקודות: קו ישר אם פנוי, אחרת מסלול קצר בגרף הנראות של קודקודי הטבעות."""
+    def __init__(self, rings: List[np.ndarray]):
+        self.rings = rings
+        self.p, self.q = _edges(rings)
+        # קודקודים מוזזים מעט פנימה לאזור הפנוי כדי שקטעים דרכם לא "ייגעו" בצלעות
+        self.nodes = self._inset_vertices(0.5)
+        self._vis = None
+
+    def _inset_vertices(self, d: float) -> np.ndarray:
+        out = []
+        for ring in self.rings:
+            prev, nxt = np.roll(ring, 1, axis=0), np.roll(ring, -1, axis=0)
+            for v, a, b in zip(ring, prev, nxt):
+                bis = (a - v) / (np.linalg.norm(a - v) + _EPS) + (b - v) / (np.linalg.norm(b - v) + _EPS)
+                if np.linalg.norm(bis) < _EPS:
+                    continue
+                bis /= np.linalg.norm(bis)
+                for cand in (v + d * bis, v - d * bis):
+                    if _point_in_free(cand, self.rings):
+                        out.append(cand)
+                        break
+        return np.array(out).reshape(-1, 2)
+
+    def _clear(self, a, b) -> bool:
+        return _segment_clear(a, b, self.p, self.q, self.rings)
+
+    def route(self, a: np.ndarray, b: np.ndarray) -> List[np.ndarray]:
+        """נקודות ביניים (בלי a, כולל b)."""
+        if self._clear(a, b) or len(self.nodes) == 0:
+            return [b]
+        if self._vis is None:
+            n = len(self.nodes)
+            self._vis = [[j for j in range(n) if j != i and self._clear(self.nodes[i], self.nodes[j])]
+                         for i in range(n)]
+        n = len(self.nodes)
+        start, goal = n, n + 1
+        pts = np.vstack([self.nodes, a, b])
+        adj = {i: list(self._vis[i]) for i in range(n)}
+        adj[start] = [j for j in range(n) if self._clear(a, self.nodes[j])]
+        for j in range(n):
+            if self._clear(self.nodes[j], b):
+                adj[j] = adj[j] + [goal]
+        dist, prev = {start: 0.0}, {}
+        heap = [(0.0, start)]
+        while heap:
+            d, i = heapq.heappop(heap)
+            if i == goal:
+                break
+            if d > dist.get(i, np.inf):
+                continue
+            for j in adj.get(i, ()):
+                nd = d + float(np.linalg.norm(pts[i] - pts[j]))
+                if nd < dist.get(j, np.inf):
+                    dist[j], prev[j] = nd, i
+                    heapq.heappush(heap, (nd, j))
+        if goal not in prev:
+            return [b]  # אין מסלול עוקף (גיאומטריה לא תקינה) — ישר
+        path, i = [], goal
+        while i != start:
+            path.append(pts[i])
+            i = prev[i]
+        return path[::-1]
+
+
+def _order_cells(cells, angle: float, start_xy: np.ndarray, router: _Router) -> List[np.ndarray]:
+    """סידור חמדני של התאים + כיוון כניסה לכל תא; מחזיר את כל הנקודות במישור המקומי."""
+    remaining = list(range(len(cells)))
+    pos = start_xy
+    out: List[np.ndarray] = []
+    while remaining:
+        best = None
+        for c in remaining:
+            lanes = cells[c]
+            for rev_lanes in (False, True):
+                seq = lanes[::-1] if rev_lanes else lanes
+                for first_dir in (0, 1):
+                    v, a, b = seq[0]
+                    entry_u = a if first_dir == 0 else b
+                    entry = _unrotate(np.array([entry_u, v]), angle)
+                    d = float(np.linalg.norm(entry - pos))
+                    if best is None or d < best[0]:
+                        best = (d, c, seq, first_dir)
+        _, c, seq, first_dir = best
+        remaining.remove(c)
+        pts = []
+        for k, (v, a, b) in enumerate(seq):
+            forward = (k % 2 == 0) == (first_dir == 0)
+            ends = [(a, v), (b, v)] if forward else [(b, v), (a, v)]
+            pts.extend(ends)
+        local = _unrotate(np.array(pts), angle)
+        for pt in local:
+            out.extend(router.route(pos, pt) if len(out) else [pt])
+            pos = pt
+    return out
+
+
+def _path_cost(local: np.ndarray, model: Optional[KinematicModel]) -> float:
+    """אורך המסלול, או זמן לפי model (עצירה בכל waypoint — פנייה של מולטירוטור)."""
+    if len(local) < 2:
+        return 0.0
+    legs = np.linalg.norm(np.diff(local, axis=0), axis=1)
+    return float(legs.sum() if model is None else travel_time(legs, 0.0, 0.0, model).sum())
+
+
+def plan_coverage(polygon: Sequence[LatLon], lane_spacing_m: float, altitude_m: float,
+                  holes: Sequence[Sequence[LatLon]] = (), sweep_angle_deg: Optional[float] = None,
+                  start: Optional[LatLon] = None, model: Optional[KinematicModel] = None) -> CoveragePlan:
+    """
+    תוכנית כיסוי לפוליגון (lat, lon) עם חורים. sweep_angle_deg=None => בחירת הזווית
+    עם מינימום מקטעים (פניות); בין זוויות עם אותו מספר — המסלול הקצר ביותר, או הזמן
+    הקצר ביותר לפי model אם ניתן. start (lat, lon) משפיע על סדר התאים (ברירת מחדל: הקודקוד הראשון).
+    """
+    if lane_spacing_m <= 0:
+        raise ValueError("lane_spacing_m must be positive")
+    (lat0, lon0), rings = rings_to_local(polygon, holes)
+    if len(rings[0]) < 3:
+        raise ValueError("polygon needs at least 3 vertices")
+
+    if start is None:
+        start_xy = rings[0][0]
+    else:
+        n, e, _ = geodetic_to_ned(lat0, lon0, 0.0, start[0], start[1])
+        start_xy = np.array([float(e), float(n)])
+
+    if sweep_angle_deg is None:
+        angles = _candidate_angles(rings)
+        counts = count_segments(rings, lane_spacing_m, angles)
+        tied = angles[counts == counts.min()]
+    else:
+        tied = [sweep_angle_deg]
+
+    p, q = _edges(rings)
+    router = _Router(rings)    # לא תלוי בזווית — גרף הנראות נבנה פעם אחת
+    best = None
+    for ang in tied:
+        ang = float(ang)
+        vs, intervals = _lane_intervals(_rotate(p, ang), _rotate(q, ang), lane_spacing_m)
+        cells = [c for c in _decompose(vs, intervals) if c]
+        local = np.array(_order_cells(cells, ang, start_xy, router)).reshape(-1, 2)
+        cost = _path_cost(local, model)
+        if best is None or cost < best[0] - 1e-6:
+            best = (cost, ang, vs, intervals, cells, local)
+    _, sweep_angle_deg, vs, intervals, cells, local = best
+
+    lats, lons, _ = ned_to_geodetic(lat0, lon0, 0.0, local[:, 1], local[:, 0])
+    waypoints = [(la, lo, altitude_m) for la, lo in zip(lats.tolist(), lons.tolist())]
+    length = _path_cost(local, None)
+    return CoveragePlan(waypoints=waypoints, sweep_angle_deg=sweep_angle_deg, lanes=len(vs),
+                        segments=sum(len(iv) for iv in intervals), cells=len(cells),
+                        length_m=length, local_xy=local)
+
+
+def coverage_waypoints(polygon: Sequence[LatLon], lane_spacing_m: float, altitude_m: float,
+                       holes: Sequence[Sequence[LatLon]] = ()) -> List[Tuple[float, float, float]]:
+    """קיצור: רק רשימת ה-waypoints (תואם ל-build_lawnmower / make_mission_plan)."""
+    return plan_coverage(polygon, lane_spacing_m, altitude_m, holes).waypoints
+
+
+def load_area(path: str) -> Tuple[List[LatLon], List[List[LatLon]]]:
+    """
+    קורא אזור מקובץ JSON: {"polygon": [[lat, lon], ...], "holes": [[[lat, lon], ...], ...]}
+    או GeoJSON Polygon/Feature (קואורדינטות [lon, lat]; טבעת ראשונה = חיצונית, השאר = חורים).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "polygon" in data:
+        return ([tuple(p) for p in data["polygon"]],
+                [[tuple(p) for p in h] for h in data.get("holes", [])])
+    geom = data.get("geometry", data)
+    if geom.get("type") != "Polygon":
+        raise ValueError(f"Unsupported area geometry: {geom.get('type')}")
+    rings = [[(lat, lon) for lon, lat, *_ in ring] for ring in geom["coordinates"]]
+    return rings[0], rings[1:]
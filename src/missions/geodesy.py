@@ -0,0 +1,124 @@
+# src/missions/geodesy.py
+"""
+המרות NED <-> גאודטי וקטוריות (מערך נכנס, מערך יוצא) סביב נקודת ייחוס (lat0, lon0, alt0).
+
+שני מצבים:
+  - "ltp"   : מישור משיק מקומי עם רדיוסי העקמומיות של WGS-84 בנקודת הייחוס.
+              מהיר מאוד; השגיאה גדלה בריבוע המרחק (~0.3 מ' ב-1 ק"מ) — מתאים לתכנון מסלולים.
+  - "wgs84" : המרה מדויקת דרך ECEF/ENU על האליפסואיד (לטווחים ארוכים).
+כל הפונקציות מקבלות סקלרים או מערכים (broadcasting של NumPy) ומחזירות מערכי float64.
+"""
+from typing import Tuple
+
+import numpy as np
+
+WGS84_A = 6378137.0
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+WGS84_B = WGS84_A * (1.0 - WGS84_F)
+
+LTP = "ltp"
+WGS84 = "wgs84"
+MODES = (LTP, WGS84)
+
+Arrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _check_mode(mode: str):
+    if mode not in MODES:
+        raise ValueError(f"Unknown geodesy mode '{mode}' (choose from {MODES})")
+
+
+def radii_of_curvature(lat_deg) -> Tuple[np.ndarray, np.ndarray]:
+    """(M, N): רדיוס מרידיאני ורדיוס אנך ראשי במטרים."""
+    s = np.sin(np.radians(lat_deg))
+    w = np.sqrt(1.0 - WGS84_E2 * s * s)
+    return WGS84_A * (1.0 - WGS84_E2) / w ** 3, WGS84_A / w
+
+
+def geodetic_to_ecef(lat_deg, lon_deg, alt_m) -> Arrays:
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    _, n = radii_of_curvature(lat_deg)
+    h = np.asarray(alt_m, dtype=np.float64)
+    x = (n + h) * np.cos(lat) * np.cos(lon)
+    y = (n + h) * np.cos(lat) * np.sin(lon)
+    z = (n * (1.0 - WGS84_E2) + h) * np.sin(lat)
+    return x, y, z
+
+
+def ecef_to_geodetic(x, y, z) -> Arrays:
+    """Bowring עם שני צעדי תיקון — דיוק תת-מילימטרי לגבהים של רחפנים."""
+    x, y, z = (np.asarray(v, dtype=np.float64) for v in (x, y, z))
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+    ep2 = (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    beta = np.arctan2(z * WGS84_A, p * WGS84_B)
+    for _ in range(2):
+        lat = np.arctan2(z + ep2 * WGS84_B * np.sin(beta) ** 3,
+                         p - WGS84_E2 * WGS84_A * np.cos(beta) ** 3)
+        beta = np.arctan2((1.0 - WGS84_F) * np.sin(lat), np.cos(lat))
+    _, n = radii_of_curvature(np.degrees(lat))
+    # גובה: נוסחה יציבה גם ליד הקטבים
+    alt = p * np.cos(lat) + z * np.sin(lat) - WGS84_A ** 2 / n
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+def _enu_rotation(lat0_deg, lon0_deg):
+    lat0, lon0 = np.radians(lat0_deg), np.radians(lon0_deg)
+    sl, cl = np.sin(lat0), np.cos(lat0)
+    so, co = np.sin(lon0), np.cos(lon0)
+    return sl, cl, so, co
+
+
+def ned_to_geodetic(lat0, lon0, alt0, north, east, down=0.0, mode: str = LTP) -> Arrays:
+    """היסטי NED במטרים סביב (lat0, lon0, alt0) -> (lat_deg, lon_deg, alt_m)."""
+    _check_mode(mode)
+    n_m, e_m, d_m = (np.asarray(v, dtype=np.float64) for v in (north, east, down))
+    if mode == LTP:
+        m, n = radii_of_curvature(lat0)
+        lat = lat0 + np.degrees(n_m / (m + alt0))
+        lon = lon0 + np.degrees(e_m / ((n + alt0) * np.cos(np.radians(lat0))))
+        return lat, lon, alt0 - d_m
+
+    sl, cl, so, co = _enu_rotation(lat0, lon0)
+    u_m = -d_m
+    x0, y0, z0 = geodetic_to_ecef(lat0, lon0, alt0)
+    x = x0 - so * e_m - sl * co * n_m + cl * co * u_m
+    y = y0 + co * e_m - sl * so * n_m + cl * so * u_m
+    z = z0 + cl * n_m + sl * u_m
+    return ecef_to_geodetic(x, y, z)
+
+
+def geodetic_to_ned(lat0, lon0, alt0, lat, lon, alt=None, mode: str = LTP) -> Arrays:
+    """(lat, lon, alt) -> היסטי NED במטרים סביב (lat0, lon0, alt0). alt=None => גובה הייחוס."""
+    _check_mode(mode)
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    alt = np.full_like(lat, alt0) if alt is None else np.asarray(alt, dtype=np.float64)
+    if mode == LTP:
+        m, n = radii_of_curvature(lat0)
+        north = np.radians(lat - lat0) * (m + alt0)
+        # עטיפת הפרש האורך ל-[-180, 180)
+        dlon = (lon - lon0 + 180.0) % 360.0 - 180.0
+        east = np.radians(dlon) * (n + alt0) * np.cos(np.radians(lat0))
+        return north, east, alt0 - alt
+
+    sl, cl, so, co = _enu_rotation(lat0, lon0)
+    x0, y0, z0 = geodetic_to_ecef(lat0, lon0, alt0)
+    x, y, z = geodetic_to_ecef(lat, lon, alt)
+    dx, dy, dz = x - x0, y - y0, z - z0
+    east = -so * dx + co * dy
+    north = -sl * co * dx - sl * so * dy + cl * dz
+    up = cl * co * dx + cl * so * dy + sl * dz
+    return north, east, -up
+
+
+def ne_to_latlon(lat0, lon0, north, east, mode: str = LTP) -> Tuple[np.ndarray, np.ndarray]:
+    """קיצור למקרה הנפוץ: היסטים אופקיים -> (lat, lon)."""
+    lat, lon, _ = ned_to_geodetic(lat0, lon0, 0.0, north, east, 0.0, mode=mode)
+    return lat, lon
+
+
+def horizontal_distance(lat0, lon0, lat, lon) -> np.ndarray:
+    """מרחק אופקי (מ') ממערך נקודות ל-(lat0, lon0), במישור המשיק."""
+    north, east, _ = geodetic_to_ned(lat0, lon0, 0.0, lat, lon)
+    return np.hypot(north, east)
@@ -0,0 +1,201 @@
+# src/missions/georef.py
+"""
+גאו-רפרנס של זיהויים: פיקסל בתמונה -> נקודה על הקרקע (lat, lon), ומפת מטרות ללא כפילויות.
+
+הטלה: קרן מהמצלמה דרך מרכז ה-bbox (מודל pinhole לפי ה-FOV), מסובבת מהמצלמה לגוף
+(זווית ההרכבה tilt_deg מתחת לאופק, 90 = נדיר) ומהגוף ל-NED לפי roll/pitch/yaw של הרכב
+ברגע הלכידה, וחיתוך עם מישור הקרקע בגובה היחסי (הנחת קרקע שטוחה בגובה ה-Home).
+הכל וקטורי על כל הזיהויים בפריים.
+
+TargetMap: כל תצפית משויכת למטרה קיימת ברדיוס merge_radius_m, או פותחת מטרה חדשה.
+האינדקס הוא grid hash בתאים בגודל הרדיוס, כך ששיוך בודק 3x3 תאים — O(1) לתצפית,
+גם כשאותה מטרה נראית שוב בנתיב אחר או מרכב אחר (מפה אחת משותפת לכמה רכבים).
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .geodesy import geodetic_to_ned, ned_to_geodetic
+
+
+@dataclass
+class Pose:
+    t: float            # time.monotonic()
+    lat_deg: float
+    lon_deg: float
+    rel_alt_m: float    # גובה מעל ה-Home (= מעל הקרקע בהנחת קרקע שטוחה)
+    roll_deg: float = 0.0
+    pitch_deg: float = 0.0
+    yaw_deg: float = 0.0
+
+
+@dataclass
+class CameraModel:
+    """
+    hfov_deg: שדה ראייה אופקי; vfov_deg=None => פיקסלים ריבועיים.
+    tilt_deg: זווית ציר המצלמה מתחת לאופק בגוף (90 = נדיר, החלק העליון של התמונה = קדימה).
+    stabilized=True: גימבל מייצב — roll/pitch של הרכב לא משפיעים, רק yaw.
+    """
+    hfov_deg: float = 78.0
+    vfov_deg: Optional[float] = None
+    tilt_deg: float = 90.0
+    stabilized: bool = False
+    max_range_m: float = 500.0   # קרניים כמעט אופקיות (או מעל האופק) => אין נקודת קרקע
+
+    def rays_cam(self, px, py, width: int, height: int) -> np.ndarray:
+        """פיקסלים -> קרניים במערכת המצלמה (x ימינה, y למטה, z לאורך הציר), (N, 3)."""
+        fx = (width / 2.0) / math.tan(math.radians(self.hfov_deg) / 2.0)
+        fy = fx if self.vfov_deg is None else (height / 2.0) / math.tan(math.radians(self.vfov_deg) / 2.0)
+        px, py = np.asarray(px, np.float64), np.asarray(py, np.float64)
+        return np.stack([(px - width / 2.0) / fx, (py - height / 2.0) / fy, np.ones_like(px)], axis=-1)
+
+
+# מצלמה קדמית (tilt=0): ציר z -> קדימה, x -> ימינה, y -> למטה (גוף FRD)
+_CAM_TO_BODY = np.array([[0.0, 0.0, 1.0],
+                         [1.0, 0.0, 0.0],
+                         [0.0, 1.0, 0.0]])
+
+
+def _rot_y(a: float) -> np.ndarray:
+    c, s = math.cos(a), math.sin(a)
+    return np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+
+
+def body_to_ned(roll_deg: float, pitch_deg: float, yaw_deg: float) -> np.ndarray:
+    """מטריצת סיבוב גוף (FRD) -> NED, סדר ZYX (yaw, pitch, roll)."""
+    r, p, y = (math.radians(v) for v in (roll_deg, pitch_deg, yaw_deg))
+    cr, sr, cp, sp, cy, sy = math.cos(r), math.sin(r), math.cos(p), math.sin(p), math.cos(y), math.sin(y)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+def ground_offsets(px, py, frame_shape, pose: Pose, cam: CameraModel) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    פיקסלים -> היסטי (north, east) במטרים מהרכב לנקודת הקרקע. NaN כשהקרן לא פוגעת בקרקע
+    בטווח max_range_m (מעל האופק, או גובה לא חיובי).
+    """
+    h, w = frame_shape[:2]
+    rays = cam.rays_cam(px, py, w, h)
+    roll, pitch = (0.0, 0.0) if cam.stabilized else (pose.roll_deg, pose.pitch_deg)
+    R = body_to_ned(roll, pitch, pose.yaw_deg) @ _rot_y(-math.radians(cam.tilt_deg)) @ _CAM_TO_BODY
+    ned = rays @ R.T
+    down = ned[..., 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(down > 1e-6, pose.rel_alt_m / down, np.nan)
+    north, east = ned[..., 0] * scale, ned[..., 1] * scale
+    bad = ~(np.hypot(north, east) <= cam.max_range_m) | (pose.rel_alt_m <= 0)
+    return np.where(bad, np.nan, north), np.where(bad, np.nan, east)
+
+
+def georeference(boxes, frame_shape, pose: Pose, cam: CameraModel) -> Tuple[np.ndarray, np.ndarray]:
+    """bboxes (x, y, w, h) -> (lat, lon) של מרכזיהם על הקרקע (NaN => אין נקודת קרקע)."""
+    b = np.asarray(boxes, np.float64).reshape(-1, 4)
+    north, east = ground_offsets(b[:, 0] + b[:, 2] / 2.0, b[:, 1] + b[:, 3] / 2.0, frame_shape, pose, cam)
+    lat, lon, _ = ned_to_geodetic(pose.lat_deg, pose.lon_deg, 0.0, north, east)
+    return lat, lon
+
+
+@dataclass
+class Target:
+    id: int
+    lat_deg: float
+    lon_deg: float
+    north_m: float      # במערכת המקומית של המפה (סביב התצפית הראשונה)
+    east_m: float
+    first_t: float
+    last_t: float
+    sightings: int = 1
+    label: Optional[str] = None
+    approached: bool = False
+    vehicles: Set[str] = field(default_factory=set)
+
+
+class TargetMap:
+    """
+    מפת מטרות על הקרקע עם מיזוג תצפיות (ראו תיעוד המודול).
+    המיקום של מטרה הוא ממוצע התצפיות שלה; מטרה שזזה לתא אחר מועברת ב-hash.
+    כל הקריאות מאותו event loop (גם כשכמה רכבים חולקים מפה) — אין נעילות.
+    """
+    def __init__(self, merge_radius_m: float = 8.0):
+        self.merge_radius_m = merge_radius_m
+        self.targets: Dict[int, Target] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._origin: Optional[Tuple[float, float]] = None
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def _cell(self, north: float, east: float) -> Tuple[int, int]:
+        return int(math.floor(north / self.merge_radius_m)), int(math.floor(east / self.merge_radius_m))
+
+    def _local(self, lat: float, lon: float) -> Tuple[float, float]:
+        if self._origin is None:
+            self._origin = (lat, lon)
+        n, e, _ = geodetic_to_ned(self._origin[0], self._origin[1], 0.0, lat, lon)
+        return float(n), float(e)
+
+    def nearest(self, lat: float, lon: float, label: Optional[str] = None) -> Optional[Target]:
+        """המטרה הקרובה ביותר ברדיוס המיזוג (עם אותה תווית, אם שתיהן ידועות), או None."""
+        if self._origin is None:
+            return None
+        n, e = self._local(lat, lon)
+        ci, cj = self._cell(n, e)
+        best, best_d = None, self.merge_radius_m
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for tid in self._cells.get((ci + di, cj + dj), ()):
+                    tg = self.targets[tid]
+                    if label is not None and tg.label is not None and tg.label != label:
+                        continue
+                    d = math.hypot(tg.north_m - n, tg.east_m - e)
+                    if d <= best_d:
+                        best, best_d = tg, d
+        return best
+
+    def add(self, lat: float, lon: float, t: float, label: Optional[str] = None,
+            vehicle: Optional[str] = None) -> Tuple[Target, bool]:
+        """תצפית אחת -> (המטרה, האם חדשה). NaN מתעלמים ממנה בצד הקורא."""
+        tg = self.nearest(lat, lon, label)
+        n, e = self._local(lat, lon)
+        if tg is None:
+            tg = Target(self._next_id, lat, lon, n, e, t, t, label=label)
+            self._next_id += 1
+            self.targets[tg.id] = tg
+            self._cells.setdefault(self._cell(n, e), []).append(tg.id)
+            is_new = True
+        else:
+            old_cell = self._cell(tg.north_m, tg.east_m)
+            k = tg.sightings
+            tg.north_m += (n - tg.north_m) / (k + 1)
+            tg.east_m += (e - tg.east_m) / (k + 1)
+            tg.lat_deg, tg.lon_deg = (float(v) for v in
+                                      ned_to_geodetic(self._origin[0], self._origin[1], 0.0,
+                                                      tg.north_m, tg.east_m)[:2])
+            tg.sightings = k + 1
+            tg.last_t = max(tg.last_t, t)
+            tg.label = tg.label or label
+            new_cell = self._cell(tg.north_m, tg.east_m)
+            if new_cell != old_cell:
+                self._cells[old_cell].remove(tg.id)
+                if not self._cells[old_cell]:
+                    del self._cells[old_cell]
+                self._cells.setdefault(new_cell, []).append(tg.id)
+            is_new = False
+        if vehicle is not None:
+            tg.vehicles.add(vehicle)
+        return tg, is_new
+
+    def add_many(self, lats: Sequence[float], lons: Sequence[float], t: float,
+                 labels: Optional[Sequence[Optional[str]]] = None,
+                 vehicle: Optional[str] = None) -> List[Tuple[Target, bool]]:
+        labels = [None] * len(lats) if labels is None else labels
+        return [self.add(float(la), float(lo), t, lb, vehicle)
+                for la, lo, lb in zip(lats, lons, labels) if np.isfinite(la) and np.isfinite(lo)]
+
+    def pending(self) -> List[Target]:
+        """מטרות שעוד לא בוצעה אליהן גישה, לפי סדר גילוי."""
+        return [tg for tg in self.targets.values() if not tg.approached]
@@ -0,0 +1,186 @@
+# src/missions/history.py
+import time
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geodesy import ned_to_geodetic
+from .georef import Pose
+
+# עמודות השורה בהיסטוריה
+T, LAT, LON, ABS_ALT, REL_ALT, VN, VE, VD = range(8)
+FIELDS = ("t", "lat_deg", "lon_deg", "abs_alt_m", "rel_alt_m", "vn_ms", "ve_ms", "vd_ms")
+
+# עמודות היסטוריית ה-attitude (T=0 משותף)
+ROLL, PITCH, YAW = range(1, 4)
+ATTITUDE_FIELDS = ("t", "roll_deg", "pitch_deg", "yaw_deg")
+
+
+class RingHistory:
+    """
+    חוצץ מעגלי בגודל קבוע (NumPy) של שורות עם זמן בעמודה 0.
+
+    כל שורה נכתבת פעמיים — באינדקס i ובאינדקס i+capacity — כך שכל חלון של עד capacity
+    שורות אחרונות הוא slice רציף: append ב-O(1), חלון זמן = view ללא העתקה (searchsorted, O(log n)).
+    הזמן הוא time.monotonic() של קבלת הדגימה.
+    """
+    FIELDS: Sequence[str] = ("t",)
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = max(2, int(capacity))
+        self._buf = np.full((2 * self.capacity, len(self.FIELDS)), np.nan)
+        self._head = 0   # אינדקס הכתיבה הבא ב-[0, capacity)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _append_row(self, row):
+        self._buf[self._head] = row
+        self._buf[self._head + self.capacity] = row
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def view(self) -> np.ndarray:
+        """כל השורות השמורות לפי סדר זמן (view, לא העתק)."""
+        end = self._head + self.capacity
+        return self._buf[end - self._count:end]
+
+    def window(self, t0: float, t1: Optional[float] = None) -> np.ndarray:
+        """שורות עם t0 <= t <= t1 (view)."""
+        rows = self.view()
+        ts = rows[:, T]
+        i0 = int(np.searchsorted(ts, t0, side="left"))
+        i1 = len(rows) if t1 is None else int(np.searchsorted(ts, t1, side="right"))
+        return rows[i0:i1]
+
+    def last(self, seconds: float) -> np.ndarray:
+        """N השניות האחרונות (view)."""
+        return self.window(time.monotonic() - seconds)
+
+    def latest(self) -> Optional[np.ndarray]:
+        if self._count == 0:
+            return None
+        return self._buf[self._head + self.capacity - 1]
+
+    def bracket(self, t: float) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+        """
+        (row0, row1, w) סביב t לאינטרפולציה row0 + w·(row1 - row0), בחיפוש בינארי (O(log n)).
+        מחוץ לטווח: השורה הקיצונית פעמיים ו-w=0 (הקורא מחליט אם לאקסטרפל). None אם ריק.
+        """
+        rows = self.view()
+        n = len(rows)
+        if n == 0:
+            return None
+        i = int(np.searchsorted(rows[:, T], t, side="right"))
+        if i == 0:
+            return rows[0], rows[0], 0.0
+        if i == n:
+            return rows[-1], rows[-1], 0.0
+        r0, r1 = rows[i - 1], rows[i]
+        dt = r1[T] - r0[T]
+        return r0, r1, float((t - r0[T]) / dt) if dt > 0 else 0.0
+
+
+class TelemetryHistory(RingHistory):
+    """היסטוריית מיקום/מהירות לרכב (עמודות FIELDS), עם סטטיסטיקות וקטוריות על חלון זמן."""
+    FIELDS = FIELDS
+
+    def append(self, t: float, lat: float, lon: float, abs_alt: float, rel_alt: float,
+               vn: float = np.nan, ve: float = np.nan, vd: float = np.nan):
+        self._append_row((t, lat, lon, abs_alt, rel_alt, vn, ve, vd))
+
+    # --- סטטיסטיקות וקטוריות על חלון ---
+    def mean_ground_speed(self, seconds: float) -> float:
+        w = self.last(seconds)
+        if len(w) == 0:
+            return float("nan")
+        return float(np.nanmean(np.hypot(w[:, VN], w[:, VE])))
+
+    def max_alt_deviation(self, seconds: float, ref_alt: Optional[float] = None) -> float:
+        """סטייה מקסימלית של הגובה היחסי מ-ref_alt (ברירת מחדל: ממוצע החלון)."""
+        w = self.last(seconds)
+        if len(w) == 0:
+            return float("nan")
+        alt = w[:, REL_ALT]
+        ref = np.nanmean(alt) if ref_alt is None else ref_alt
+        return float(np.nanmax(np.abs(alt - ref)))
+
+    async def feed(self, hub, maxsize: int = 64):
+        """
+        ממלא את ההיסטוריה מזרמי ה-hub: כל דגימת position נכתבת עם ה-velocity_ned האחרון.
+        רץ עד ביטול (cancel) או סיום הזרם.
+        """
+        pos_sub = hub.subscribe("position", maxsize=maxsize)
+        vel_sub = hub.subscribe("velocity_ned", policy="latest")  # רק כדי שה-pump ירוץ
+        try:
+            async for pos in pos_sub:
+                vel = hub.latest("velocity_ned")
+                vn, ve, vd = (vel.north_m_s, vel.east_m_s, vel.down_m_s) if vel is not None else (np.nan,) * 3
+                self.append(time.monotonic(), pos.latitude_deg, pos.longitude_deg,
+                            pos.absolute_altitude_m, pos.relative_altitude_m, vn, ve, vd)
+        finally:
+            pos_sub.close()
+            vel_sub.close()
+
+
+class AttitudeHistory(RingHistory):
+    """היסטוריית attitude (roll/pitch/yaw במעלות) לרכב, מזרם attitude_euler של ה-hub."""
+    FIELDS = ATTITUDE_FIELDS
+
+    def append(self, t: float, roll: float, pitch: float, yaw: float):
+        self._append_row((t, roll, pitch, yaw))
+
+    async def feed(self, hub, maxsize: int = 64):
+        sub = hub.subscribe("attitude_euler", maxsize=maxsize)
+        try:
+            async for att in sub:
+                self.append(time.monotonic(), att.roll_deg, att.pitch_deg, att.yaw_deg)
+        finally:
+            sub.close()
+
+
+def _wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class PoseBuffer:
+    """
+    מיקום + attitude ברגע נתון (למשל זמן הלכידה של פריים), מתוך שתי ההיסטוריות של הרכב.
+
+    at(t) מוצא את שתי הדגימות שסביב t בכל היסטוריה בחיפוש בינארי (O(log n)) ומאנטרפל לינארית;
+    yaw עובר בקשת הקצרה (359° -> 1° הוא 2°, לא 358°). הזרמים מגיעים בקצבים ובזמנים שונים,
+    ולכן כל אחד מאונטרפל בנפרד. פריים חדש מהדגימה האחרונה (נפוץ: מיקום מגיע ב-5-10 Hz) —
+    המיקום מאוקסטרפל לפי velocity_ned עד max_extrapolate_s; מעבר לכך, או לפני הדגימה הראשונה, None.
+    בלי attitude (הזרם לא פעיל) — roll/pitch/yaw = 0.
+    """
+    def __init__(self, position: TelemetryHistory, attitude: Optional[AttitudeHistory] = None,
+                 max_extrapolate_s: float = 0.5):
+        self.position = position
+        self.attitude = attitude
+        self.max_extrapolate_s = max_extrapolate_s
+
+    def at(self, t: float) -> Optional[Pose]:
+        b = self.position.bracket(t)
+        if b is None:
+            return None
+        r0, r1, w = b
+        if t < r0[T] - 1e-3 or t > r1[T] + self.max_extrapolate_s:
+            return None
+        if t > r1[T]:
+            # אחרי הדגימה האחרונה: אקסטרפולציה לפי המהירות (אם ידועה)
+            dt = t - r1[T]
+            vn, ve, vd = (0.0 if np.isnan(v) else float(v) for v in (r1[VN], r1[VE], r1[VD]))
+            lat, lon, _ = ned_to_geodetic(r1[LAT], r1[LON], 0.0, vn * dt, ve * dt)
+            lat, lon, alt = float(lat), float(lon), float(r1[REL_ALT] - vd * dt)
+        else:
+            lat, lon, alt = (float(r0[c] + w * (r1[c] - r0[c])) for c in (LAT, LON, REL_ALT))
+        roll = pitch = yaw = 0.0
+        a = self.attitude.bracket(t) if self.attitude is not None else None
+        if a is not None:
+            a0, a1, wa = a
+            roll = float(a0[ROLL] + wa * (a1[ROLL] - a0[ROLL]))
+            pitch = float(a0[PITCH] + wa * (a1[PITCH] - a0[PITCH]))
+            yaw = float(_wrap180(a0[YAW] + wa * _wrap180(a1[YAW] - a0[YAW])))
+        return Pose(t, lat, lon, alt, roll, pitch, yaw)
@@ -2,7 +2,8 @@ import asyncio
 import logging
 from typing import List, Tuple
 from mavsdk import System
-from .utils import connect_drone, ensure_armed, get_current_position, meters_to_latlon_offsets, set_speed
+from .utils import (connect_drone, ensure_armed, get_current_position, leg_timeout, meters_to_latlon_offsets,
+                    set_speed, wait_arrival)
 
 log = logging.getLogger(__name__)
 
@@ -46,9 +47,9 @@ async def run_orbit_rect(
             lat, lon = lat0 + d_lat, lon0 + d_lon
             log.info("Corner %d: goto lat=%.6f lon=%.6f alt=%.1f", i, lat, lon, alt)
             await drone.action.goto_location(lat, lon, pos.absolute_altitude_m + alt, 0.0)
-            # זמן משוער לכל רגל
+            # ממתינים להגעה לפינה (timeout לפי אורך הרגל)
             leg_m = width_m if i % 2 == 1 else height_m
-            await asyncio.sleep(max(6, int(leg_m / max(speed, 0.1))))
+            await wait_arrival(drone, lat, lon, pos.absolute_altitude_m + alt, timeout_s=leg_timeout(leg_m, speed))
 
     log.info("Orbit-rectangle complete. Landing ...")
     await drone.action.land()
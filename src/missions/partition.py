@@ -0,0 +1,211 @@
+# src/missions/partition.py
+"""
+חלוקת אזור סריקה בין כמה רחפנים (swarm survey).
+
+האזור (פוליגון + חורים) נחתך לרצועות בניצב לציר הראשי שלו. כל חתך נמצא בחיפוש בינארי
+כך שהשטח הפנוי של כל רצועה פרופורציוני למשקל הרכב (מהירות x סוללה) — רכב מהיר/מלא מקבל יותר.
+כל אזור מקבל תוכנית כיסוי משלו (coverage.plan_coverage) ו-MissionPlan, וההעלאה לכל הרכבים במקביל.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from mavsdk import System
+
+from .coverage import CoveragePlan, LatLon, plan_coverage, rings_to_local
+from .geodesy import geodetic_to_ned, ned_to_geodetic
+from .sweep import rectangle
+from .telemetry_hub import get_hub
+from .utils import make_mission_plan, upload_mission
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Region:
+    index: int
+    polygon: List[LatLon]
+    holes: List[List[LatLon]]
+    area_m2: float
+    share: float          # חלק יחסי מהשטח הפנוי
+
+
+def polygon_area(xy: np.ndarray) -> float:
+    """שטח (shoelace) של טבעת (K,2); 0 לטבעת ריקה."""
+    if len(xy) < 3:
+        return 0.0
+    x, y = xy[:, 0], xy[:, 1]
+    return 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def clip_halfplane(xy: np.ndarray, axis: np.ndarray, lo: float = -np.inf, hi: float = np.inf) -> np.ndarray:
+    """Sutherland–Hodgman: החלק של הטבעת שבו lo <= xy·axis <= hi."""
+    for bound, sign in ((lo, 1.0), (hi, -1.0)):
+        if not np.isfinite(bound) or len(xy) == 0:
+            continue
+        s = sign * (xy @ axis - bound)           # >= 0 => בפנים
+        s_next = np.roll(s, -1)
+        nxt = np.roll(xy, -1, axis=0)
+        out = []
+        for p, q, sp, sq in zip(xy, nxt, s, s_next):
+            if sp >= 0:
+                out.append(p)
+            if (sp >= 0) != (sq >= 0):
+                out.append(p + (q - p) * (sp / (sp - sq)))
+        xy = np.array(out).reshape(-1, 2)
+    return xy
+
+
+def vehicle_weights(speeds_ms: Sequence[float], batteries: Optional[Sequence[float]] = None) -> np.ndarray:
+    """משקל יחסי לכל רכב: מהירות x סוללה, מנורמל לסכום 1."""
+    w = np.asarray(speeds_ms, dtype=np.float64)
+    if batteries is not None:
+        w = w * np.clip(np.asarray(batteries, dtype=np.float64), 0.0, None)
+    if w.sum() <= 0:
+        raise ValueError("all vehicle weights are zero")
+    return w / w.sum()
+
+
+def _principal_axis(xy: np.ndarray) -> np.ndarray:
+    c = xy - xy.mean(axis=0)
+    _, vecs = np.linalg.eigh(c.T @ c)
+    return vecs[:, -1]
+
+
+def partition_area(polygon: Sequence[LatLon], weights: Sequence[float], holes: Sequence[Sequence[LatLon]] = (),
+                   positions: Optional[Sequence[LatLon]] = None, tol_m2: float = 1.0) -> List[Region]:
+    """
+    מחלק את האזור ל-len(weights) רצועות עם שטח פנוי פרופורציוני למשקלים.
+    positions (lat, lon) של הרכבים: רצועות מוקצות לפי הסדר שלהם לאורך הציר (פחות חציות בדרך).
+    Region.index = אינדקס הרכב.
+    """
+    w = np.asarray(weights, dtype=np.float64)
+    w = w / w.sum()
+    (lat0, lon0), rings = rings_to_local(polygon, holes)
+    outer, hole_rings = rings[0], rings[1:]
+    axis = _principal_axis(outer)
+
+    def free_area(lo=-np.inf, hi=np.inf) -> float:
+        a = polygon_area(clip_halfplane(outer, axis, lo, hi))
+        return a - sum(polygon_area(clip_halfplane(h, axis, lo, hi)) for h in hole_rings)
+
+    total = free_area()
+    t = outer @ axis
+    order = np.arange(len(w))
+    if positions is not None:
+        pos = np.asarray(positions, dtype=np.float64)
+        n, e, _ = geodetic_to_ned(lat0, lon0, 0.0, pos[:, 0], pos[:, 1])
+        order = np.argsort(np.stack([e, n], axis=1) @ axis, kind="stable")
+
+    # חתכים: השטח מתחת לחתך i = סכום המשקלים המצטבר (חיפוש בינארי, השטח מונוטוני)
+    cuts = [float(t.min())]
+    for target in np.cumsum(w[order])[:-1] * total:
+        a, b = cuts[-1], float(t.max())
+        while b - a > 1e-3 and abs(free_area(hi=(a + b) / 2) - target) > tol_m2:
+            m = (a + b) / 2
+            if free_area(hi=m) < target:
+                a = m
+            else:
+                b = m
+        cuts.append((a + b) / 2)
+    cuts.append(float(t.max()))
+
+    def to_latlon(xy: np.ndarray) -> List[LatLon]:
+        lat, lon, _ = ned_to_geodetic(lat0, lon0, 0.0, xy[:, 1], xy[:, 0])
+        return list(zip(lat.tolist(), lon.tolist()))
+
+    regions: List[Optional[Region]] = [None] * len(w)
+    for k, vi in enumerate(order):
+        lo, hi = cuts[k], cuts[k + 1]
+        piece = clip_halfplane(outer, axis, lo, hi)
+        pieces = [clip_halfplane(h, axis, lo, hi) for h in hole_rings]
+        pieces = [h for h in pieces if polygon_area(h) > 1e-6]
+        area = polygon_area(piece) - sum(polygon_area(h) for h in pieces)
+        regions[vi] = Region(index=int(vi), polygon=to_latlon(piece), holes=[to_latlon(h) for h in pieces],
+                             area_m2=area, share=area / total if total > 0 else 0.0)
+    return regions
+
+
+def plan_regions(regions: Sequence[Region], lane_spacing_m: float, altitude_m: float) -> List[CoveragePlan]:
+    """תוכנית כיסוי (boustrophedon) לכל אזור."""
+    return [plan_coverage(r.polygon, lane_spacing_m, altitude_m, holes=r.holes) for r in regions]
+
+
+async def upload_plans(drones: Sequence[System], plans, speeds_ms: Sequence[float], rtl_after: bool = True):
+    """make_mission_plan + העלאה לכל הרכבים במקביל (gather), ואז התחלה במקביל."""
+    missions = [make_mission_plan(p.waypoints, speed_ms=s) for p, s in zip(plans, speeds_ms)]
+    await asyncio.gather(*(upload_mission(d, m, rtl_after) for d, m in zip(drones, missions)))
+    log.info("Uploaded %d mission plans", len(missions))
+
+
+async def _battery(hub, default: float = 100.0) -> float:
+    try:
+        b = await hub.next("battery", timeout=5.0)
+        return float(b.remaining_percent)
+    except Exception:
+        return default
+
+
+async def run(conn_urls: Sequence[str],
+              origin_lat: float = 47.397742,
+              origin_lon: float = 8.545594,
+              alt_m: float = 20.0,
+              box_w_m: float = 160.0,
+              box_h_m: float = 120.0,
+              lane_m: float = 15.0,
+              speeds_ms: Optional[Sequence[float]] = None,
+              polygon: Optional[Sequence[LatLon]] = None,
+              holes: Sequence[Sequence[LatLon]] = ()):
+    """
+    Survey מבוזר: חיבור לכל הרכבים, חלוקת האזור לפי מהירות x סוללה, העלאה במקביל,
+    המראה והתחלת המשימות יחד (RTL בסיום של כל רכב).
+    """
+    speeds = list(speeds_ms) if speeds_ms else [6.0] * len(conn_urls)
+    if len(speeds) != len(conn_urls):
+        raise ValueError("speeds_ms must match conn_urls")
+    # כל hub מקבל mavsdk_server בפורט משלו (get_hub מקצה), גם לצד hub קיים של הלוגר
+    hubs = await asyncio.gather(*(get_hub(url) for url in conn_urls))
+    drones = [h.drone for h in hubs]
+
+    async def ready(d: System):
+        async for state in d.core.connection_state():
+            if state.is_connected:
+                break
+        async for health in d.telemetry.health():
+            if health.is_global_position_ok and health.is_home_position_ok:
+                break
+    await asyncio.gather(*(ready(d) for d in drones))
+
+    if polygon is None:
+        corners = rectangle(box_w_m, box_h_m)
+        lat, lon, _ = ned_to_geodetic(origin_lat, origin_lon, 0.0, corners[:, 0], corners[:, 1])
+        polygon = list(zip(lat.tolist(), lon.tolist()))
+
+    batteries = await asyncio.gather(*(_battery(h) for h in hubs))
+    positions = [(p.latitude_deg, p.longitude_deg)
+                 for p in await asyncio.gather(*(h.next("position") for h in hubs))]
+    regions = partition_area(polygon, vehicle_weights(speeds, batteries), holes, positions=positions)
+    plans = plan_regions(regions, lane_m, alt_m)
+    for r, p, url in zip(regions, plans, conn_urls):
+        log.info("%s: region %.0f m^2 (%.0f%%), %d waypoints, %.0f m",
+                 url, r.area_m2, 100 * r.share, len(p.waypoints), p.length_m)
+
+    await upload_plans(drones, plans, speeds)
+
+    async def launch(d: System):
+        await d.action.arm()
+        await d.action.set_takeoff_altitude(alt_m)
+        await d.action.takeoff()
+        await asyncio.sleep(5)
+        await d.mission.start_mission()
+    await asyncio.gather(*(launch(d) for d in drones))
+    log.info("Swarm survey started on %d vehicles", len(drones))
+
+    async def finished(d: System):
+        async for progress in d.mission.mission_progress():
+            if progress.total and progress.current >= progress.total:
+                break
+    await asyncio.gather(*(finished(d) for d in drones))
+    log.info("Swarm survey complete.")
@@ -1,13 +1,26 @@
 # src/missions/sar_lawnmower.py
 import asyncio
+import logging
 import math
-import cv2
-from typing import Tuple
+import time
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
 from mavsdk import System
-from mavsdk.mission import MissionItem, MissionPlan
 from mission import build_lawnmower         # קיים אצלך
 from vision import ColorTargetDetector      # קיים אצלך
-from utils import save_frame                # קיים אצלך
+from utils import EvidenceWriter            # קיים אצלך
+from .cadence import CadenceScheduler
+from .coverage import plan_coverage
+from .geodesy import geodetic_to_ned, ne_to_latlon
+from .georef import CameraModel, Pose, Target, TargetMap, georeference
+from .history import LAT, LON, REL_ALT, TelemetryHistory
+from .sweep import KinematicModel, optimize_sweep as plan_sweep, rectangle
+from .telemetry_hub import TelemetryHub, get_hub, hub_of
+from .utils import make_mission_plan, upload_and_start_mission  # noqa: F401 (re-export)
+from .video import VideoPipeline
+from ..vision.tracker import MultiObjectTracker
+
+log = logging.getLogger(__name__)
 
 
 async def arm_and_takeoff(drone: System, altitude: float):
@@ -19,38 +32,26 @@ async def arm_and_takeoff(drone: System, altitude: float):
     await asyncio.sleep(5)
 
 
-def make_mission_plan(waypoints, speed_ms: float = 6.0) -> MissionPlan:
-    items = []
-    for lat, lon, alt in waypoints:
-        items.append(MissionItem(
-            latitude_deg=lat, longitude_deg=lon, relative_altitude_m=alt,
-            speed_m_s=speed_ms, is_fly_through=True,
-            gimbal_pitch_deg=float('nan'), gimbal_yaw_deg=float('nan'),
-            camera_action=MissionItem.CameraAction.NONE,
-            loiter_time_s=0.0, camera_photo_interval_s=1.0,
-            acceptance_radius_m=float('nan'),
-            yaw_deg=float('nan'), camera_photo_distance_m=float('nan')
-        ))
-    return MissionPlan(items)
-
-
-async def upload_and_start_mission(drone: System, plan: MissionPlan, rtl_after=True):
-    await drone.mission.clear_mission()
-    await drone.mission.set_return_to_launch_after_mission(bool(rtl_after))
-    await drone.mission.upload_mission(plan)
-    print("[*] Starting mission...")
-    await drone.mission.start_mission()
-
-
 async def _calc_target_location(drone: System, north_m: float, east_m: float, dalt_m: float) -> Tuple[float, float, float, float]:
-    async for pos in drone.telemetry.position():
+    hub = hub_of(drone)
+    pose = hub.poses.at(time.monotonic()) if hub is not None and hub.poses is not None else None
+    row = hub.history.latest() if hub is not None and hub.history is not None else None
+    if pose is not None:
+        # מה-PoseBuffer: הדגימה האחרונה מאוקסטרפלת לרגע הזה לפי המהירות
+        lat, lon, alt = pose.lat_deg, pose.lon_deg, pose.rel_alt_m
+    elif row is not None:
+        # מההיסטוריה בזיכרון — בלי להמתין לדגימה חדשה
+        lat, lon, alt = float(row[LAT]), float(row[LON]), float(row[REL_ALT])
+    else:
+        pos = hub.latest("position") if hub is not None else None
+        if pos is None:
+            async for pos in drone.telemetry.position():
+                break
         lat = pos.latitude_deg
         lon = pos.longitude_deg
         alt = pos.relative_altitude_m
-        break
-    dlat = north_m / 111_320.0
-    dlon = east_m / (111_320.0 * max(0.3, abs(math.cos(math.radians(lat)))))
-    return (lat + dlat, lon + dlon, alt + dalt_m, 0.0)
+    t_lat, t_lon = ne_to_latlon(lat, lon, north_m, east_m)
+    return (float(t_lat), float(t_lon), alt + dalt_m, 0.0)
 
 
 async def goto_offset(drone: System, north_m: float, east_m: float, dalt_m: float = 0.0):
@@ -58,6 +59,40 @@ async def goto_offset(drone: System, north_m: float, east_m: float, dalt_m: floa
     await drone.action.goto_location(lat, lon, alt, yaw)
 
 
+async def _goto_ground(drone: System, history: TelemetryHistory, target: Target):
+    """טיסה מעל נקודת קרקע במפה, באותו גובה (דרך goto_offset מהמיקום הנוכחי)."""
+    row = history.latest()
+    if row is None:
+        return
+    north, east, _ = geodetic_to_ned(float(row[LAT]), float(row[LON]), 0.0, target.lat_deg, target.lon_deg)
+    await goto_offset(drone, north_m=float(north), east_m=float(east))
+
+
+def _map_tracks(tracks, frame, pose: Optional[Pose], camera: CameraModel, target_map: TargetMap,
+                vehicle: str) -> Dict[int, Target]:
+    """מטילה את המסלולים לקרקע ומוסיפה אותם למפה: track id -> מטרה במפה (רק מה שיש לו נקודת קרקע)."""
+    if pose is None or not tracks:
+        return {}
+    lats, lons = georeference([tr.bbox for tr in tracks], frame.image.shape, pose, camera)
+    out = {}
+    for tr, lat, lon in zip(tracks, lats, lons):
+        if np.isfinite(lat) and np.isfinite(lon):
+            tg, is_new = target_map.add(float(lat), float(lon), frame.t, tr.label, vehicle)
+            if is_new:
+                log.info("Target map: new target #%d at %.6f, %.6f (track #%d)", tg.id, lat, lon, tr.id)
+            out[tr.id] = tg
+    return out
+
+
+def _save_evidence(evidence: EvidenceWriter, prefix: str, res, pose: Optional[Pose], target,
+                   ground: Optional[Target], vehicle: str, priority: bool = False) -> Optional[str]:
+    """תמונת ראיה + שורת index (pose ברגע הלכידה, כל הזיהויים, המסלול והמטרה במפה) — בלי לחסום."""
+    return evidence.submit(res.frame.image, prefix, pose=pose, detections=res.boxes, priority=priority,
+                           t=res.frame.t, seq=res.frame.seq, vehicle=vehicle, track_id=target.id,
+                           track_confidence=target.confidence, bbox=target.bbox,
+                           target=ground)
+
+
 def image_to_body_offsets(bbox, frame_shape, fov_deg=78.0, gain=0.5):
     """המרת מיקום מטרה בתמונה להיסטים בקואורדינטות הגוף (קדימה/ימינה)."""
     x, y, w, h = bbox
@@ -84,17 +119,52 @@ async def run(conn_url: str = "udp://:14540",
               lane_m: float = 15.0,
               video_src: int = 0,
               detect_every_n_frames: int = 5,
-              cruise_speed_ms: float = 6.0):
+              cruise_speed_ms: float = 6.0,
+              polygon: Optional[Sequence[Tuple[float, float]]] = None,
+              holes: Sequence[Sequence[Tuple[float, float]]] = (),
+              optimize_sweep: bool = False,
+              detect_workers: int = 1,
+              display: bool = True,
+              adaptive_cadence: bool = False,
+              cpu_budget: float = 0.5,
+              latency_budget_s: float = 0.5,
+              track_confidence: float = 0.6,
+              camera: Optional[CameraModel] = None,
+              target_map: Optional[TargetMap] = None,
+              max_targets: int = 1,
+              capture_delay_s: float = 0.0,
+              evidence_dir: str = "captures"):
     """
     משימת SAR:
     1) המראה
-    2) טיסת Lawnmower על אזור (origin/box/lane)
+    2) טיסת Lawnmower על אזור (origin/box/lane), או כיסוי פוליגון עם חורים (polygon/holes);
+       optimize_sweep=True בוחר את כיוון הסריקה במלבן לפי זמן טיסה משוער
     3) זיהוי מטרה מהווידיאו, Pause, גישות קטנות לכיוון המטרה
     4) RTL
+    הווידיאו רץ ב-threads (VideoPipeline): לכידה, detect_workers דטקטורים ותצוגה —
+    ה-event loop רק מקבל תוצאות, כך שטלמטריה ופקודות MAVSDK לא נתקעות על פענוח פריים.
+    adaptive_cadence=True מחליף את detect_every_n_frames ב-CadenceScheduler: קצב לפי מהירות קרקע,
+    גובה ומועמדים אחרונים, בתקרת cpu_budget, ודילוג על פריימים ישנים מ-latency_budget_s.
+    הזיהויים עוברים דרך MultiObjectTracker: הגישה מתחילה רק כשמסלול מאושר מגיע ל-track_confidence
+    (ברירת המחדל 0.6 = שלושה זיהויים רצופים), ולא על זיהוי בודד בפריים אחד.
+    כל מסלול מאושר מוטל לקרקע (camera: FOV/הרכבה, מיקום מההיסטוריה ו-attitude ברגע הפריים) ונכנס
+    ל-target_map; גישה מתבצעת רק למטרה שעוד לא בוצעה אליה גישה, כך שתצפית חוזרת בנתיב אחר
+    (או מרכב אחר שחולק את אותה מפה) לא עוצרת שוב את המשימה. אחרי max_targets גישות — RTL,
+    ולפני כן המשימה ממשיכה.
+    המיקום וה-attitude של כל פריים מאונטרפלים מה-PoseBuffer של ה-hub לזמן הלכידה (grab), פחות
+    capture_delay_s (השהיית המצלמה, אם ידועה) — ב-6 מ'/ש' הפרש של 200 ms הוא כבר 1.2 מ' על הקרקע.
+    תמונות ראיה (אישור מטרה וכל פריים בזמן הגישה) נשמרות ל-evidence_dir ברקע (EvidenceWriter),
+    עם שורה ב-index.jsonl לכל תמונה: pose, זיהויים, מסלול ומטרה במפה.
     """
-    drone = System()
-    await drone.connect(system_address=conn_url)
+    hub: TelemetryHub = await get_hub(conn_url)
+    drone = hub.drone
     print(f"[*] Connecting to {conn_url} ...")
+    # היסטוריית מיקום/מהירות ו-attitude בזיכרון: _calc_target_location קורא ממנה בלי להמתין לדגימה חדשה,
+    # והגאו-רפרנס מקבל את המיקום וה-attitude ברגע הלכידה של כל פריים (poses.at(frame.t))
+    poses = hub.enable_poses()
+    history = poses.position
+    camera = camera or CameraModel()
+    target_map = target_map if target_map is not None else TargetMap()
 
     # המתנה לחיבור
     async for state in drone.core.connection_state():
@@ -112,58 +182,113 @@ async def run(conn_url: str = "udp://:14540",
     # המראה
     await arm_and_takeoff(drone, alt_m)
 
-    # בניית מסלול Lawnmower
-    wps  = build_lawnmower(origin_lat, origin_lon, alt_m, box_w_m, box_h_m, lane_m)
+    # בניית מסלול: פוליגון (boustrophedon, זווית עם מינימום פניות) או מלבן Lawnmower
+    if polygon:
+        cov = plan_coverage(polygon, lane_m, alt_m, holes=holes, model=KinematicModel(cruise_ms=cruise_speed_ms))
+        log.info("Coverage: sweep %.1f deg, %d cells, %d passes, %.0f m",
+                 cov.sweep_angle_deg, cov.cells, cov.segments, cov.length_m)
+        wps = cov.waypoints
+    elif optimize_sweep:
+        sweep = plan_sweep(rectangle(box_w_m, box_h_m), lane_m, KinematicModel(cruise_ms=cruise_speed_ms))
+        log.info("Sweep heading %.0f deg, %d lanes, est. %.0f s", sweep.heading_deg, sweep.lanes, sweep.time_s)
+        wps = sweep.to_latlon(origin_lat, origin_lon, alt_m)
+    else:
+        wps = build_lawnmower(origin_lat, origin_lon, alt_m, box_w_m, box_h_m, lane_m)
     plan = make_mission_plan(wps, speed_ms=cruise_speed_ms)
     await upload_and_start_mission(drone, plan, rtl_after=True)
 
-    # וידאו + דטקטור
-    cap = cv2.VideoCapture(video_src)
+    # וידאו + דטקטור (מחוץ ל-event loop)
     detector = ColorTargetDetector()
-    frame_count = 0
-    target_found = False
+    cadence = (CadenceScheduler(cpu_budget=cpu_budget, latency_budget_s=latency_budget_s, alt_m=alt_m,
+                                workers=detect_workers) if adaptive_cadence else None)
+    tracker = MultiObjectTracker()
+    video = VideoPipeline(video_src, detector.detect_all, workers=detect_workers,
+                          every_n=detect_every_n_frames, display=display, cadence=cadence,
+                          capture_delay_s=capture_delay_s)
+    await video.start()
+    loop = asyncio.get_running_loop()
+    evidence = EvidenceWriter(out_dir=evidence_dir)
+    approached = 0
 
     try:
         while True:
-            ok, frame = cap.read()
-            if not ok:
-                await asyncio.sleep(0.05)
-                continue
-            frame_count += 1
-
-            # זיהוי מטרה כל N פריימים
-            if frame_count % max(1, int(detect_every_n_frames)) == 0:
-                bbox = detector.detect(frame)
-                if bbox is not None and not target_found:
-                    target_found = True
-                    print("[!] Target detected — approach & loiter...")
-                    path = save_frame(frame, prefix="target")
-                    print(f"[*] Saved frame: {path}")
-
-                    # עצירת המשימה וגישות קטנות לכיוון המטרה
-                    await drone.mission.pause_mission()
-
-                    for _ in range(8):
-                        # בדיקה חוזרת (Fail-fast אם איבדנו מטרה)
-                        bbox = detector.detect(frame)
-                        if bbox is None:
-                            break
-                        fwd, right = image_to_body_offsets(bbox, frame.shape)
-                        await goto_offset(drone, north_m=fwd, east_m=right, dalt_m=0.0)
-                        await asyncio.sleep(1.0)
-
-                    print("[*] RTL...")
-                    await drone.action.return_to_launch()
-                    break
-
-            # תצוגה למסך
-            cv2.imshow("SAR-Drone feed", frame)
             # ESC
-            if cv2.waitKey(1) & 0xFF == 27:
+            if video.esc_pressed.is_set():
                 print("[*] ESC pressed, aborting...")
                 await drone.action.return_to_launch()
                 break
 
+            if cadence is not None:
+                # מהירות וגובה מההיסטוריה (בלי await); אין עדיין דגימות => מהירות השיוט המתוכננת
+                v = history.mean_ground_speed(2.0)
+                row = history.latest()
+                cadence.ground_speed_ms = cruise_speed_ms if math.isnan(v) else v
+                if row is not None and not math.isnan(row[REL_ALT]):
+                    cadence.alt_m = float(row[REL_ALT])
+
+            res = await video.get(timeout=0.5)
+            if res is None:
+                continue
+            tracks = [tr for tr in tracker.update(res.boxes, t=res.frame.t) if tr.confirmed and tr.misses == 0]
+            pose = poses.at(res.frame.t)
+            mapped = _map_tracks(tracks, res.frame, pose, camera, target_map, conn_url)
+            # מטרות שכבר בוצעה אליהן גישה (בנתיב קודם או מרכב אחר) לא עוצרות שוב את המשימה
+            candidates = [tr for tr in tracks if tr.confidence >= track_confidence
+                          and not (tr.id in mapped and mapped[tr.id].approached)]
+            if not candidates:
+                continue
+            target = max(candidates, key=lambda tr: tr.confidence)
+            ground = mapped.get(target.id)
+
+            where = f" at {ground.lat_deg:.6f}, {ground.lon_deg:.6f}" if ground is not None else ""
+            print(f"[!] Target #{target.id} confirmed (confidence {target.confidence:.2f}){where} "
+                  f"— approach & loiter...")
+            # פריים האישור נכנס למקום השמור בתור — פריימי הגישה לא ידחקו אותו החוצה
+            path = _save_evidence(evidence, "target", res, pose, target, ground, conn_url, priority=True)
+            print(f"[*] Saving frame: {path or 'dropped (writer queue full)'}")
+
+            # עצירת המשימה וגישות לכיוון המטרה: לנקודת הקרקע שלה אם יש, אחרת היסט מהתמונה
+            await drone.mission.pause_mission()
+
+            for _ in range(8):
+                if ground is not None:
+                    await _goto_ground(drone, history, ground)
+                else:
+                    fwd, right = image_to_body_offsets(target.bbox, res.frame.image.shape)
+                    await goto_offset(drone, north_m=fwd, east_m=right, dalt_m=0.0)
+                moved = time.monotonic()
+                await asyncio.sleep(1.0)
+                # בדיקה חוזרת על פריים שנלכד אחרי התזוזה (Fail-fast אם איבדנו מטרה):
+                # אותו מסלול אם שויך, אחרת המסלול הבטוח ביותר שזוהה עכשיו (התמונה זזה עם הרחפן)
+                res = await video.get_after(moved, timeout=2.0)
+                if res is None:
+                    break
+                matched = [tr for tr in tracker.update(res.boxes, t=res.frame.t) if tr.misses == 0]
+                target = next((tr for tr in matched if tr.id == target.id),
+                              max(matched, key=lambda tr: tr.confidence, default=None))
+                if target is None:
+                    break
+                # כל תצפית מהקרבה מחדדת את מיקום המטרה במפה
+                pose = poses.at(res.frame.t)
+                ground = _map_tracks([target], res.frame, pose, camera, target_map, conn_url).get(target.id, ground)
+                _save_evidence(evidence, "approach", res, pose, target, ground, conn_url)
+
+            if ground is not None:
+                ground.approached = True
+            approached += 1
+            if approached < max_targets:
+                print(f"[*] Resuming search ({approached}/{max_targets} targets)...")
+                await drone.mission.start_mission()
+                continue
+
+            print("[*] RTL...")
+            await drone.action.return_to_launch()
+            break
+
     finally:
-        cap.release()
-        cv2.destroyAllWindows()
+        log.info("Search stats (last 60 s): mean ground speed %.1f m/s, max alt deviation %.1f m",
+                 history.mean_ground_speed(60.0), history.max_alt_deviation(60.0, ref_alt=alt_m))
+        log.info("Target map: %d targets, %d approached", len(target_map),
+                 sum(tg.approached for tg in target_map.targets.values()))
+        await video.stop()
+        await loop.run_in_executor(None, evidence.close)
@@ -2,7 +2,8 @@ import asyncio
 import logging
 from typing import List, Tuple
 from mavsdk import System
-from .utils import connect_drone, ensure_armed, get_current_position, meters_to_latlon_offsets, set_speed
+from .utils import (connect_drone, ensure_armed, get_current_position, leg_timeout, meters_to_latlon_offsets,
+                    set_speed, wait_arrival)
 
 log = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ async def run_square(conn_url: str, alt: float = 20.0, speed: float = 5.0, size_
         lat, lon = lat0 + d_lat, lon0 + d_lon
         log.info("Leg %d: goto lat=%.6f lon=%.6f alt=%.1f (speed=%.1f)", i, lat, lon, alt, speed)
         await drone.action.goto_location(lat, lon, pos.absolute_altitude_m + alt, 0.0)
-        await asyncio.sleep(max(6, int(size_m / max(speed, 0.1))))  # זמן משוער לקטע
+        await wait_arrival(drone, lat, lon, pos.absolute_altitude_m + alt, timeout_s=leg_timeout(size_m, speed))
 
     log.info("Square complete. Landing ...")
     await drone.action.land()
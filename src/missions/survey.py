@@ -1,8 +1,12 @@
 import asyncio
 import logging
+import math
 from typing import List, Tuple
+import numpy as np
 from mavsdk import System
-from .utils import connect_drone, ensure_armed, get_current_position, meters_to_latlon_offsets, set_speed
+from .geodesy import ne_to_latlon
+from .sweep import KinematicModel, optimize_sweep, rectangle
+from .utils import connect_drone, ensure_armed, get_current_position, leg_timeout, set_speed, wait_arrival
 
 log = logging.getLogger(__name__)
 
@@ -14,10 +18,15 @@ async def run_survey(
     height_m: float = 90.0,
     lane_spacing_m: float = 20.0,
     sweep_east_first: bool = True,
+    optimize: bool = False,
+    accel_ms2: float = 2.0,
+    turn_radius_m: float = 0.0,
 ):
     """
     "Survey" בסגנון lawnmower: טסים קווים מקבילים במלבנים סביב הבית.
     משתמש ב-goto_location לנקודות פינה של כל קו סריקה.
+    optimize=True: כיוון ופינת כניסה נבחרים לפי זמן טיסה משוער (sweep.optimize_sweep),
+    במקום קווים צפון-דרום קבועים.
     """
     drone: System = await connect_drone(conn_url)
     await set_speed(drone, speed)
@@ -33,44 +42,34 @@ async def run_survey(
     log.info("Home position: %.6f, %.6f | Survey %.0fx%.0f m | lane=%.0f m",
              lat0, lon0, width_m, height_m, lane_spacing_m)
 
-    hh = height_m / 2.0
-    hw = width_m / 2.0
-
-    # נבנה קווי סריקה לאורך ציר ה-"גובה" (North-South), ומתקדמים במרווחים לאורך ה-"רוחב" (East-West)
-    lanes: List[Tuple[float, float]] = []
-    x = -hw
-    direction = 1  # 1=North first, -1=South first
-    if not sweep_east_first:
-        x = hw
-        step = -lane_spacing_m
+    if optimize:
+        model = KinematicModel(cruise_ms=speed, accel_ms2=accel_ms2, turn_radius_m=turn_radius_m)
+        plan = optimize_sweep(rectangle(width_m, height_m), lane_spacing_m, model)
+        log.info("Sweep heading %.0f deg, %d lanes, est. %.0f s", plan.heading_deg, plan.lanes, plan.time_s)
+        lanes: List[Tuple[float, float]] = [(la, lo) for la, lo, _ in plan.to_latlon(lat0, lon0, alt)]
     else:
-        step = lane_spacing_m
-
-    while (x <= hw + 1e-6) if step > 0 else (x >= -hw - 1e-6):
-        # שתי נקודות קצה של כל קו (דרום->צפון או להפך)
-        start_dn = -hh if direction == 1 else +hh
-        end_dn   = +hh if direction == 1 else -hh
-
-        # תחילה לקצה הראשון
-        d_lat1, d_lon1 = meters_to_latlon_offsets(start_dn, x, lat0)
-        lat1, lon1 = lat0 + d_lat1, lon0 + d_lon1
-        lanes.append((lat1, lon1))
-
-        # ואז לקצה השני
-        d_lat2, d_lon2 = meters_to_latlon_offsets(end_dn, x, lat0)
-        lat2, lon2 = lat0 + d_lat2, lon0 + d_lon2
-        lanes.append((lat2, lon2))
+        hh = height_m / 2.0
+        hw = width_m / 2.0
 
-        # קו הבא
-        x += step
-        direction *= -1
+        # נבנה קווי סריקה לאורך ציר ה-"גובה" (North-South), ומתקדמים במרווחים לאורך ה-"רוחב" (East-West)
+        n_lanes = int(np.floor(width_m / lane_spacing_m + 1e-6)) + 1
+        xs = -hw + lane_spacing_m * np.arange(n_lanes)
+        if not sweep_east_first:
+            xs = -xs
+        # כל קו: דרום->צפון ואז צפון->דרום לסירוגין (שתי נקודות קצה לקו)
+        direction = np.where(np.arange(n_lanes) % 2 == 0, 1.0, -1.0)
+        dn = np.stack([-hh * direction, hh * direction], axis=1).ravel()
+        de = np.repeat(xs, 2)
+        # המרה וקטורית אחת לכל נקודות המסלול
+        lats, lons = ne_to_latlon(lat0, lon0, dn, de)
+        lanes = list(zip(lats.tolist(), lons.tolist()))
 
-    # ביצוע המסלול
-    est_leg = max(height_m, lane_spacing_m) / max(speed, 0.1)
+    # ביצוע המסלול: ממשיכים לנקודה הבאה ברגע ההגעה (ולא לפי זמן משוער)
+    timeout_s = leg_timeout(math.hypot(width_m, height_m), speed)  # חסם עליון לכל רגל
     for i, (lat, lon) in enumerate(lanes, 1):
         log.info("Lane pt %d/%d -> lat=%.6f lon=%.6f alt=%.1f", i, len(lanes), lat, lon, alt)
         await drone.action.goto_location(lat, lon, base_abs_alt, 0.0)
-        await asyncio.sleep(max(4, int(est_leg)))
+        await wait_arrival(drone, lat, lon, base_abs_alt, timeout_s=timeout_s)
 
     log.info("Survey complete. Landing ...")
     await drone.action.land()
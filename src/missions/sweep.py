@@ -0,0 +1,180 @@
+# src/missions/sweep.py
+"""
+אופטימיזציה של כיוון הסריקה (lawnmower) לפי זמן טיסה משוער, ולא רק לפי אורך המסלול.
+
+לכל זווית מועמדת (וקטורית, מערך (A, K) של זוויות x קווים) ולכל אחת מ-4 פינות הכניסה:
+  - קווים: פרופיל מהירות טרפזי (האצה/האטה בין מהירות הפנייה למהירות השיוט)
+  - פניות: קשת ברדיוס max(spacing/2, turn_radius) במהירות שמוגבלת ע"י התאוצה הצידית,
+           כולל "בליטה" כשהרדיוס גדול מחצי המרווח, והפרש הקצוות בין קווים סמוכים
+  - מעבר מנקודת ההתחלה לכניסה ומהיציאה חזרה (עצירה מלאה)
+האזור הוא פוליגון קמור במטרים (north, east) סביב נקודת ייחוס; לפוליגון קעור/עם חורים — coverage.py.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geodesy import ne_to_latlon
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class KinematicModel:
+    cruise_ms: float = 6.0
+    accel_ms2: float = 2.0                 # האצה/האטה לאורך המסלול
+    turn_radius_m: float = 0.0             # רדיוס פנייה מינימלי (0 = מולטירוטור)
+    lat_accel_ms2: Optional[float] = None  # תאוצה צידית מקסימלית בפנייה (ברירת מחדל: accel_ms2)
+
+    def turn_speed(self, radius_m):
+        a_lat = self.accel_ms2 if self.lat_accel_ms2 is None else self.lat_accel_ms2
+        return np.minimum(self.cruise_ms, np.sqrt(a_lat * np.maximum(radius_m, _EPS)))
+
+
+@dataclass
+class SweepPlan:
+    heading_deg: float           # כיוון הקווים (0 = צפון, 90 = מזרח)
+    reverse_lanes: bool          # מתחילים מהקו ה"אחרון" בציר הניצב
+    first_forward: bool          # הקו הראשון נטוס בכיוון heading (ולא הפוך)
+    time_s: float
+    length_m: float
+    lanes: int
+    waypoints_ne: np.ndarray     # (2*lanes, 2) — (north, east) במטרים
+
+    def to_latlon(self, lat0: float, lon0: float, alt: float) -> List[Tuple[float, float, float]]:
+        lats, lons = ne_to_latlon(lat0, lon0, self.waypoints_ne[:, 0], self.waypoints_ne[:, 1])
+        return [(la, lo, alt) for la, lo in zip(lats.tolist(), lons.tolist())]
+
+
+def rectangle(width_m: float, height_m: float) -> np.ndarray:
+    """מלבן ממורכז (width = מזרח-מערב, height = צפון-דרום) כקודקודי (north, east)."""
+    hw, hh = width_m / 2.0, height_m / 2.0
+    return np.array([(-hh, -hw), (-hh, hw), (hh, hw), (hh, -hw)], dtype=np.float64)
+
+
+def travel_time(dist, v0, v1, model: KinematicModel):
+    """זמן מעבר dist מ-v0 ל-v1 (פרופיל טרפזי/משולש, וקטורי)."""
+    d = np.maximum(np.asarray(dist, dtype=np.float64), 0.0)
+    a, vmax = model.accel_ms2, model.cruise_ms
+    v0 = np.minimum(v0, vmax)
+    v1 = np.minimum(v1, vmax)
+    d_acc = (vmax ** 2 - v0 ** 2) / (2 * a)
+    d_dec = (vmax ** 2 - v1 ** 2) / (2 * a)
+    full = d >= d_acc + d_dec
+    t_full = (vmax - v0) / a + (vmax - v1) / a + (d - d_acc - d_dec) / vmax
+    # משולש: שיא מהירות vp שלא מגיע ל-vmax
+    vp = np.sqrt(np.maximum(a * d + (v0 ** 2 + v1 ** 2) / 2.0, 0.0))
+    vp = np.maximum(vp, np.maximum(v0, v1))
+    t_tri = (2 * vp - v0 - v1) / a
+    return np.where(full, t_full, t_tri)
+
+
+def _lane_chords(poly_ne: np.ndarray, spacing: float, headings_deg: np.ndarray):
+    """
+    (u0, u1, v, valid): קצוות כל קו לאורך הכיוון (u) ומיקומו בניצב (v), מערכי (A, K).
+    כל הזוויות יחד: קווים x צלעות => (A, K, E).
+    """
+    h = np.radians(headings_deg)[:, None]
+    d = np.stack([np.cos(h), np.sin(h)], axis=-1)      # (A,1,2) כיוון הקו ב-(n, e)
+    nrm = np.stack([-np.sin(h), np.cos(h)], axis=-1)   # ניצב
+    p, q = poly_ne, np.roll(poly_ne, -1, axis=0)
+    pu, pv = (p[None] * d).sum(-1), (p[None] * nrm).sum(-1)   # (A, E)
+    qu, qv = (q[None] * d).sum(-1), (q[None] * nrm).sum(-1)
+
+    vmin, vmax = pv.min(axis=1), pv.max(axis=1)
+    n_lanes = np.maximum(1, np.ceil((vmax - vmin) / spacing - _EPS).astype(np.int64))
+    k = np.arange(n_lanes.max())[None, :]
+    valid = k < n_lanes[:, None]
+    v = np.clip(vmin[:, None] + spacing * (k + 0.5), vmin[:, None] + _EPS, vmax[:, None] - _EPS)
+
+    V = v[:, :, None]
+    lo = np.minimum(pv, qv)[:, None, :]
+    hi = np.maximum(pv, qv)[:, None, :]
+    dv = (qv - pv)[:, None, :]
+    hit = (lo <= V) & (V <= hi) & (np.abs(dv) > _EPS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = pu[:, None, :] + (V - pv[:, None, :]) * (qu - pu)[:, None, :] / dv
+    u0 = np.where(hit, u, np.inf).min(axis=2)
+    u1 = np.where(hit, u, -np.inf).max(axis=2)
+    valid &= np.isfinite(u0) & np.isfinite(u1)
+    u0 = np.where(valid, u0, 0.0)
+    u1 = np.where(valid, np.maximum(u1, u0), 0.0)
+    return u0, u1, v, valid, n_lanes
+
+
+def _to_ne(u, v, heading_deg):
+    h = np.radians(heading_deg)
+    return np.stack([u * np.cos(h) - v * np.sin(h), u * np.sin(h) + v * np.cos(h)], axis=-1)
+
+
+def optimize_sweep(polygon_ne: Sequence[Tuple[float, float]], lane_spacing_m: float,
+                   model: KinematicModel = KinematicModel(), start_ne: Tuple[float, float] = (0.0, 0.0),
+                   headings_deg: Optional[Sequence[float]] = None, return_to_start: bool = True) -> SweepPlan:
+    """
+    בוחר כיוון + פינת כניסה עם זמן הטיסה המשוער הקצר ביותר.
+    headings_deg=None => כל מעלה ב-[0, 180) + כיווני צלעות הפוליגון.
+    """
+    if lane_spacing_m <= 0:
+        raise ValueError("lane_spacing_m must be positive")
+    poly = np.asarray(polygon_ne, dtype=np.float64)
+    if headings_deg is None:
+        e = np.roll(poly, -1, axis=0) - poly
+        edge = np.degrees(np.arctan2(e[:, 1], e[:, 0])) % 180.0
+        headings_deg = np.unique(np.concatenate([np.arange(0.0, 180.0, 1.0), np.round(edge, 3)]))
+    heads = np.asarray(headings_deg, dtype=np.float64)
+    s = float(lane_spacing_m)
+
+    u0, u1, v, valid, n = _lane_chords(poly, s, heads)
+    A, K = u0.shape
+    k = np.arange(K)[None, :]
+
+    # פנייה בין קווים סמוכים (זהה לכל פינות הכניסה חוץ מהצד)
+    radius = max(s / 2.0, model.turn_radius_m)
+    vt = float(model.turn_speed(radius))
+    arc = np.pi * radius + max(0.0, 2 * radius - s)
+    lane_t = np.where(valid, travel_time(u1 - u0, vt, vt, model), 0.0).sum(axis=1)
+    lane_len = np.where(valid, u1 - u0, 0.0).sum(axis=1)
+
+    pair = valid[:, 1:] & valid[:, :-1]
+    du_hi = np.abs(np.diff(u1, axis=1))
+    du_lo = np.abs(np.diff(u0, axis=1))
+    start = np.asarray(start_ne, dtype=np.float64)
+
+    best = None
+    for rev in (False, True):
+        # מיקום הפנייה בסדר הטיסה: קו k -> k+1 הוא פנייה מספר k (או n-2-k בסדר הפוך)
+        pos = np.where(rev, n[:, None] - 2 - k[:, :-1], k[:, :-1])
+        for fwd in (True, False):
+            ends_hi = (pos % 2 == 0) == fwd            # הקו במיקום pos הסתיים בצד u1
+            du = np.where(ends_hi, du_hi, du_lo)
+            turn_t = np.where(pair, (arc + du) / vt, 0.0).sum(axis=1)
+            turn_len = np.where(pair, arc + du, 0.0).sum(axis=1)
+
+            first = np.where(rev, n - 1, 0)
+            last = np.where(rev, 0, n - 1)
+            rows = np.arange(A)
+            entry_u = np.where(fwd, u0[rows, first], u1[rows, first])
+            last_fwd = ((n - 1) % 2 == 0) == fwd
+            exit_u = np.where(last_fwd, u1[rows, last], u0[rows, last])
+            entry = _to_ne(entry_u, v[rows, first], heads)
+            exit_ = _to_ne(exit_u, v[rows, last], heads)
+            d_in = np.linalg.norm(entry - start, axis=1)
+            d_out = np.linalg.norm(exit_ - start, axis=1) if return_to_start else np.zeros(A)
+            # עצירה מלאה בכניסה וביציאה: מעבר במהירות vt ל/מ הקו
+            t = (lane_t + turn_t + travel_time(d_in, 0.0, vt, model)
+                 + (travel_time(d_out, vt, 0.0, model) if return_to_start else 0.0))
+            i = int(np.argmin(t))
+            if best is None or t[i] < best[0]:
+                best = (float(t[i]), i, rev, fwd, float(lane_len[i] + turn_len[i] + d_in[i] + d_out[i]))
+
+    t_best, i, rev, fwd, length = best
+    nl = int(n[i])
+    order = np.arange(nl)[::-1] if rev else np.arange(nl)
+    order = order[valid[i, order]]
+    forward = (np.arange(len(order)) % 2 == 0) == fwd
+    a = np.where(forward, u0[i, order], u1[i, order])
+    b = np.where(forward, u1[i, order], u0[i, order])
+    us = np.stack([a, b], axis=1).ravel()
+    vs = np.repeat(v[i, order], 2)
+    return SweepPlan(heading_deg=float(heads[i]), reverse_lanes=rev, first_forward=fwd, time_s=t_best,
+                     length_m=length, lanes=len(order), waypoints_ne=_to_ne(us, vs, heads[i]))
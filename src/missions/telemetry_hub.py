@@ -0,0 +1,224 @@
+# src/missions/telemetry_hub.py
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from mavsdk import System
+
+from .history import AttitudeHistory, PoseBuffer, TelemetryHistory
+
+log = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+LATEST = "latest"
+POLICIES = (DROP_OLDEST, LATEST)
+
+
+class SubscriptionClosed(Exception):
+    """הזרם הסתיים או שהמנוי נסגר."""
+
+
+class Subscription:
+    """
+    מנוי לזרם יחיד עם תור חסום:
+      - drop_oldest: עד maxsize דגימות; כשהתור מלא הדגימה הוותיקה נזרקת
+      - latest: רק הדגימה האחרונה (maxsize=1)
+    dropped סופר כמה דגימות נזרקו (אינדיקציה לצרכן איטי).
+    """
+    def __init__(self, hub: "TelemetryHub", stream: str, maxsize: int = 16, policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown subscription policy '{policy}' (choose from {POLICIES})")
+        self.stream = stream
+        self.policy = policy
+        self.dropped = 0
+        self._hub = hub
+        self._buf: deque = deque(maxlen=1 if policy == LATEST else max(1, int(maxsize)))
+        self._evt = asyncio.Event()
+        self._closed = False
+
+    def _push(self, sample):
+        if len(self._buf) == self._buf.maxlen:
+            self.dropped += 1
+        self._buf.append(sample)
+        self._evt.set()
+
+    def _end(self):
+        self._closed = True
+        self._evt.set()
+
+    async def get(self):
+        while not self._buf:
+            if self._closed:
+                raise SubscriptionClosed(self.stream)
+            self._evt.clear()
+            await self._evt.wait()
+        return self._buf.popleft()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.get()
+        except SubscriptionClosed:
+            raise StopAsyncIteration from None
+
+    def close(self):
+        self._hub._unsubscribe(self)
+        self._end()
+
+
+class TelemetryHub:
+    """
+    חיבור MAVSDK יחיד לכל רכב, עם fan-out של כל זרם לכמה מנויים (משימה, לוגר, לולאת דטקטור).
+    לכל זרם רצה משימת pump אחת בלבד, שנפתחת עם המנוי הראשון ונסגרת עם האחרון.
+    שמות זרמים: "position" (telemetry) או "<plugin>.<method>", למשל "mission.mission_progress".
+    """
+    def __init__(self, drone: System, conn_url: Optional[str] = None):
+        self.drone = drone
+        self.conn_url = conn_url
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, object] = {}
+        self._stamps: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.history: Optional[TelemetryHistory] = None
+        self.attitude: Optional[AttitudeHistory] = None
+        self.poses: Optional[PoseBuffer] = None
+
+    def _factory(self, stream: str):
+        plugin, _, method = stream.rpartition(".")
+        factory = getattr(getattr(self.drone, plugin or "telemetry", None), method, None)
+        if factory is None:
+            raise ValueError(f"Unknown MAVSDK stream '{stream}'")
+        return factory
+
+    def subscribe(self, stream: str, maxsize: int = 16, policy: str = DROP_OLDEST) -> Subscription:
+        factory = self._factory(stream)
+        sub = Subscription(self, stream, maxsize, policy)
+        self._subs.setdefault(stream, set()).add(sub)
+        if stream not in self._pumps:
+            self._pumps[stream] = asyncio.create_task(self._pump(stream, factory))
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        subs = self._subs.get(sub.stream)
+        if not subs or sub not in subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            # אין יותר צרכנים — מפסיקים לקרוא מהשרת
+            task = self._pumps.pop(sub.stream, None)
+            if task:
+                task.cancel()
+
+    async def _pump(self, stream: str, factory):
+        try:
+            async for sample in factory():
+                self._latest[stream] = sample
+                self._stamps[stream] = time.monotonic()
+                for sub in tuple(self._subs.get(stream, ())):
+                    sub._push(sample)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("Hub stream '%s' ended: %s", stream, e)
+        # הזרם נגמר: משחררים את כל מי שממתין
+        self._pumps.pop(stream, None)
+        for sub in self._subs.pop(stream, set()):
+            sub._end()
+
+    def latest(self, stream: str):
+        """הדגימה האחרונה שהתקבלה (None אם הזרם לא פעיל/טרם דגם) — ללא await."""
+        return self._latest.get(stream)
+
+    def age(self, stream: str) -> float:
+        """כמה שניות עברו מאז הדגימה האחרונה (inf אם אין)."""
+        t = self._stamps.get(stream)
+        return float("inf") if t is None else time.monotonic() - t
+
+    async def next(self, stream: str, timeout: Optional[float] = None):
+        """ממתין לדגימה הבאה של stream (דרך מנוי latest זמני)."""
+        sub = self.subscribe(stream, policy=LATEST)
+        try:
+            return await asyncio.wait_for(sub.get(), timeout=timeout)
+        finally:
+            sub.close()
+
+    def enable_history(self, capacity: int = 4096) -> TelemetryHistory:
+        """היסטוריה אחת לרכב (TelemetryHistory), ממולאת ברקע מה-position/velocity של ה-hub."""
+        if self.history is None:
+            self.history = TelemetryHistory(capacity)
+            self._tasks.append(asyncio.create_task(self.history.feed(self)))
+        return self.history
+
+    def enable_poses(self, capacity: int = 4096) -> PoseBuffer:
+        """
+        PoseBuffer לרכב: היסטוריית המיקום (enable_history) + היסטוריית attitude, ממולאות ברקע,
+        לשאילתת מיקום/attitude ברגע לכידת פריים (poses.at(frame.t)).
+        """
+        if self.poses is None:
+            history = self.enable_history(capacity)
+            self.attitude = AttitudeHistory(capacity)
+            self._tasks.append(asyncio.create_task(self.attitude.feed(self)))
+            self.poses = PoseBuffer(history, self.attitude)
+        return self.poses
+
+    def streams(self) -> List[str]:
+        return sorted(self._pumps)
+
+    async def close(self):
+        tasks = self._tasks + list(self._pumps.values())
+        self._tasks = []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pumps.clear()
+        for subs in self._subs.values():
+            for sub in subs:
+                sub._end()
+        self._subs.clear()
+
+
+SERVER_PORT_BASE = 50051   # פורט ה-mavsdk_server של ה-hub הראשון; כל hub נוסף מקבל את הפנוי הבא
+
+# hub משותף לכל URL: משימות ולוגר באותו תהליך חולקים mavsdk_server אחד לרכב
+_HUBS: Dict[str, TelemetryHub] = {}
+_HUB_PORTS: Dict[str, int] = {}
+_HUB_LOCK: Optional[asyncio.Lock] = None
+
+
+async def get_hub(conn_url: str, server_port: Optional[int] = None) -> TelemetryHub:
+    """
+    מחזיר את ה-hub של conn_url, ומתחבר (System + connect) רק בפעם הראשונה.
+    server_port: פורט ה-mavsdk_server של הרכב. None => הפורט הפנוי הראשון מ-SERVER_PORT_BASE,
+    כך שכמה hubs באותו תהליך (לוגר + משימת נחיל) לא מתנגשים; פורט מפורש שתפוס => ValueError.
+    """
+    global _HUB_LOCK
+    if _HUB_LOCK is None:
+        _HUB_LOCK = asyncio.Lock()
+    async with _HUB_LOCK:
+        hub = _HUBS.get(conn_url)
+        if hub is None:
+            used = set(_HUB_PORTS.values())
+            if server_port is None:
+                server_port = next(p for p in itertools.count(SERVER_PORT_BASE) if p not in used)
+            elif server_port in used:
+                raise ValueError(f"mavsdk_server port {server_port} already used by another hub")
+            drone = System(port=server_port)
+            log.info("Connecting to %s (mavsdk_server port %d) ...", conn_url, server_port)
+            await drone.connect(system_address=conn_url)
+            hub = _HUBS[conn_url] = TelemetryHub(drone, conn_url)
+            _HUB_PORTS[conn_url] = server_port
+        return hub
+
+
+def hub_of(drone: System) -> Optional[TelemetryHub]:
+    """ה-hub שמנהל את drone (אם יש), כדי שקוד שמקבל System ישתמש בזרמים המשותפים."""
+    for hub in _HUBS.values():
+        if hub.drone is drone:
+            return hub
+    return None
@@ -1,24 +1,24 @@
 import asyncio
 import logging
-from math import cos, radians
-from typing import Tuple
+from math import hypot
+from typing import Optional, Tuple
 from mavsdk import System
+from mavsdk.mission import MissionItem, MissionPlan
 
-log = logging.getLogger(__name__)
+from .geodesy import geodetic_to_ned, ne_to_latlon
+from .telemetry_hub import get_hub, hub_of
 
-# קבועי המרה: כ~111,320 מ' לדקת רוחב; לאורך קו רוחב—*קוסינוס* קו רוחב
-M_PER_DEG_LAT = 111_320.0
+log = logging.getLogger(__name__)
 
-def meters_to_latlon_offsets(d_north_m: float, d_east_m: float, ref_lat: float) -> Tuple[float, float]:
-    """המרת היסטים במטרים לדלתא של lat/lon סביב ref_lat (בקירוב טוב ליישומים קטנים)."""
-    d_lat = d_north_m / M_PER_DEG_LAT
-    d_lon = d_east_m / (M_PER_DEG_LAT * cos(radians(ref_lat)))
-    return d_lat, d_lon
+def meters_to_latlon_offsets(d_north_m, d_east_m, ref_lat: float) -> Tuple[float, float]:
+    """המרת היסטים במטרים לדלתא של lat/lon סביב ref_lat (מישור משיק, ראו geodesy). מקבל גם מערכים."""
+    lat, lon = ne_to_latlon(ref_lat, 0.0, d_north_m, d_east_m)
+    return lat - ref_lat, lon
 
 async def connect_drone(conn_url: str) -> System:
-    drone = System()
-    log.info("Connecting to %s ...", conn_url)
-    await drone.connect(system_address=conn_url)
+    # חיבור משותף דרך ה-hub: הלוגר ושאר הצרכנים באותו תהליך משתמשים באותו System
+    hub = await get_hub(conn_url)
+    drone = hub.drone
 
     async for state in drone.core.connection_state():
         if state.is_connected:
@@ -36,9 +36,71 @@ async def connect_drone(conn_url: str) -> System:
 
 async def get_current_position(drone: System):
     """מחזיר דגימת מיקום נוכחי (lat, lon, abs_alt_m)."""
+    hub = hub_of(drone)
+    if hub is not None:
+        return await hub.next("position")
     async for pos in drone.telemetry.position():
         return pos  # יש בו latitude_deg / longitude_deg / absolute_altitude_m
 
+async def wait_arrival(drone: System, lat: float, lon: float, abs_alt_m: Optional[float] = None,
+                       acceptance_radius_m: float = 2.0, settle_speed_ms: Optional[float] = 0.5,
+                       timeout_s: float = 60.0) -> bool:
+    """
+    ממתין עד שהרחפן בתוך acceptance_radius_m מהיעד (ובגובה, אם abs_alt_m ניתן)
+    ומהירותו האופקית מתחת ל-settle_speed_ms (None => בלי דרישת התייצבות).
+    מונע מזרם ה-position (וה-velocity_ned); מחזיר False אם עבר timeout_s.
+    """
+    hub = hub_of(drone)
+    subs = []
+    vel_task = None
+    latest_vel = [None]
+
+    if hub is not None:
+        positions = hub.subscribe("position", policy="latest")
+        subs = [positions, hub.subscribe("velocity_ned", policy="latest")]
+
+        def velocity():
+            return hub.latest("velocity_ned")
+    else:
+        positions = drone.telemetry.position()
+
+        async def track_velocity():
+            async for v in drone.telemetry.velocity_ned():
+                latest_vel[0] = v
+        vel_task = asyncio.create_task(track_velocity())
+
+        def velocity():
+            return latest_vel[0]
+
+    async def watch() -> None:
+        async for pos in positions:
+            d_n, d_e, _ = geodetic_to_ned(lat, lon, 0.0, pos.latitude_deg, pos.longitude_deg)
+            if hypot(d_n, d_e) > acceptance_radius_m:
+                continue
+            if abs_alt_m is not None and abs(pos.absolute_altitude_m - abs_alt_m) > acceptance_radius_m:
+                continue
+            if settle_speed_ms is not None:
+                v = velocity()
+                if v is None or hypot(v.north_m_s, v.east_m_s) > settle_speed_ms:
+                    continue
+            return
+
+    try:
+        await asyncio.wait_for(watch(), timeout=timeout_s)
+        return True
+    except asyncio.TimeoutError:
+        log.warning("No arrival at %.6f, %.6f within %.1f s — continuing.", lat, lon, timeout_s)
+        return False
+    finally:
+        for sub in subs:
+            sub.close()
+        if vel_task is not None:
+            vel_task.cancel()
+
+def leg_timeout(distance_m: float, speed_m_s: float) -> float:
+    """timeout נדיב לרגל: פי 3 מזמן השיוט + מרווח להאצה/בלימה."""
+    return 3.0 * distance_m / max(speed_m_s, 0.1) + 15.0
+
 async def ensure_armed(drone: System):
     log.info("Arming ...")
     await drone.action.arm()
@@ -56,3 +118,27 @@ async def set_speed(drone: System, speed_m_s: float):
             await drone.action.set_maximum_speed(speed_m_s)  # גרסאות ישנות
         except Exception:
             log.warning("Could not set speed via MAVSDK API (version mismatch).")
+
+def make_mission_plan(waypoints, speed_ms: float = 6.0) -> MissionPlan:
+    items = []
+    for lat, lon, alt in waypoints:
+        items.append(MissionItem(
+            latitude_deg=lat, longitude_deg=lon, relative_altitude_m=alt,
+            speed_m_s=speed_ms, is_fly_through=True,
+            gimbal_pitch_deg=float('nan'), gimbal_yaw_deg=float('nan'),
+            camera_action=MissionItem.CameraAction.NONE,
+            loiter_time_s=0.0, camera_photo_interval_s=1.0,
+            acceptance_radius_m=float('nan'),
+            yaw_deg=float('nan'), camera_photo_distance_m=float('nan')
+        ))
+    return MissionPlan(items)
+
+async def upload_mission(drone: System, plan: MissionPlan, rtl_after=True):
+    await drone.mission.clear_mission()
+    await drone.mission.set_return_to_launch_after_mission(bool(rtl_after))
+    await drone.mission.upload_mission(plan)
+
+async def upload_and_start_mission(drone: System, plan: MissionPlan, rtl_after=True):
+    await upload_mission(drone, plan, rtl_after)
+    log.info("Starting mission...")
+    await drone.mission.start_mission()
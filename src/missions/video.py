@@ -0,0 +1,272 @@
+# src/missions/video.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+import cv2
+
+from .cadence import CadenceScheduler
+
+log = logging.getLogger(__name__)
+
+BBox = Tuple[int, int, int, int]
+
+
+@dataclass
+class Frame:
+    seq: int        # מונה פריימים של ה-grabber (1, 2, ...)
+    t: float        # time.monotonic() ברגע הלכידה (grab, לפני פענוח, פחות capture_delay_s)
+    image: Any
+
+
+@dataclass
+class DetectionResult:
+    frame: Frame
+    boxes: List[BBox]   # כל הזיהויים בפריים (ריק = אין)
+    latency_s: float    # מהלכידה ועד סוף הזיהוי
+
+    @property
+    def bbox(self) -> Optional[BBox]:
+        """הזיהוי הראשון (דטקטורים מחזירים את הראשי/הגדול ראשון), או None."""
+        return self.boxes[0] if self.boxes else None
+
+
+def as_boxes(out) -> List[BBox]:
+    """פלט דטקטור -> רשימת bboxes: None, bbox יחיד, רשימת bboxes או רשימת dicts עם "bbox"."""
+    if out is None or len(out) == 0:
+        return []
+    if not hasattr(out[0], "__len__"):
+        return [tuple(out)]
+    return [tuple(d["bbox"] if isinstance(d, dict) else d) for d in out]
+
+
+class LatestFrameSlot:
+    """סלוט יחיד thread-safe: put דורס את הפריים הקודם, wait_newer מחכה לפריים חדש מ-seq נתון."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame: Optional[Frame] = None
+
+    def put(self, frame: Frame):
+        with self._cond:
+            self._frame = frame
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        with self._cond:
+            return self._frame
+
+    def wait_newer(self, after_seq: int, timeout: float) -> Optional[Frame]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame is not None and self._frame.seq > after_seq, timeout)
+            f = self._frame
+            return f if f is not None and f.seq > after_seq else None
+
+
+class FrameGrabber:
+    """
+    thread לכידה: cap.read() (חוסם, כולל פענוח) רץ כאן ולא על ה-event loop.
+    כל פריים נכנס לסלוט היחיד — צרכן איטי מקבל תמיד את האחרון ולא תור של פריימים ישנים.
+    גם VideoCapture נפתח בתוך ה-thread (פתיחת מצלמה/stream יכולה לקחת שניות).
+    חותמת הזמן נלקחת כש-grab() חוזר, לפני retrieve() (הפענוח), כך שזמן הפענוח לא נכנס לשגיאת הסנכרון
+    מול הטלמטריה. capture_delay_s: השהיה ידועה מהחשיפה ועד שהפריים זמין (חיישן/USB/stream) — מופחתת.
+    """
+    def __init__(self, source, slot: LatestFrameSlot, retry_s: float = 0.05, capture_delay_s: float = 0.0):
+        self.source = source
+        self.slot = slot
+        self.retry_s = retry_s
+        self.capture_delay_s = capture_delay_s
+        self.captured = 0
+        self.read_failures = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.source)
+        try:
+            while not self._stop.is_set():
+                ok = cap.grab()
+                t = time.monotonic() - self.capture_delay_s
+                if ok:
+                    ok, image = cap.retrieve()
+                if not ok:
+                    self.read_failures += 1
+                    time.sleep(self.retry_s)
+                    continue
+                self.captured += 1
+                self.slot.put(Frame(self.captured, t, image))
+        finally:
+            cap.release()
+
+
+class VideoPipeline:
+    """
+    לכידה -> זיהוי -> תוצאות ל-asyncio, בלי אף קריאת OpenCV חוסמת על ה-event loop:
+      - FrameGrabber: thread לכידה עם סלוט "הפריים האחרון"
+      - dispatcher: thread שלוקח את הפריים החדש ביותר כשיש worker פנוי ושולח אותו ל-pool של workers
+        (OpenCV משחרר את ה-GIL, כך שהזיהוי באמת מקבילי); לכל היותר פעם ב-every_n פריימים,
+        או לפי cadence (CadenceScheduler) אם ניתן
+      - התוצאות חוזרות ל-loop דרך asyncio.Queue חסום (מלא => התוצאה הוותיקה נזרקת)
+      - display (אופציונלי): thread נפרד ל-imshow/waitKey; ESC מדליק את esc_pressed
+    detect מחזיר bbox יחיד או רשימה (detect_all), וחייב להיות thread-safe אם workers > 1.
+    שימוש:
+        pipe = VideoPipeline(0, detector.detect)
+        await pipe.start()
+        res = await pipe.get(timeout=0.5)
+        ...
+        await pipe.stop()
+    """
+    def __init__(self, source, detect: Callable[[Any], Any], workers: int = 1, every_n: int = 1,
+                 display: bool = True, window: str = "SAR-Drone feed", maxsize: int = 4,
+                 cadence: Optional[CadenceScheduler] = None, capture_delay_s: float = 0.0):
+        self.detect = detect
+        self.workers = max(1, int(workers))
+        self.every_n = max(1, int(every_n))
+        self.cadence = cadence
+        self.display = display
+        self.window = window
+        self.slot = LatestFrameSlot()
+        self.grabber = FrameGrabber(source, self.slot, capture_delay_s=capture_delay_s)
+        self.esc_pressed: Optional[asyncio.Event] = None
+        self.last_boxes: List[BBox] = []
+        # סטטיסטיקות: פריימים שה-dispatcher לא ראה/דילג עליהם, תוצאות שנזרקו מהתור, זמני זיהוי
+        self.skipped = 0
+        self.dropped = 0
+        self.detections = 0
+        self._latency_sum = 0.0
+        self._maxsize = max(1, int(maxsize))
+        self._results: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._free = threading.Semaphore(self.workers)
+        self._stop = threading.Event()
+        self._threads = []
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._results = asyncio.Queue(self._maxsize)
+        self.esc_pressed = asyncio.Event()
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="detector")
+        self.grabber.start()
+        targets = [self._dispatch] + ([self._show] if self.display else [])
+        self._threads = [threading.Thread(target=t, name=f"video-{t.__name__.strip('_')}", daemon=True)
+                         for t in targets]
+        for t in self._threads:
+            t.start()
+
+    async def stop(self):
+        self._stop.set()
+
+        def join():
+            for t in self._threads:
+                t.join(2.0)
+            self.grabber.stop()
+            self._pool.shutdown(wait=True)
+        # join חוסם — מחוץ ל-loop
+        await self._loop.run_in_executor(None, join)
+        log.info("Video: %d frames captured, %d detections (mean latency %.0f ms), %d frames skipped, "
+                 "%d results dropped", self.grabber.captured, self.detections,
+                 1e3 * self.mean_latency_s, self.skipped, self.dropped)
+        if self.cadence is not None:
+            log.info("Video %s", self.cadence.summary())
+
+    @property
+    def mean_latency_s(self) -> float:
+        return self._latency_sum / self.detections if self.detections else 0.0
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[DetectionResult]:
+        """התוצאה הבאה, או None אם לא הגיעה תוך timeout."""
+        try:
+            return await asyncio.wait_for(self._results.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def get_after(self, t: float, timeout: float) -> Optional[DetectionResult]:
+        """התוצאה הראשונה על פריים שנלכד אחרי t (monotonic); תוצאות ישנות יותר נזרקות."""
+        deadline = time.monotonic() + timeout
+        while True:
+            res = await self.get(max(0.0, deadline - time.monotonic()))
+            if res is None or res.frame.t > t:
+                return res
+
+    # ---------- threads ----------
+    def _dispatch(self):
+        last_seen = last_sent = 0
+        while not self._stop.is_set():
+            if not self._free.acquire(timeout=0.2):
+                continue
+            f = self.slot.wait_newer(last_seen, 0.2)
+            if f is None or not self._due(f, last_sent):
+                if f is not None:
+                    last_seen = f.seq
+                self._free.release()
+                continue
+            self.skipped += f.seq - last_seen - 1
+            last_seen = last_sent = f.seq
+            self._pool.submit(self._run_detect, f)
+
+    def _due(self, f: Frame, last_sent: int) -> bool:
+        if self.cadence is not None:
+            return self.cadence.should_detect(f.t)
+        return f.seq - last_sent >= self.every_n
+
+    def _run_detect(self, f: Frame):
+        t0 = time.monotonic()
+        try:
+            boxes = as_boxes(self.detect(f.image))
+        except Exception as e:
+            log.warning("Detector failed on frame %d: %s", f.seq, e)
+            boxes = []
+        finally:
+            self._free.release()
+        if self.cadence is not None:
+            self.cadence.record(time.monotonic() - t0)
+        res = DetectionResult(f, boxes, time.monotonic() - f.t)
+        try:
+            self._loop.call_soon_threadsafe(self._publish, res)
+        except RuntimeError:
+            pass  # ה-loop כבר נסגר
+
+    def _publish(self, res: DetectionResult):
+        # רץ על ה-loop
+        self.detections += 1
+        self._latency_sum += res.latency_s
+        self.last_boxes = res.boxes
+        if res.boxes and self.cadence is not None:
+            self.cadence.note_candidate(res.frame.t)
+        if self._results.full():
+            self._results.get_nowait()
+            self.dropped += 1
+        self._results.put_nowait(res)
+
+    def _show(self):
+        # HighGUI מחייב את כל הקריאות מאותו thread
+        last = 0
+        try:
+            while not self._stop.is_set():
+                f = self.slot.wait_newer(last, 0.1)
+                if f is None:
+                    continue
+                last = f.seq
+                image = f.image
+                boxes = self.last_boxes
+                if boxes:
+                    image = image.copy()
+                for x, y, w, h in boxes:
+                    cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 255), 2)
+                cv2.imshow(self.window, image)
+                if cv2.waitKey(1) & 0xFF == 27:
+                    self._loop.call_soon_threadsafe(self.esc_pressed.set)
+        finally:
+            cv2.destroyAllWindows()
@@ -1,18 +1,24 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import sys
 
-def main(csv_path: str):
-    df = pd.read_csv(csv_path)
-    if not {'lat','lon'}.issubset(df.columns):
-        print("CSV must contain 'lat','lon'")
+from utils.readers import read_telemetry
+
+
+def main(log_path: str):
+    # CSV או תיקיית npy (ראו utils.readers)
+    df = read_telemetry(log_path)
+    lat_col = next((c for c in ("lat", "lat_deg") if c in df.columns), None)
+    lon_col = next((c for c in ("lon", "lon_deg") if c in df.columns), None)
+    if lat_col is None or lon_col is None:
+        print("Log must contain 'lat','lon' (or 'lat_deg','lon_deg')")
         return
     plt.figure()
-    plt.plot(df['lon'], df['lat'], marker='.', linewidth=1)
+    plt.plot(df[lon_col], df[lat_col], marker='.', linewidth=1)
     plt.title("Flight Track")
     plt.xlabel("Longitude"); plt.ylabel("Latitude")
     plt.axis('equal'); plt.grid(True)
-    out = csv_path.replace(".csv", "_track.png")
+    base = log_path.rstrip("/\\")
+    out = (base[:-4] if base.endswith(".csv") else base) + "_track.png"
     plt.savefig(out, dpi=160)
     print(f"Saved {out}")
 
@@ -1,12 +1,103 @@
-import rvo2
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Sequence
+from orca_numpy import NumpyOrcaEngine
+
+try:
+    import rvo2
+    BACKEND = "rvo2"
+except ImportError:   # image מינימלי בלי RVO2 מקומפל — אותו ממשק ב-NumPy
+    rvo2 = None
+    BACKEND = "numpy"
+
+PARK_OFFSET = 1e7   # סוכן שעזב "חונה" הרחק מכולם (rvo2 לא תומך בהסרת סוכנים)
+
+class Rvo2OrcaEngine:
+    """
+    סימולטור rvo2 אחד שחי לאורך כל הריצה: סוכנים מתעדכנים במקום (מיקום/מהירות/מהירות רצויה)
+    במקום לבנות סימולטור ולהוסיף את כולם מחדש בכל קריאה.
+    סוכן שעוזב מועבר לחניה (רחוק, neighborDist=0) והסלוט שלו ממוחזר לסוכן הבא שמצטרף.
+    """
+    def __init__(self, radius=3.0, max_speed=10.0, dt=0.1, neighbor_dist=15.0, max_neighbors=10,
+                 time_horizon=2.5, time_horizon_obst=2.5):
+        self.radius, self.max_speed, self.dt = radius, max_speed, dt
+        self.neighbor_dist, self.max_neighbors = neighbor_dist, max_neighbors
+        self.sim = rvo2.PyRVOSimulator(dt, neighborDist=neighbor_dist, maxNeighbors=max_neighbors,
+                                       timeHorizon=time_horizon, timeHorizonObst=time_horizon_obst,
+                                       radius=radius, maxSpeed=max_speed)
+        self._slot: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self):
+        return len(self._slot)
+
+    @property
+    def keys(self) -> List[Hashable]:
+        return list(self._slot)
+
+    def add(self, key: Hashable, pos, vel=(0.0, 0.0)) -> int:
+        if key in self._slot:
+            return self._slot[key]
+        pos, vel = (float(pos[0]), float(pos[1])), (float(vel[0]), float(vel[1]))
+        if self._free:
+            i = self._free.pop()
+            self.sim.setAgentPosition(i, pos)
+            self.sim.setAgentNeighborDist(i, self.neighbor_dist)
+            self.sim.setAgentMaxSpeed(i, self.max_speed)
+        else:
+            i = self.sim.addAgent(pos)
+        self.sim.setAgentVelocity(i, vel)
+        self.sim.setAgentPrefVelocity(i, vel)
+        self._slot[key] = i
+        return i
+
+    def remove(self, key: Hashable):
+        i = self._slot.pop(key, None)
+        if i is None:
+            return
+        # חניה: רחוק, בלי שכנים ובלי תנועה — לא משפיע על אף אחד ולא עולה זמן חישוב
+        self.sim.setAgentPosition(i, (PARK_OFFSET + i * 10 * self.neighbor_dist, PARK_OFFSET))
+        self.sim.setAgentNeighborDist(i, 0.0)
+        self.sim.setAgentMaxSpeed(i, 0.0)
+        self.sim.setAgentVelocity(i, (0.0, 0.0))
+        self.sim.setAgentPrefVelocity(i, (0.0, 0.0))
+        self._free.append(i)
+
+    def sync(self, keys: Sequence[Hashable]):
+        """מיישר את הסוכנים בסימולטור ל-keys: מוסיף חדשים, מחנה את מי שנעלם."""
+        wanted = set(keys)
+        for k in [k for k in self._slot if k not in wanted]:
+            self.remove(k)
+        for k in keys:
+            if k not in self._slot:
+                self.add(k, (0.0, 0.0))
+
+    def step(self, states, keys: Optional[Sequence[Hashable]] = None, pref=None) -> np.ndarray:
+        """
+        states: (n,4) של x,y,vx,vy. keys: מזהה לכל שורה (ברירת מחדל 0..n-1).
+        pref: (n,2) מהירות רצויה (ברירת מחדל: המהירות הנוכחית).
+        מחזיר (n,2) מהירויות בטוחות, באותו סדר.
+        """
+        st = np.asarray(states, dtype=np.float64).reshape(-1, 4)
+        keys = list(range(len(st))) if keys is None else list(keys)
+        self.sync(keys)
+        pv = st[:, 2:4] if pref is None else np.asarray(pref, dtype=np.float64).reshape(-1, 2)
+        sim, slots = self.sim, [self._slot[k] for k in keys]
+        for i, (x, y, vx, vy), (px, py) in zip(slots, st.tolist(), pv.tolist()):
+            sim.setAgentPosition(i, (x, y))
+            sim.setAgentVelocity(i, (vx, vy))
+            sim.setAgentPrefVelocity(i, (px, py))
+        sim.doStep()
+        return np.array([sim.getAgentVelocity(i) for i in slots], dtype=np.float64).reshape(-1, 2)
+
+OrcaEngine = Rvo2OrcaEngine if rvo2 is not None else NumpyOrcaEngine
+
+_ENGINES: Dict[tuple, object] = {}
+
 def orca_velocities(agents, radii=3.0, max_speed=10.0, dt=0.1):
-    # agents: [(x,y,vx,vy), ...]
-    sim = rvo2.PyRVOSimulator(dt, neighborDist=15, maxNeighbors=10,
-                              timeHorizon=2.5, timeHorizonObst=2.5,
-                              radius=radii, maxSpeed=max_speed)
-    idx = [sim.addAgent((x,y)) for (x,y,_,_) in agents]
-    for i,(x,y,vx,vy) in zip(idx, agents):
-        sim.setAgentVelocity(i, (vx,vy))
-        sim.setAgentPrefVelocity(i, (vx,vy))
-    sim.doStep()
-    return [sim.getAgentVelocity(i) for i in idx]
+    # agents: [(x,y,vx,vy), ...] -> np.ndarray (n,2)
+    # מנוע משותף לכל צירוף פרמטרים — נשמר בין קריאות
+    key = (float(radii), float(max_speed), float(dt))
+    eng = _ENGINES.get(key)
+    if eng is None:
+        eng = _ENGINES[key] = OrcaEngine(radius=radii, max_speed=max_speed, dt=dt)
+    return eng.step(agents)
@@ -0,0 +1,174 @@
+# src/swarm/bench_orca.py
+# השוואת ביצועים: בניית סימולטור rvo2 בכל קריאה (המימוש הישן) מול מנוע rvo2 מתמשך ומול ORCA ב-NumPy.
+# תרחיש: N סוכנים על מעגל, כל אחד טס לנקודה הנגדית (הרבה התנגשויות פוטנציאליות במרכז).
+# בדיקות (exit code 1 אם חורגים מהסף):
+#   - תמיד: מרווח מינימלי של NumPy ORCA על חציית המעגל המלאה >= min_sep_frac·2R.
+#     ORCA מאפשר חדירה רגעית כשה-LP לא פתיר (linearProgram3, צפיפות גבוהה) — גם ב-rvo2 — ולכן הסף הוא חסם ולא 2R.
+#   - עם rvo2 מותקן: התאמה NumPy מול rvo2 — |dv| על מצבים אקראיים (חציון/אחוזון 95/מקסימום)
+#     ומרווח מינימלי על אותו תרחיש (NumPy לא גרוע מ-rvo2 ביותר מ-sep_tol).
+# שימוש: python src/swarm/bench_orca.py [--steps 50] [--sizes 3,10,30,100,200] [--check_sizes 10,30,60]
+import argparse, sys, time
+import numpy as np
+
+from orca_numpy import NumpyOrcaEngine
+
+try:
+    import rvo2
+    from avoidance_orca import Rvo2OrcaEngine
+except ImportError:
+    rvo2 = None
+
+def scenario(n, radius_m=None, speed=8.0, seed=0):
+    radius_m = radius_m or max(30.0, 3.0 * n)
+    a = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    pos = radius_m * np.stack([np.cos(a), np.sin(a)], axis=1)
+    # יעד = הנקודה הנגדית בסטייה זוויתית קטנה: סימטריה מושלמת היא deadlock ידוע של ORCA
+    b = a + np.pi + np.random.default_rng(seed).uniform(-0.05, 0.05, n)
+    goal = radius_m * np.stack([np.cos(b), np.sin(b)], axis=1)
+    return pos, goal, speed
+
+def pref_velocity(pos, goal, speed):
+    d = goal - pos
+    dist = np.linalg.norm(d, axis=1, keepdims=True)
+    return d / np.maximum(dist, 1e-9) * np.minimum(speed, dist)
+
+def rebuild_step(states, pref, radii=3.0, max_speed=10.0, dt=0.1):
+    # המימוש הישן: סימולטור חדש + addAgent לכל סוכן בכל קריאה
+    sim = rvo2.PyRVOSimulator(dt, neighborDist=15, maxNeighbors=10, timeHorizon=2.5, timeHorizonObst=2.5,
+                              radius=radii, maxSpeed=max_speed)
+    idx = [sim.addAgent((x, y)) for (x, y, _, _) in states]
+    for i, (x, y, vx, vy), (px, py) in zip(idx, states, pref):
+        sim.setAgentVelocity(i, (vx, vy))
+        sim.setAgentPrefVelocity(i, (px, py))
+    sim.doStep()
+    return np.array([sim.getAgentVelocity(i) for i in idx])
+
+def engine_step(eng):
+    return lambda states, pref: eng.step(states, pref=pref)
+
+def crossing_steps(n, dt=0.1):
+    """מספיק צעדים כדי שכל הסוכנים יחצו את המעגל (קוטר / מהירות, עם מרווח לעקיפות)."""
+    pos, _, speed = scenario(n)
+    return int(1.5 * 2 * np.linalg.norm(pos[0]) / speed / dt)
+
+def run(step_fn, n, steps, dt=0.1):
+    pos, goal, speed = scenario(n)
+    vel = np.zeros_like(pos)
+    t, min_sep = [], np.inf
+    for _ in range(steps):
+        pv = pref_velocity(pos, goal, speed)
+        states = np.hstack([pos, vel])
+        t0 = time.perf_counter()
+        vel = step_fn(states, pv)
+        t.append(time.perf_counter() - t0)
+        pos = pos + np.asarray(vel) * dt
+        if n > 1:
+            d = np.linalg.norm(pos[:, None] - pos[None], axis=-1)
+            np.fill_diagonal(d, np.inf)
+            min_sep = min(min_sep, float(d.min()))
+    return 1e3 * float(np.median(t)), min_sep
+
+def conformance(n=50, trials=20, seed=1):
+    """צעד יחיד על מצבים אקראיים: |v_numpy - v_rvo2| (חציון, אחוזון 95, מקסימום)."""
+    rng = np.random.default_rng(seed)
+    diffs = []
+    for _ in range(trials):
+        side = 6.0 * np.sqrt(n) * 2
+        states = np.hstack([rng.uniform(0, side, (n, 2)), rng.uniform(-8, 8, (n, 2))])
+        pref = rng.uniform(-8, 8, (n, 2))
+        a = Rvo2OrcaEngine().step(states, pref=pref)
+        b = NumpyOrcaEngine().step(states, pref=pref)
+        diffs.append(np.linalg.norm(a - b, axis=1))
+    d = np.concatenate(diffs)
+    return float(np.median(d)), float(np.percentile(d, 95)), float(d.max())
+
+def check_separation(sizes, min_frac, radius=3.0):
+    """NumPy בלבד: חציית מעגל מלאה לכל גודל; כשלונות = [(n, min_sep)] מתחת ל-min_frac·2R."""
+    fails = []
+    print(f"separation check: full crossing, bound {min_frac:.2f}·2R = {min_frac * 2 * radius:.2f} m")
+    for n in sizes:
+        _, sep = run(engine_step(NumpyOrcaEngine(radius=radius)), n, crossing_steps(n))
+        ok = sep >= min_frac * 2 * radius
+        print(f"{n:>7} agents: min sep {sep:.2f} m {'OK' if ok else 'FAIL'}")
+        if not ok:
+            fails.append((n, sep))
+    return fails
+
+def check_conformance(args):
+    """rvo2 מול NumPy: |dv| בתוך הספים, והמרווח של NumPy לא גרוע מ-rvo2 ביותר מ-sep_tol."""
+    fails = []
+    med, p95, mx = conformance()
+    print(f"conformance numpy vs rvo2 |dv| m/s: median {med:.4f} (<= {args.dv_median}), "
+          f"p95 {p95:.4f} (<= {args.dv_p95}), max {mx:.4f} (<= {args.dv_max})")
+    for name, v, tol in (("median", med, args.dv_median), ("p95", p95, args.dv_p95), ("max", mx, args.dv_max)):
+        if v > tol:
+            fails.append(f"|dv| {name} {v:.4f} > {tol}")
+    for n in args.check_sizes:
+        steps = crossing_steps(n)
+        _, sep_rvo = run(engine_step(Rvo2OrcaEngine()), n, steps)
+        _, sep_np = run(engine_step(NumpyOrcaEngine()), n, steps)
+        ok = sep_np >= sep_rvo - args.sep_tol
+        print(f"{n:>7} agents: min sep rvo2 {sep_rvo:.2f} m, numpy {sep_np:.2f} m {'OK' if ok else 'FAIL'}")
+        if not ok:
+            fails.append(f"{n} agents: numpy min sep {sep_np:.2f} < rvo2 {sep_rvo:.2f} - {args.sep_tol}")
+    return fails
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--steps", type=int, default=50)
+    ap.add_argument("--sizes", default="3,10,30,100,200")
+    ap.add_argument("--check_sizes", default="10,30,60", help="agents for the full-crossing separation checks")
+    ap.add_argument("--min_sep_frac", type=float, default=0.75, help="min separation bound, fraction of 2R")
+    ap.add_argument("--dv_median", type=float, default=1e-3, help="conformance: max median |dv| (m/s)")
+    ap.add_argument("--dv_p95", type=float, default=0.05, help="conformance: max p95 |dv| (m/s)")
+    ap.add_argument("--dv_max", type=float, default=1.0, help="conformance: max |dv| (m/s)")
+    ap.add_argument("--sep_tol", type=float, default=0.5, help="conformance: numpy min sep may trail rvo2 by (m)")
+    ap.add_argument("--no_check", action="store_true", help="timings only")
+    args = ap.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    args.check_sizes = [int(s) for s in args.check_sizes.split(",")]
+    fails = []
+    print("(ms per step; min sep = minimal pairwise distance along the run, 2R = 6 m)")
+    if rvo2 is None:
+        print("[!] rvo2 not installed — NumPy backend only")
+        print(f"{'agents':>7} {'numpy ms':>9} {'min sep':>8}")
+        for n in sizes:
+            t_np, sep_np = run(engine_step(NumpyOrcaEngine()), n, args.steps)
+            print(f"{n:>7} {t_np:>9.3f} {sep_np:>8.2f}")
+        if not args.no_check:
+            fails += [f"{n} agents: numpy min sep {sep:.2f} m" for n, sep in
+                      check_separation(args.check_sizes, args.min_sep_frac)]
+        finish(fails)
+        return
+
+    print(f"{'agents':>7} {'rebuild ms':>11} {'engine ms':>10} {'speedup':>8} {'numpy ms':>9} "
+          f"{'sep rvo2':>9} {'sep numpy':>10}")
+    for n in sizes:
+        t_old, _ = run(rebuild_step, n, args.steps)
+        t_new, sep_new = run(engine_step(Rvo2OrcaEngine()), n, args.steps)
+        t_np, sep_np = run(engine_step(NumpyOrcaEngine()), n, args.steps)
+        print(f"{n:>7} {t_old:>11.3f} {t_new:>10.3f} {t_old / max(t_new, 1e-9):>7.1f}x {t_np:>9.3f} "
+              f"{sep_new:>9.2f} {sep_np:>10.2f}")
+
+    # join/leave: חצי מהסוכנים מתחלפים כל צעד — הסלוטים ממוחזרים, הסימולטור לא גדל ללא גבול
+    eng = Rvo2OrcaEngine()
+    pos, goal, speed = scenario(100)
+    for k in range(20):
+        keys = [(k % 2) * 1000 + i if i % 2 else i for i in range(100)]
+        eng.step(np.hstack([pos, pref_velocity(pos, goal, speed)]), keys=keys)
+    print(f"join/leave: {len(eng)} active agents, {eng.sim.getNumAgents()} slots in simulator")
+
+    if not args.no_check:
+        fails += [f"{n} agents: numpy min sep {sep:.2f} m" for n, sep in
+                  check_separation(args.check_sizes, args.min_sep_frac)]
+        fails += check_conformance(args)
+    finish(fails)
+
+def finish(fails):
+    if fails:
+        print("[FAIL] " + "; ".join(fails))
+        sys.exit(1)
+    print("[OK] all checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# src/swarm/connections.py
+# מנהל חיבורים לנחיל: סריקת טווח פורטים במקביל (כל פורט עם mavsdk_server משלו ו-timeout),
+# זיהוי כל רכב לפי MAV_SYS_ID, רישום של handles מוכנים, וחיבור מחדש אוטומטי עם backoff.
+# במקום N x timeout בטור (ו-connection_state שיכול לחכות לנצח) — timeout אחד לכל הסריקה.
+import asyncio, random, time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from mavsdk import System
+
+PORTS = [14540 + i for i in range(10)]
+SERVER_PORT_BASE = 50051
+PROBE_TIMEOUT = 10.0
+
+@dataclass
+class Vehicle:
+    sysid: int
+    port: int                      # פורט ה-MAVLink (udp://:port)
+    server_port: int               # פורט ה-mavsdk_server של ה-handle
+    drone: System
+    ready: bool = True
+    changed: float = field(default_factory=time.monotonic)   # מתי ready השתנה לאחרונה
+    reconnects: int = 0
+
+    @property
+    def url(self) -> str:
+        return f"udp://:{self.port}"
+
+    def set_ready(self, ready: bool):
+        if ready != self.ready:
+            self.ready, self.changed = ready, time.monotonic()
+            print(f"[{'+' if ready else '!'}] sysid {self.sysid} ({self.url}) {'connected' if ready else 'lost'}")
+
+def _release(drone: System):
+    # עוצר את ה-mavsdk_server של handle שלא בשימוש (אחרת התהליך נשאר תופס פורט)
+    stop = getattr(drone, "_stop_mavsdk_server", None)
+    if stop:
+        try:
+            stop()
+        except Exception:
+            pass
+
+async def probe(port: int, server_port: int, timeout: float = PROBE_TIMEOUT) -> Optional[Vehicle]:
+    """
+    מתחבר ל-udp://:port; מחזיר Vehicle אם נמצא רכב בתוך timeout, אחרת None (וה-server משוחרר).
+    timeout אחד לכל ה-probe: קריאת MAV_SYS_ID מקבלת רק את מה שנשאר אחרי החיבור.
+    """
+    drone = System(port=server_port)
+    deadline = time.monotonic() + timeout
+
+    async def connect():
+        await drone.connect(system_address=f"udp://:{port}")
+        async for s in drone.core.connection_state():
+            if s.is_connected:
+                return
+    try:
+        await asyncio.wait_for(connect(), timeout=timeout)
+    except Exception:
+        _release(drone)
+        return None
+    try:
+        sysid = await asyncio.wait_for(drone.param.get_param_int("MAV_SYS_ID"),
+                                       timeout=max(0.0, deadline - time.monotonic()))
+    except Exception:
+        sysid = port - PORTS[0] + 1   # אין פרמטר (FW ישן/ללא param) — לפי סדר הפורט, כמו ב-SITL
+    return Vehicle(int(sysid), port, server_port, drone)
+
+class ConnectionManager:
+    """
+    registry: sysid -> Vehicle. discover() סורק את כל הפורטים במקביל;
+    start_supervision() מריץ לכל רכב משימה שמנטרת connection_state ומחברת מחדש עם backoff
+    (exponential + jitter) אם החיבור אבד ליותר מ-stale_s או שהזרם נסגר.
+    """
+    def __init__(self, ports: Sequence[int] = PORTS, timeout: float = PROBE_TIMEOUT,
+                 server_port_base: int = SERVER_PORT_BASE, stale_s: float = 10.0,
+                 backoff_min: float = 1.0, backoff_max: float = 30.0):
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.server_port_base = server_port_base
+        self.stale_s, self.backoff_min, self.backoff_max = stale_s, backoff_min, backoff_max
+        self.registry: Dict[int, Vehicle] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def _server_port(self, port: int) -> int:
+        return self.server_port_base + self.ports.index(port)
+
+    async def discover(self) -> Dict[int, Vehicle]:
+        t0 = time.monotonic()
+        found = await asyncio.gather(*(probe(p, self._server_port(p), self.timeout) for p in self.ports))
+        for v in sorted((v for v in found if v is not None), key=lambda v: v.port):
+            if v.sysid in self.registry:
+                print(f"[!] Duplicate sysid {v.sysid} on {v.url} (already on {self.registry[v.sysid].url}) — ignored")
+                _release(v.drone)
+                continue
+            self.registry[v.sysid] = v
+        print(f"[*] Discovered {len(self.registry)} vehicle(s) in {time.monotonic() - t0:.1f}s: "
+              + ", ".join(f"sysid {v.sysid}@{v.port}" for v in self.registry.values()))
+        return self.registry
+
+    def ready(self) -> List[Vehicle]:
+        return [v for v in sorted(self.registry.values(), key=lambda v: v.sysid) if v.ready]
+
+    def get(self, sysid: int) -> Optional[System]:
+        v = self.registry.get(sysid)
+        return v.drone if v is not None and v.ready else None
+
+    def start_supervision(self):
+        self._tasks = [asyncio.create_task(self._supervise(v)) for v in self.registry.values()]
+
+    async def _watch(self, v: Vehicle):
+        async for s in v.drone.core.connection_state():
+            v.set_ready(s.is_connected)
+
+    async def _supervise(self, v: Vehicle):
+        backoff = self.backoff_min
+        while True:
+            watch = asyncio.create_task(self._watch(v))
+            # mavsdk_server מתחבר מחדש לבד כשהרכב חוזר; מתערבים רק אם הזרם נגמר או שהניתוק ארוך
+            while not watch.done() and (v.ready or time.monotonic() - v.changed < self.stale_s):
+                await asyncio.sleep(0.5)
+            watch.cancel()
+            v.set_ready(False)
+            while True:
+                await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+                _release(v.drone)
+                new = await probe(v.port, v.server_port, self.timeout)
+                if new is not None and new.sysid == v.sysid:
+                    v.drone, v.reconnects = new.drone, v.reconnects + 1
+                    v.set_ready(True)
+                    backoff = self.backoff_min
+                    break
+                if new is not None:
+                    _release(new.drone)
+                backoff = min(2 * backoff, self.backoff_max)
+                print(f"[!] sysid {v.sysid}: reconnect failed, retry in ~{backoff:.0f}s")
+
+    async def close(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for v in self.registry.values():
+            _release(v.drone)
+
+async def connect_first(ports: Sequence[int] = PORTS, timeout: float = PROBE_TIMEOUT) -> System:
+    """הרכב הראשון (sysid הנמוך) מסריקה מקבילה; השאר משוחררים."""
+    mgr = ConnectionManager(ports, timeout)
+    reg = await mgr.discover()
+    if not reg:
+        raise RuntimeError(f"No PX4 found on {ports[0]}-{ports[-1]}")
+    first = min(reg)
+    for sysid, v in reg.items():
+        if sysid != first:
+            _release(v.drone)
+    print(f"Connected on {reg[first].url} (sysid {first})")
+    return reg[first].drone
+
+if __name__ == "__main__":
+    async def _main():
+        mgr = ConnectionManager()
+        await mgr.discover()
+        mgr.start_supervision()
+        try:
+            while True:
+                await asyncio.sleep(5)
+                print("ready:", [f"{v.sysid}@{v.port}" for v in mgr.ready()])
+        finally:
+            await mgr.close()
+    asyncio.run(_main())
@@ -1,61 +1,216 @@
-import asyncio, math
+import asyncio, math, sys, time
 from dataclasses import dataclass
-from typing import List, Tuple
+from pathlib import Path
+from typing import List, Optional, Tuple
 from mavsdk import System
+from mavsdk.offboard import OffboardError, VelocityNedYaw
 import numpy as np
+from orchestrator import bring_up, land_all, report
+
+# src/ ב-PYTHONPATH בשביל missions.geodesy (מסגרת משותפת מה-home של כל רכב)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from missions.geodesy import geodetic_to_ned  # noqa: E402
 
 @dataclass
 class AgentCfg:
     conn: str
-    offset_ned: Tuple[float, float, float]  # (N,E,D) יחסית למנהיג
+    offset_ned: Tuple[float, float, float]  # (קדימה, ימינה, מטה) בגוף המנהיג — מסתובב עם כיוון הטיסה שלו
 
 TAKEOFF_ALT = 20.0
 CRUISE_SPEED = 8.0
 STEP_HZ = 10.0
 
-async def connect(conn: str) -> System:
-    d = System()
-    await d.connect(system_address=conn)
-    async for s in d.core.connection_state():
-        if s.is_connected:
-            print(f"[+] Connected {conn}")
-            break
-    return d
-
-async def arm_takeoff(drone: System, alt=TAKEOFF_ALT):
-    print("[ACTION] arm & takeoff")
-    await drone.action.arm()
-    await drone.action.set_maximum_speed(CRUISE_SPEED)
-    await drone.action.takeoff()
-    await asyncio.sleep(5)
-
-async def goto_rel(drone: System, n: float, e: float, d_alt: float):
-    # שליחת setpoint מהירות לכיוון היעד (פשטני אך יעיל בסימולציה)
-    # אפשר לשדרג ל-offboard position בפועל.
-    await drone.action.goto_location_relative(n, e, d_alt, 0.0)
-
-async def leader_patrol(drone: System, radius_m=60.0):
-    # מסלול מעגלי איטי – המנהיג "מסייר"
-    t = 0.0
+KP = 0.8                 # רווח P על שגיאת המיקום (1/s)
+MAX_VZ = 2.0             # מהירות אנכית מקסימלית (m/s)
+HEADING_MIN_SPEED = 1.0  # מתחת למהירות הזו כיוון המנהיג = heading מהמצפן, מעליה = כיוון התנועה
+
+class VehicleState:
+    """המצב האחרון של רכב במסגרת NED משותפת (מקור = home של המנהיג), מתעדכן מזרמי MAVSDK ברקע."""
+    def __init__(self, drone: System, origin_ned=(0.0, 0.0, 0.0)):
+        self.drone = drone
+        self.origin = np.asarray(origin_ned, dtype=np.float64)   # home של הרכב במסגרת המשותפת
+        self.pos = np.full(3, np.nan)
+        self.vel = np.zeros(3)
+        self.heading_deg = 0.0
+        self.stamp = 0.0
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, rate_hz: float):
+        try:
+            await self.drone.telemetry.set_rate_position_velocity_ned(rate_hz)
+        except Exception:
+            pass
+        self._tasks = [asyncio.create_task(self._pv()), asyncio.create_task(self._heading())]
+
+    async def _pv(self):
+        async for pv in self.drone.telemetry.position_velocity_ned():
+            p, v = pv.position, pv.velocity
+            self.pos = self.origin + (p.north_m, p.east_m, p.down_m)
+            self.vel = np.array([v.north_m_s, v.east_m_s, v.down_m_s])
+            self.stamp = time.monotonic()
+
+    async def _heading(self):
+        async for h in self.drone.telemetry.heading():
+            self.heading_deg = h.heading_deg
+
+    def course_rad(self) -> float:
+        if math.hypot(self.vel[0], self.vel[1]) >= HEADING_MIN_SPEED:
+            return math.atan2(self.vel[1], self.vel[0])
+        return math.radians(self.heading_deg)
+
+    def stop(self):
+        for t in self._tasks:
+            t.cancel()
+
+async def home_origins(drones: List[System]) -> np.ndarray:
+    """(n,3) מיקום ה-home של כל רכב ב-NED של ה-home של הרכב הראשון (דרך geodesy)."""
+    async def home(d):
+        async for h in d.telemetry.home():
+            return h.latitude_deg, h.longitude_deg, h.absolute_altitude_m
+    homes = np.array(await asyncio.gather(*(home(d) for d in drones)))
+    lat0, lon0, alt0 = homes[0]
+    n, e, dd = geodetic_to_ned(lat0, lon0, alt0, homes[:, 0], homes[:, 1], homes[:, 2])
+    return np.stack([n, e, dd], axis=1)
+
+def formation_commands(leader_pos, leader_vel, leader_course, offsets, follower_pos,
+                       kp=KP, max_speed=CRUISE_SPEED, max_vz=MAX_VZ, turn_rate=0.0):
+    """
+    וקטורי על כל העוקבים: יעד = מנהיג + R(course)·offset (offset בגוף המנהיג: קדימה/ימינה/מטה),
+    פקודה = feed-forward (מהירות המנהיג + ω×offset בפנייה) + kp·שגיאה, עם חסימת מהירות.
+    מחזיר (cmd (F,3), err (F,)).
+    """
+    c, s = math.cos(leader_course), math.sin(leader_course)
+    rot = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+    rel = offsets @ rot.T
+    target = leader_pos + rel
+    err = target - follower_pos
+    spin = turn_rate * np.stack([-rel[:, 1], rel[:, 0], np.zeros(len(rel))], axis=1)
+    cmd = leader_vel + spin + kp * err
+    h = np.hypot(cmd[:, 0], cmd[:, 1])
+    scale = np.minimum(1.0, max_speed / np.maximum(h, 1e-9))
+    cmd[:, :2] *= scale[:, None]
+    cmd[:, 2] = np.clip(cmd[:, 2], -max_vz, max_vz)
+    return cmd, np.linalg.norm(err, axis=1)
+
+class RateLoop:
+    """לולאה בקצב קבוע לפי דדליינים מוחלטים (בלי הצטברות סחיפה); רושם jitter לכל מחזור."""
+    def __init__(self, hz: float):
+        self.period = 1.0 / hz
+        self.jitter: List[float] = []
+        self.overruns = 0
+        self._next: Optional[float] = None
+
+    async def tick(self):
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        now = time.monotonic()
+        self.jitter.append(now - self._next)
+        self._next += self.period
+        if now > self._next:          # פספסנו מחזור שלם — ממשיכים מעכשיו, בלי "השלמות"
+            self.overruns += 1
+            self._next = now + self.period
+
+def _pct(xs, q):
+    return 1e3 * float(np.percentile(xs, q)) if len(xs) else float("nan")
+
+class FormationController:
+    """
+    Leader-follower: המנהיג טס בעצמו (משימה/offboard), העוקבים ב-offboard velocity.
+    כל מחזור: מצב המנהיג -> פקודות לכל העוקבים (וקטורי) -> שליחה במקביל; נמדדים jitter, latency ושגיאת מבנה.
+    """
+    def __init__(self, leader: System, followers: List[System], offsets_ned, hz: float = STEP_HZ,
+                 kp: float = KP, max_speed: float = CRUISE_SPEED):
+        self.leader, self.followers = leader, list(followers)
+        self.offsets = np.asarray(offsets_ned, dtype=np.float64).reshape(-1, 3)
+        self.hz, self.kp, self.max_speed = hz, kp, max_speed
+        self.states: List[VehicleState] = []
+        self.latency: List[float] = []
+        self.errors: List[np.ndarray] = []
+        self.loop = RateLoop(hz)
+
+    async def setup(self):
+        drones = [self.leader] + self.followers
+        origins = await home_origins(drones)
+        self.states = [VehicleState(d, o) for d, o in zip(drones, origins)]
+        await asyncio.gather(*(st.start(2 * self.hz) for st in self.states))
+        while any(np.isnan(st.pos).any() for st in self.states):
+            await asyncio.sleep(0.05)
+
+        async def start_offboard(d: System):
+            await d.offboard.set_velocity_ned(VelocityNedYaw(0.0, 0.0, 0.0, 0.0))  # setpoint לפני start
+            await d.offboard.start()
+        await asyncio.gather(*(start_offboard(d) for d in self.followers))
+
+    async def _send(self, d: System, v, yaw_deg: float):
+        t0 = time.monotonic()
+        await d.offboard.set_velocity_ned(VelocityNedYaw(float(v[0]), float(v[1]), float(v[2]), yaw_deg))
+        return time.monotonic() - t0
+
+    async def run(self, duration_s: Optional[float] = None, report_every_s: float = 5.0):
+        t_end = None if duration_s is None else time.monotonic() + duration_s
+        t_report = time.monotonic() + report_every_s
+        lead, fol = self.states[0], self.states[1:]
+        prev_course, turn_rate = None, 0.0
+        while t_end is None or time.monotonic() < t_end:
+            await self.loop.tick()
+            course = lead.course_rad()
+            if prev_course is not None:
+                # קצב הפנייה של המנהיג (מסונן) — feed-forward לסיבוב המבנה
+                d = (course - prev_course + math.pi) % (2 * math.pi) - math.pi
+                turn_rate += 0.2 * (d * self.hz - turn_rate)
+            prev_course = course
+            cmd, err = formation_commands(lead.pos, lead.vel, course, self.offsets,
+                                          np.array([f.pos for f in fol]).reshape(-1, 3), self.kp, self.max_speed,
+                                          turn_rate=turn_rate)
+            yaw = math.degrees(course) % 360.0
+            lat = await asyncio.gather(*(self._send(f.drone, v, yaw) for f, v in zip(fol, cmd)),
+                                       return_exceptions=True)
+            self.latency.extend(x for x in lat if isinstance(x, float))
+            self.errors.append(err)
+            if time.monotonic() >= t_report:
+                print(self.summary())
+                t_report += report_every_s
+
+    def summary(self) -> str:
+        err = np.concatenate(self.errors[-int(5 * self.hz):]) if self.errors else np.array([])
+        return (f"[FORM] {self.hz:.0f}Hz jitter p50/p95/max {_pct(self.loop.jitter, 50):.1f}/"
+                f"{_pct(self.loop.jitter, 95):.1f}/{_pct(self.loop.jitter, 100):.1f} ms, "
+                f"overruns {self.loop.overruns} | "
+                f"cmd latency p95 {_pct(self.latency, 95):.1f} ms | "
+                f"formation err mean/max {np.mean(err) if len(err) else float('nan'):.2f}/"
+                f"{np.max(err) if len(err) else float('nan'):.2f} m")
+
+    async def stop(self):
+        async def stop_offboard(d: System):
+            try:
+                await d.offboard.stop()
+            except OffboardError:
+                pass
+        await asyncio.gather(*(stop_offboard(d) for d in self.followers))
+        for st in self.states:
+            st.stop()
+
+async def leader_patrol(state: VehicleState, radius_m=60.0, speed=4.0, hz=STEP_HZ):
+    # מסלול מעגלי איטי – המנהיג "מסייר" ב-offboard velocity: משיקי + תיקון רדיאלי לרדיוס.
+    # state = מצב המנהיג של FormationController (אחרי setup) — בלי מינוי נוסף לזרמי הטלמטריה
+    drone = state.drone
+    center = state.pos[:2] - np.array([radius_m, 0.0])
+    await drone.offboard.set_velocity_ned(VelocityNedYaw(0.0, 0.0, 0.0, 0.0))
+    await drone.offboard.start()
+    loop = RateLoop(hz)
     while True:
-        n = radius_m * math.sin(t)
-        e = radius_m * math.cos(t)
-        await goto_rel(drone, n, e, TAKEOFF_ALT)
-        await asyncio.sleep(1.0/STEP_HZ)
-        t += 0.03
-
-async def follower_track(drone: System, leader: System, offset_ned: Tuple[float,float,float]):
-    # עוקב אחרי המנהיג עם היסט NED קבועה (Virtual Structure פשוט)
-    on, oe, od = offset_ned
-    async for lp in leader.telemetry.position_velocity_ned():
-        # NED של המנהיג יחסית ל-home (בקירוב)
-        n = -lp.velocity.down_m_s * 0.0  # לא מדויק – נעדכן למצב אמיתי אם נרצה
-        # במקום לזה, ניקח את מיקום ה-GPS היחסי (פשטני בסיממס):
-        # לשם הדוגמה, נחשב מיקום יחסי מעגלי כמו בפונקציית leader.
-        # בפועל: קרא position() של המנהיג ושמור origin להמרה ל-NED.
-        # כאן נשמור קירוב: נעביר את היסט ה-offset כפקודת goto יחסית.
-        await goto_rel(drone, on, oe, TAKEOFF_ALT)  # "דבוק" למנהיג
-        await asyncio.sleep(1.0/STEP_HZ)
+        await loop.tick()
+        r = state.pos[:2] - center
+        dist = max(np.linalg.norm(r), 1e-6)
+        radial = r / dist
+        tangent = np.array([-radial[1], radial[0]])
+        v = speed * tangent + KP * (radius_m - dist) * radial
+        yaw = math.degrees(math.atan2(v[1], v[0])) % 360.0
+        await drone.offboard.set_velocity_ned(VelocityNedYaw(float(v[0]), float(v[1]), 0.0, yaw))
 
 async def main():
     # שלושה כלים: מנהיג + שני עוקבים בצורת V
@@ -64,16 +219,20 @@ async def main():
         AgentCfg("udp://:14541", (-15.0, -10.0, 0.0)),   # left wing
         AgentCfg("udp://:14542", (-15.0, +10.0, 0.0)),   # right wing
     ]
-    drones: List[System] = [await connect(c.conn) for c in cfgs]
+    # connect/health/arm/takeoff לכולם במקביל (כל רכב עם mavsdk_server משלו)
+    statuses = await bring_up([c.conn for c in cfgs], TAKEOFF_ALT, max_speed=CRUISE_SPEED)
+    print(report(statuses))
+    if not statuses[0].ok:
+        print("[!] Leader failed to come up — aborting")
+        await land_all(statuses)
+        return
 
-    # המראה לכולם (אפשר בטור כדי להימנע מעומס)
-    for d in drones:
-        await arm_takeoff(d, TAKEOFF_ALT)
-
-    leader = drones[0]
-    tasks = [asyncio.create_task(leader_patrol(leader))]
-    for d, c in zip(drones[1:], cfgs[1:]):
-        tasks.append(asyncio.create_task(follower_track(d, leader, c.offset_ned)))
+    leader = statuses[0].drone
+    # עוקב שנכשל פשוט לא משתתף
+    pairs = [(st.drone, c.offset_ned) for st, c in zip(statuses[1:], cfgs[1:]) if st.ok]
+    formation = FormationController(leader, [d for d, _ in pairs], [o for _, o in pairs])
+    await formation.setup()
+    tasks = [asyncio.create_task(leader_patrol(formation.states[0])), asyncio.create_task(formation.run())]
 
     # לרוץ עד Ctrl+C
     try:
@@ -81,10 +240,11 @@ async def main():
     except asyncio.CancelledError:
         pass
     finally:
-        for d in drones:
-            try:
-                await d.action.return_to_launch()
-            except: pass
+        for t in tasks:
+            t.cancel()
+        print(formation.summary())
+        await formation.stop()
+        await land_all(statuses)
 
 if __name__ == "__main__":
     asyncio.run(main())
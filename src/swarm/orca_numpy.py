@@ -0,0 +1,259 @@
+# src/swarm/orca_numpy.py
+# ORCA (Reciprocal n-body Collision Avoidance) ב-NumPy בלבד — גיבוי כש-rvo2 לא מותקן.
+# אותו אלגוריתם כמו RVO2 (קווי ORCA + linearProgram 1/2/3), בלי מכשולים סטטיים:
+#   - שכנים: grid hash בתאים בגודל neighbor_dist => 9 תאים לכל סוכן, O(n·k) במקום O(n²);
+#     בלוק צפוף מדי עובר לרשת עדינה יותר (ראו neighbors), כך שגם צביר בתא אחד לא הופך ל-O(n²)
+#   - קווי ORCA לכל הזוגות (n, k) בבת אחת
+#   - LP דו-ממדי אינקרמנטלי: הלולאה על אינדקס הקו (k <= max_neighbors), וקטורי על כל הסוכנים
+#   - linearProgram3 (מצב לא פתיר, צפיפות גבוהה) רץ רק לסוכנים שנכשלו
+import numpy as np
+from typing import Hashable, Optional, Sequence
+
+EPS = 1e-5
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def _knn_block(pos, q, rho, k, cap):
+    """
+    שכני q מתוך בלוק 3x3 תאים בגודל rho. מחזיר (idx (len(q), k), d2 (len(q), k), done, over):
+    done = התשובה מדויקת (לפחות k בטווח rho, או rho הוא הטווח המלא); over = הבלוק מעל cap מועמדים.
+    """
+    n = len(pos)
+    cell = np.floor(pos / rho).astype(np.int64)
+    cell -= cell.min(axis=0)
+    width = int(cell[:, 1].max()) + 3
+    key = (cell[:, 0] + 1) * width + (cell[:, 1] + 1)
+    order = np.argsort(key, kind="stable")
+    skey = key[order]
+
+    off = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    nkey = (cell[q, None, 0] + 1 + off[:, 0]) * width + (cell[q, None, 1] + 1 + off[:, 1])   # (q, 9)
+    start = np.searchsorted(skey, nkey, side="left")
+    cnt = np.searchsorted(skey, nkey, side="right") - start
+    over = cnt.sum(1) > cap
+    idx = np.full((len(q), k), -1, dtype=np.int64)
+    d2k = np.full((len(q), k), np.inf)
+    ok_q = np.nonzero(~over)[0]
+    if len(ok_q):
+        # הממד m חסום ב-cap: בלוק מלא מדי לא נכנס לטנזור
+        m = int(cnt[ok_q].max())
+        slot = np.arange(m)
+        ok = slot < cnt[ok_q, :, None]                                                      # (q', 9, m)
+        cand = np.where(ok, order[np.minimum(start[ok_q, :, None] + slot, n - 1)], -1).reshape(len(ok_q), -1)
+        qi = q[ok_q]
+        d2 = ((pos[np.maximum(cand, 0)] - pos[qi, None]) ** 2).sum(-1)
+        d2 = np.where((cand >= 0) & (cand != qi[:, None]) & (d2 < rho * rho), d2, np.inf)
+        idx[ok_q], d2k[ok_q] = _take_k(cand, d2, k)
+    found = np.isfinite(d2k).sum(1)
+    return idx, d2k, ~over & (found >= k), over
+
+def _take_k(cand, d2, k):
+    """k המועמדים הקרובים בכל שורה, ממוינים; inf => -1."""
+    kk = min(k, d2.shape[1])
+    sel = np.argpartition(d2, kk - 1, axis=1)[:, :kk] if kk < d2.shape[1] else np.tile(np.arange(kk), (len(d2), 1))
+    dk = np.take_along_axis(d2, sel, axis=1)
+    srt = np.argsort(dk, axis=1, kind="stable")
+    sel, dk = np.take_along_axis(sel, srt, axis=1), np.take_along_axis(dk, srt, axis=1)
+    idx = np.where(np.isfinite(dk), np.take_along_axis(cand, sel, axis=1), -1)
+    if kk < k:
+        pad = k - kk
+        idx = np.hstack([idx, np.full((len(idx), pad), -1, dtype=np.int64)])
+        dk = np.hstack([dk, np.full((len(dk), pad), np.inf)])
+    return idx, dk
+
+def neighbors(pos: np.ndarray, neighbor_dist: float, max_neighbors: int, cap: Optional[int] = None,
+              max_levels: int = 12) -> np.ndarray:
+    """
+    (n, k) אינדקסי השכנים הקרובים ביותר בטווח (ממוינים לפי מרחק), -1 = אין.
+    לכל סוכן נבדק בלוק 3x3 תאים; בלוק עם יותר מ-cap מועמדים (צביר צפוף) לא נפרש לטנזור
+    אלא עובר לרשת עדינה פי 2 — שם מספיקים k שכנים בטווח rho כדי שהתשובה תהיה מדויקת.
+    כך העלות O(n·cap) גם כשרוב הסוכנים באותו תא. סוכנים שאין להם k שכנים ברשת העדינה
+    אבל הבלוק הגס מלא מדי (פיזור קיצוני, או נקודות חופפות) — חיפוש ישיר במנות, זיכרון חסום.
+    """
+    n = len(pos)
+    k = max(0, min(int(max_neighbors), n - 1))
+    if k == 0:
+        return np.full((n, 0), -1, dtype=np.int64)
+    cap = max(64, 16 * k) if cap is None else max(int(cap), k)
+    out = np.full((n, k), -1, dtype=np.int64)
+    todo, rho = np.arange(n), float(neighbor_dist)
+    for level in range(max_levels):
+        idx, _, done, over = _knn_block(pos, todo, rho, k, cap)
+        if level == 0:
+            done = ~over            # בטווח המלא כל תשובה מהבלוק מדויקת, גם עם פחות מ-k שכנים
+        out[todo[done]] = idx[done]
+        # פחות מ-k בטווח rho<הטווח המלא בלי גלישה: התשובה מעבר ל-rho => ישיר
+        brute = todo[~done & ~over]
+        if len(brute):
+            out[brute] = _knn_direct(pos, brute, neighbor_dist, k)
+        todo, rho = todo[over], rho / 2.0
+        if len(todo) == 0:
+            return out
+    out[todo] = _knn_direct(pos, todo, neighbor_dist, k)
+    return out
+
+def _knn_direct(pos, q, neighbor_dist, k, chunk_elems=1 << 20):
+    """חיפוש ישיר מול כל הסוכנים, במנות של עד chunk_elems מרחקים."""
+    n = len(pos)
+    out = np.empty((len(q), k), dtype=np.int64)
+    step = max(1, chunk_elems // n)
+    allidx = np.arange(n)
+    for s in range(0, len(q), step):
+        qi = q[s:s + step]
+        d2 = ((pos[None] - pos[qi, None]) ** 2).sum(-1)
+        d2 = np.where((allidx[None] != qi[:, None]) & (d2 < neighbor_dist ** 2), d2, np.inf)
+        out[s:s + step] = _take_k(np.broadcast_to(allidx, d2.shape), d2, k)[0]
+    return out
+
+def orca_lines(pos, vel, nbr, radius, time_horizon, dt):
+    """קווי ORCA (point, direction) לכל (סוכן, שכן) — (n, k, 2) כל אחד; valid = nbr >= 0."""
+    valid = nbr >= 0
+    j = np.maximum(nbr, 0)
+    rel_p = pos[j] - pos[:, None]
+    rel_v = vel[:, None] - vel[j]
+    dist2 = (rel_p ** 2).sum(-1)
+    R = 2.0 * radius
+    R2 = R * R
+    inv_tau = 1.0 / time_horizon
+
+    # ללא התנגשות: היטל על מעגל החיתוך או על אחת הרגליים של ה-VO
+    w = rel_v - inv_tau * rel_p
+    w2 = (w ** 2).sum(-1)
+    dot1 = (w * rel_p).sum(-1)
+    wl = np.sqrt(w2)
+    uw = w / np.maximum(wl, 1e-12)[..., None]
+    dir_cut = np.stack([uw[..., 1], -uw[..., 0]], -1)
+    u_cut = (R * inv_tau - wl)[..., None] * uw
+
+    leg = np.sqrt(np.maximum(dist2 - R2, 0.0))
+    px, py = rel_p[..., 0], rel_p[..., 1]
+    d2s = np.maximum(dist2, 1e-12)
+    dir_left = np.stack([px * leg - py * R, px * R + py * leg], -1) / d2s[..., None]
+    dir_right = -np.stack([px * leg + py * R, -px * R + py * leg], -1) / d2s[..., None]
+    dir_leg = np.where((_cross(rel_p, w) > 0)[..., None], dir_left, dir_right)
+    u_leg = (rel_v * dir_leg).sum(-1)[..., None] * dir_leg - rel_v
+
+    # התנגשות: היטל על מעגל החיתוך של צעד זמן אחד
+    inv_dt = 1.0 / dt
+    wc = rel_v - inv_dt * rel_p
+    wcl = np.sqrt((wc ** 2).sum(-1))
+    uwc = wc / np.maximum(wcl, 1e-12)[..., None]
+    dir_col = np.stack([uwc[..., 1], -uwc[..., 0]], -1)
+    u_col = (R * inv_dt - wcl)[..., None] * uwc
+
+    coll = (dist2 <= R2)[..., None]
+    cut = ((dot1 < 0) & (dot1 * dot1 > R2 * w2))[..., None]
+    direction = np.where(coll, dir_col, np.where(cut, dir_cut, dir_leg))
+    u = np.where(coll, u_col, np.where(cut, u_cut, u_leg))
+    point = vel[:, None] + 0.5 * u
+    return point, direction, valid
+
+def _lp1(P, D, valid, k, radius, opt, dir_opt):
+    """linearProgram1 וקטורי: אופטימום על קו k של כל שורה, תחת הקווים 0..k-1. מחזיר (ok, result)."""
+    rows = np.arange(len(P))
+    p, d = P[rows, k], D[rows, k]
+    dot = (p * d).sum(-1)
+    disc = dot * dot + radius * radius - (p * p).sum(-1)
+    ok = disc >= 0
+    s = np.sqrt(np.maximum(disc, 0.0))
+    t_left, t_right = -dot - s, -dot + s
+
+    prev = valid & (np.arange(P.shape[1])[None] < k[:, None])
+    denom = _cross(d[:, None], D)
+    numer = _cross(D, p[:, None] - P)
+    par = np.abs(denom) <= EPS
+    ok &= ~(prev & par & (numer < 0)).any(1)
+    t = numer / np.where(par, 1.0, denom)
+    use = prev & ~par
+    t_right = np.minimum(t_right, np.where(use & (denom >= 0), t, np.inf).min(1))
+    t_left = np.maximum(t_left, np.where(use & (denom < 0), t, -np.inf).max(1))
+    ok &= t_left <= t_right
+
+    if dir_opt:
+        tt = np.where((opt * d).sum(-1) > 0, t_right, t_left)
+    else:
+        tt = np.minimum(np.maximum((d * (opt - p)).sum(-1), t_left), t_right)
+    return ok, p + tt[:, None] * d
+
+def _lp2(P, D, valid, radius, opt, dir_opt):
+    """linearProgram2 וקטורי. מחזיר (result, fail) — fail = אינדקס הקו שנכשל, או K אם הצליח."""
+    B, K = valid.shape
+    if dir_opt:
+        res = opt * radius
+    else:
+        n2 = (opt ** 2).sum(-1)
+        res = np.where((n2 > radius * radius)[:, None], opt / np.sqrt(np.maximum(n2, 1e-24))[:, None] * radius, opt)
+    fail = np.full(B, K)
+    for k in range(K):
+        act = valid[:, k] & (fail == K) & (_cross(D[:, k], P[:, k] - res) > 0)
+        if not act.any():
+            continue
+        idx = np.nonzero(act)[0]
+        ok, r = _lp1(P[idx], D[idx], valid[idx], np.full(len(idx), k), radius, opt[idx], dir_opt)
+        res[idx[ok]] = r[ok]
+        fail[idx[~ok]] = k
+    return res, fail
+
+def _lp3(P, D, n_lines, begin, radius, res):
+    """linearProgram3 לסוכן יחיד: ממזער את ההפרה המקסימלית כשאין פתרון פיזיבילי."""
+    distance = 0.0
+    for i in range(begin, n_lines):
+        if _cross(D[i], P[i] - res) <= distance:
+            continue
+        pp, pd = [], []
+        for j in range(i):
+            det = _cross(D[i], D[j])
+            if abs(det) <= EPS:
+                if (D[i] * D[j]).sum() > 0:
+                    continue
+                pt = 0.5 * (P[i] + P[j])
+            else:
+                pt = P[i] + (_cross(D[j], P[i] - P[j]) / det) * D[i]
+            dd = D[j] - D[i]
+            pp.append(pt)
+            pd.append(dd / np.linalg.norm(dd))
+        opt = np.array([[-D[i, 1], D[i, 0]]])
+        if pp:
+            r, f = _lp2(np.array([pp]), np.array([pd]), np.ones((1, len(pp)), bool), radius, opt, True)
+            if f[0] >= len(pp):
+                res = r[0]
+        else:
+            res = opt[0] * radius
+        distance = _cross(D[i], P[i] - res)
+    return res
+
+class NumpyOrcaEngine:
+    """אותו ממשק כמו OrcaEngine (step/len/keys), בלי מצב פנימי מלבד הפרמטרים."""
+    def __init__(self, radius=3.0, max_speed=10.0, dt=0.1, neighbor_dist=15.0, max_neighbors=10,
+                 time_horizon=2.5, time_horizon_obst=2.5):
+        self.radius, self.max_speed, self.dt = radius, max_speed, dt
+        self.neighbor_dist, self.max_neighbors = neighbor_dist, max_neighbors
+        self.time_horizon = time_horizon
+        self._keys: list = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    def step(self, states, keys: Optional[Sequence[Hashable]] = None, pref=None) -> np.ndarray:
+        st = np.asarray(states, dtype=np.float64).reshape(-1, 4)
+        self._keys = list(range(len(st))) if keys is None else list(keys)
+        pos, vel = st[:, :2], st[:, 2:4]
+        pv = vel if pref is None else np.asarray(pref, dtype=np.float64).reshape(-1, 2)
+        if len(st) == 0:
+            return np.zeros((0, 2))
+        nbr = neighbors(pos, self.neighbor_dist, self.max_neighbors)
+        P, D, valid = orca_lines(pos, vel, nbr, self.radius, self.time_horizon, self.dt)
+        res, fail = _lp2(P, D, valid, self.max_speed, pv.copy(), False)
+        n_lines = valid.sum(1)
+        for i in np.nonzero(fail < n_lines)[0]:
+            res[i] = _lp3(P[i], D[i], int(n_lines[i]), int(fail[i]), self.max_speed, res[i])
+        return res
+
+def orca_velocities(agents, radii=3.0, max_speed=10.0, dt=0.1):
+    # agents: [(x,y,vx,vy), ...] -> np.ndarray (n,2)
+    return NumpyOrcaEngine(radius=radii, max_speed=max_speed, dt=dt).step(agents)
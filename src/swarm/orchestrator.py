@@ -0,0 +1,124 @@
+# src/swarm/orchestrator.py
+# העלאת נחיל במקביל: connect -> health -> arm -> takeoff לכל הרכבים יחד (asyncio.gather),
+# עם timeout לכל שלב, הגבלת מקביליות (Semaphore) ודו"ח כשלונות — רכב שנכשל לא עוצר את השאר.
+import asyncio, time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from mavsdk import System
+
+SERVER_PORT_BASE = 50051   # כל רכב מקבל mavsdk_server משלו: 50051, 50052, ...
+
+STAGES = ("connect", "health", "arm", "takeoff")
+DEFAULT_TIMEOUTS = {"connect": 20.0, "health": 60.0, "arm": 10.0, "takeoff": 40.0}
+
+@dataclass
+class VehicleStatus:
+    conn: str
+    index: int
+    drone: Optional[System] = None
+    stage: str = "pending"          # השלב האחרון שהושלם / שנכשל
+    ok: bool = False
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+async def _connect(st: VehicleStatus, port: int):
+    st.drone = System(port=port)
+    await st.drone.connect(system_address=st.conn)
+    async for s in st.drone.core.connection_state():
+        if s.is_connected:
+            return
+
+async def _health(st: VehicleStatus):
+    async for h in st.drone.telemetry.health():
+        if h.is_global_position_ok and h.is_home_position_ok and h.is_armable:
+            return
+
+async def _arm(st: VehicleStatus, max_speed: Optional[float]):
+    await st.drone.action.arm()
+    if max_speed:
+        try:
+            await st.drone.action.set_maximum_speed(max_speed)
+        except Exception as e:
+            # הרכב חמוש וממשיך, אבל בלי הגבלת מהירות — נרשם ב-error ומוצג בדו"ח גם כשהוא OK
+            st.error = f"set_maximum_speed({max_speed}) failed: {type(e).__name__}: {e}"
+            print(f"[!] {st.conn}: {st.error}")
+
+async def _takeoff(st: VehicleStatus, alt: float):
+    await st.drone.action.set_takeoff_altitude(alt)
+    await st.drone.action.takeoff()
+    # במקום sleep קבוע: ממתינים שהרכב באוויר וקרוב לגובה היעד
+    async for p in st.drone.telemetry.position():
+        if p.relative_altitude_m >= 0.9 * alt:
+            return
+
+async def _bring_up_one(st: VehicleStatus, sem: asyncio.Semaphore, alt: float, port: int,
+                        timeouts: Dict[str, float], stages: Sequence[str], max_speed: Optional[float]):
+    steps = {"connect": lambda: _connect(st, port), "health": lambda: _health(st),
+             "arm": lambda: _arm(st, max_speed), "takeoff": lambda: _takeoff(st, alt)}
+    async with sem:
+        for stage in stages:
+            t0 = time.monotonic()
+            try:
+                await asyncio.wait_for(steps[stage](), timeout=timeouts[stage])
+            except asyncio.TimeoutError:
+                st.stage, st.error = stage, f"timeout after {timeouts[stage]:.0f}s"
+                return st
+            except Exception as e:
+                st.stage, st.error = stage, f"{type(e).__name__}: {e}"
+                return st
+            st.timings[stage] = time.monotonic() - t0
+            st.stage = stage
+            print(f"[+] {st.conn}: {stage} ok ({st.timings[stage]:.1f}s)")
+    st.ok = True
+    return st
+
+async def bring_up(conns: Sequence[str], alt: float = 20.0, max_concurrency: int = 8,
+                   timeouts: Optional[Dict[str, float]] = None, stages: Sequence[str] = STAGES,
+                   max_speed: Optional[float] = None, port_base: int = SERVER_PORT_BASE) -> List[VehicleStatus]:
+    """מעלה את כל הרכבים במקביל; מחזיר סטטוס לכל רכב לפי סדר conns (גם לכושלים)."""
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown bring-up stages: {unknown}")
+    tmo = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+    sem = asyncio.Semaphore(max(1, int(max_concurrency)))
+    statuses = [VehicleStatus(c, i) for i, c in enumerate(conns)]
+    await asyncio.gather(*(_bring_up_one(st, sem, alt, port_base + st.index, tmo, stages, max_speed)
+                           for st in statuses))
+    return statuses
+
+def report(statuses: Sequence[VehicleStatus]) -> str:
+    lines = []
+    for st in statuses:
+        total = sum(st.timings.values())
+        if st.ok:
+            warn = f"  (warning: {st.error})" if st.error else ""
+            lines.append(f"  [OK]   {st.conn:<18} {total:5.1f}s{warn}")
+        else:
+            lines.append(f"  [FAIL] {st.conn:<18} at '{st.stage}': {st.error}")
+    ok = sum(st.ok for st in statuses)
+    return f"Bring-up: {ok}/{len(statuses)} vehicles ready\n" + "\n".join(lines)
+
+async def land_all(statuses: Sequence[VehicleStatus], rtl: bool = True):
+    """RTL/נחיתה לכל רכב שעבר arm (כולל כאלה שנכשלו בהמראה), בלי לעצור על שגיאות."""
+    async def one(st):
+        if st.drone is None or "arm" not in st.timings:
+            return
+        try:
+            await (st.drone.action.return_to_launch() if rtl else st.drone.action.land())
+        except Exception as e:
+            print(f"[!] {st.conn}: {'RTL' if rtl else 'land'} failed: {e}")
+    await asyncio.gather(*(one(st) for st in statuses))
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Concurrent swarm bring-up")
+    ap.add_argument("-n", type=int, default=3, help="Number of SITL instances (udp://:14540+i)")
+    ap.add_argument("--alt", type=float, default=20.0)
+    ap.add_argument("--max_concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    async def _main():
+        sts = await bring_up([f"udp://:{14540 + i}" for i in range(args.n)], args.alt, args.max_concurrency)
+        print(report(sts))
+        await land_all(sts)
+    asyncio.run(_main())
@@ -1,121 +1,188 @@
 # src/utils/logger.py
 import asyncio
-import csv
-from datetime import datetime, timezone
-from pathlib import Path
-from typing import Optional
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from mavsdk import System
-from mavsdk.telemetry import FlightMode
+
+from .streams import REGISTRY, Profile, profile_columns, resolve_profile
+from .writers import make_writer
+
+log = logging.getLogger(__name__)
+
+# עמודות פרופיל ברירת המחדל (תואם ל-CSV ההיסטורי)
+COLUMNS = profile_columns(resolve_profile("default"))
 
 
 class TelemetryLogger:
     """
-    לוג טלמטריה ל-CSV. מתחבר בנפרד ל-system_address שקיבלת.
+    לוג טלמטריה ל-CSV או לתיקיית npy עמודתית (backend="csv"/"npy", או לפי סיומת הנתיב).
+    עם hub (missions.telemetry_hub) הלוגר נרשם לזרמים המשותפים ולא פותח חיבור משלו;
+    בלי hub הוא מתחבר בנפרד ל-system_address שקיבלת.
+    הזרמים נבחרים לפי profile (ראו utils.streams): שם פרופיל או dict {stream: Hz}.
+    לכל זרם בפרופיל רצה משימת צרכן שמעדכנת "תמונת מצב" אחרונה (לכל היותר בקצב של הזרם),
+    ו-sampler כותב שורה בקצב hz בלי לבטל אף __anext__. זרם שלא בפרופיל לא נרשם בכלל.
+    apply_rates=True מבקש גם מהרחפן את קצבי הזרמים (set_rate_*) — משפיע על כל הצרכנים של הרכב.
+    השורות נצברות ב-writer ונכתבות במנות דרך thread יחיד, כך שה-event loop לא נחסם על I/O.
     שימוש:
         logger = TelemetryLogger(conn_url, "out.csv")
         await logger.start()
         ...
         await logger.stop()
     """
-    def __init__(self, conn_url: str, csv_path: str, hz: float = 2.0):
+    def __init__(self, conn_url: str, csv_path: str, hz: float = 2.0, backend: Optional[str] = None,
+                 profile: Profile = "default", apply_rates: bool = False,
+                 flush_rows: Optional[int] = None, flush_bytes: Optional[int] = None,
+                 flush_interval_s: Optional[float] = None, hub=None):
         self._conn_url = conn_url
-        self._csv_path = Path(csv_path)
+        self._hub = hub
         self._hz = max(0.2, float(hz))
         self._drone: Optional[System] = None
         self._task: Optional[asyncio.Task] = None
+        self._consumers: List[asyncio.Task] = []
+        self._rates = resolve_profile(profile)
+        self._columns = profile_columns(self._rates)
+        self._apply_rates = apply_rates
+        self._latest: Dict[str, Tuple] = {}
         self._stop_evt = asyncio.Event()
 
-        # header
-        self._csv_path.parent.mkdir(parents=True, exist_ok=True)
-        if not self._csv_path.exists():
-            with self._csv_path.open("w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow([
-                    "ts_iso", "flight_mode",
-                    "lat_deg", "lon_deg", "abs_alt_m", "rel_alt_m",
-                    "vx_ms", "vy_ms", "vz_ms",
-                    "ground_speed_ms",
-                    "battery_percent"
-                ])
+        # כתיבה במנות; worker יחיד => המנות נכתבות לפי הסדר
+        flush = {"max_rows": flush_rows, "max_bytes": flush_bytes, "max_interval_s": flush_interval_s}
+        self._writer = make_writer(csv_path, self._columns, backend,
+                                   **{k: v for k, v in flush.items() if v is not None})
+        self._io: Optional[ThreadPoolExecutor] = None   # נפתח ב-start, נסגר ב-stop
+        self._pending: List[asyncio.Future] = []
 
     async def start(self):
-        self._drone = System()
-        await self._drone.connect(system_address=self._conn_url)
-        # המתנה קצרה להתחברות
-        async for _ in self._drone.telemetry.flight_mode():
-            break
+        if self._hub is not None:
+            self._drone = self._hub.drone
+        else:
+            self._drone = System()
+            await self._drone.connect(system_address=self._conn_url)
+            # המתנה קצרה להתחברות
+            async for _ in self._drone.telemetry.flight_mode():
+                break
+        if self._apply_rates:
+            await self._set_rates()
         self._stop_evt.clear()
+        self._latest.clear()
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telemetry-io")
+        self._consumers = [asyncio.create_task(self._consume(name, hz)) for name, hz in self._rates.items()]
         self._task = asyncio.create_task(self._run())
 
     async def stop(self):
         self._stop_evt.set()
         if self._task:
             await self._task
+            self._task = None
+        for t in self._consumers:
+            t.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+        # flush אחרון + סגירת הקובץ (אחרי כל המנות שעדיין בדרך)
+        loop = asyncio.get_running_loop()
+        self._flush(loop)
+        await asyncio.gather(*list(self._pending), return_exceptions=True)
+        await loop.run_in_executor(self._io, self._writer.close)
+        if self._io is not None:
+            self._io.shutdown(wait=True)   # ה-worker כבר פנוי אחרי ה-close
+            self._io = None
         # ניתוק לא חובה; MAVSDK ייסגר כשיתום
 
-    async def _run(self):
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    async def _set_rates(self):
         assert self._drone is not None
-        # streams
-        flight_mode_stream = self._drone.telemetry.flight_mode()
-        pos_stream = self._drone.telemetry.position()
-        vel_stream = self._drone.telemetry.velocity_ned()
-        groundspeed_stream = self._drone.telemetry.ground_speed_ned()
-        batt_stream = self._drone.telemetry.battery()
-
-        # ערכים אחרונים
-        fm = None
-        pos = None
-        vel = None
-        gs = None
-        batt = None
-
-        # קוראים את כל הזרמים בקצב אחיד
-        period = 1.0 / self._hz
-        while not self._stop_evt.is_set():
-            # נסה “לרוקן” כל זרם אם יש דגימה ממתינה
+        for name, hz in self._rates.items():
+            spec = REGISTRY[name]
+            setter = getattr(self._drone.telemetry, spec.set_rate, None) if spec.set_rate else None
+            if setter is None or hz <= 0:
+                continue
             try:
-                fm = await asyncio.wait_for(flight_mode_stream.__anext__(), timeout=0.0)
-            except asyncio.TimeoutError:
-                pass
-            try:
-                pos = await asyncio.wait_for(pos_stream.__anext__(), timeout=0.0)
-            except asyncio.TimeoutError:
-                pass
-            try:
-                vel = await asyncio.wait_for(vel_stream.__anext__(), timeout=0.0)
-            except asyncio.TimeoutError:
-                pass
+                await setter(hz)
+            except Exception as e:
+                log.warning("Could not set rate of '%s' to %.1f Hz: %s", name, hz, e)
+
+    async def _consume(self, name: str, hz: float):
+        """צרכן של זרם יחיד: דגימה מעודכנת מחליפה את הערכים האחרונים ב-snapshot (לכל היותר hz בשנייה)."""
+        assert self._drone is not None
+        spec = REGISTRY[name]
+        sub = None
+        if self._hub is not None:
+            # מנוי latest: הלוגר דוגם תמונת מצב, אין טעם לצבור תור
+            key = spec.stream_method if spec.plugin == "telemetry" else f"{spec.plugin}.{spec.stream_method}"
             try:
-                gs = await asyncio.wait_for(groundspeed_stream.__anext__(), timeout=0.0)
-            except asyncio.TimeoutError:
-                pass
+                sub = stream = self._hub.subscribe(key, policy="latest")
+            except ValueError:
+                stream = None
+        else:
+            factory = getattr(getattr(self._drone, spec.plugin, None), spec.stream_method, None)
+            stream = factory() if factory is not None else None
+        if stream is None:
+            log.info("Telemetry stream '%s' not available in this MAVSDK version.", name)
+            return
+        min_dt = 1.0 / hz if hz > 0 else 0.0
+        last = -min_dt
+        try:
+            async for sample in stream:
+                now = time.monotonic()
+                if now - last < min_dt:
+                    continue  # מהר מהקצב שביקשנו — לא מחלצים
+                last = now
+                self._latest[name] = spec.extract(sample)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("Telemetry stream '%s' ended: %s", name, e)
+        finally:
+            if sub is not None:
+                sub.close()
+
+    def _make_row(self) -> list:
+        """בונה שורה מתמונת המצב הנוכחית (ללא await); זרם שעוד לא דגם => תאים ריקים."""
+        row: list = [time.time()]  # epoch; הפורמט ל-ISO נעשה ב-writer
+        for name in self._rates:
+            values = self._latest.get(name)
+            row.extend(values if values is not None else (None,) * len(REGISTRY[name].columns))
+        return row
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        """שולח את המנה הנוכחית ל-thread הכתיבה בלי להמתין לה."""
+        rows = self._writer.take()
+        if not rows:
+            return
+        fut = loop.run_in_executor(self._io, self._writer.write_rows, rows)
+        fut.add_done_callback(self._on_flushed)
+        self._pending.append(fut)
+
+    def _on_flushed(self, fut: asyncio.Future):
+        if fut in self._pending:
+            self._pending.remove(fut)
+        if not fut.cancelled() and fut.exception() is not None:
+            log.error("Telemetry log write failed: %s", fut.exception())
+
+    async def _run(self):
+        """Sampler: כותב שורה אחת לכל מחזור לפי שעון קבוע (ללא drift מצטבר)."""
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self._hz
+        next_t = loop.time()
+        while not self._stop_evt.is_set():
+            self._writer.append(self._make_row())
+            if self._writer.due():
+                self._flush(loop)
+
+            next_t += period
+            delay = next_t - loop.time()
+            if delay < 0:
+                # פיגרנו (למשל עומס) — לא "מדביקים" בפרץ שורות, מתחילים מחזור חדש
+                next_t = loop.time()
+                delay = 0.0
             try:
-                batt = await asyncio.wait_for(batt_stream.__anext__(), timeout=0.0)
+                await asyncio.wait_for(self._stop_evt.wait(), timeout=delay)
             except asyncio.TimeoutError:
                 pass
-
-            # כתיבה לשורה
-            with self._csv_path.open("a", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                ts = datetime.now(timezone.utc).isoformat()
-                mode_name = fm.name if isinstance(fm, FlightMode) else str(fm) if fm else ""
-                lat = getattr(pos, "latitude_deg", None) if pos else None
-                lon = getattr(pos, "longitude_deg", None) if pos else None
-                abs_alt = getattr(pos, "absolute_altitude_m", None) if pos else None
-                rel_alt = getattr(pos, "relative_altitude_m", None) if pos else None
-                vx = getattr(vel, "north_m_s", None) if vel else None
-                vy = getattr(vel, "east_m_s", None) if vel else None
-                vz = getattr(vel, "down_m_s", None) if vel else None
-                gs_ms = None
-                if gs:
-                    # ground_speed_ned מחזיר וקטור; אפשר נורמה
-                    try:
-                        gs_ms = (gs.north_m_s**2 + gs.east_m_s**2 + gs.down_m_s**2) ** 0.5
-                    except Exception:
-                        gs_ms = None
-                batt_pct = getattr(batt, "remaining_percent", None) if batt else None
-
-                w.writerow([ts, mode_name, lat, lon, abs_alt, rel_alt, vx, vy, vz, gs_ms, batt_pct])
-
-            await asyncio.sleep(period)
@@ -0,0 +1,140 @@
+# src/utils/readers.py
+"""
+קריאה והמרה של לוגי טלמטריה: CSV (ts_iso) <-> תיקיית npy עמודתית (ts epoch).
+
+    python -m utils.readers to-npy logs/flight.csv logs/flight.tlm
+    python -m utils.readers to-csv logs/flight.tlm logs/flight.csv
+"""
+import csv
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from .writers import CATEGORICAL_COLUMNS, NPY_META, TS_COLUMN, CsvBatchWriter, NpyChunkWriter
+
+CSV_TS_COLUMN = "ts_iso"
+
+
+def read_npy_meta(path: str) -> dict:
+    return json.loads((Path(path) / NPY_META).read_text(encoding="utf-8"))
+
+
+def iter_npy_chunks(path: str, mmap: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+    """מחזיר chunk אחרי chunk כ-dict עמודה->מערך; עם mmap אין העתקה ואין parsing."""
+    root = Path(path)
+    meta = read_npy_meta(path)
+    mode = "r" if mmap else None
+    for i in range(int(meta["chunks"])):
+        yield {c: np.load(root / f"{c}.{i:05d}.npy", mmap_mode=mode) for c in meta["columns"]}
+
+
+def read_npy_log(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """כל הלוג כעמודות רציפות (chunk יחיד נשאר memory-mapped; כמה chunks משורשרים פעם אחת)."""
+    meta = read_npy_meta(path)
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in meta["columns"]}
+    for chunk in iter_npy_chunks(path, mmap=mmap):
+        for c, arr in chunk.items():
+            parts[c].append(arr)
+    out = {}
+    for c, arrs in parts.items():
+        if not arrs:
+            out[c] = np.empty(0, dtype=meta["dtypes"][c])
+        elif len(arrs) == 1:
+            out[c] = arrs[0]
+        else:
+            out[c] = np.concatenate(arrs)
+    return out
+
+
+def read_telemetry(path: str):
+    """
+    DataFrame אחיד לשני הפורמטים: עמודת ts (epoch) + flight_mode כ-Categorical.
+    """
+    import pandas as pd
+
+    if str(path).lower().endswith(".csv"):
+        df = pd.read_csv(path)
+        if CSV_TS_COLUMN in df.columns:
+            ts = pd.to_datetime(df[CSV_TS_COLUMN], utc=True, format="ISO8601")
+            df.insert(0, TS_COLUMN, (ts - pd.Timestamp(0, tz="UTC")).dt.total_seconds())
+            df = df.drop(columns=[CSV_TS_COLUMN])
+        return df
+
+    meta = read_npy_meta(path)
+    cols = read_npy_log(path)
+    data = {}
+    for c in meta["columns"]:
+        if c in meta["categories"]:
+            data[c] = pd.Categorical.from_codes(np.asarray(cols[c], dtype=np.int16), meta["categories"][c])
+        else:
+            data[c] = cols[c]
+    return pd.DataFrame(data)
+
+
+def _parse_value(s: str):
+    return None if s == "" else float(s)
+
+
+def csv_to_npy(csv_path: str, out_dir: str, chunk_rows: int = 50_000) -> int:
+    """המרה בזרימה (לא טוען את כל הקובץ לזיכרון). מחזיר מספר שורות."""
+    n = 0
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        writer = NpyChunkWriter(out_dir, header)
+        categorical = [c in CATEGORICAL_COLUMNS for c in header[1:]]
+        batch: List[list] = []
+        for rec in reader:
+            ts = datetime.fromisoformat(rec[0]).timestamp()
+            values = [v if cat else _parse_value(v) for cat, v in zip(categorical, rec[1:])]
+            batch.append([ts, *values])
+            if len(batch) >= chunk_rows:
+                writer.write_rows(batch)
+                n += len(batch)
+                batch = []
+        writer.write_rows(batch)
+        n += len(batch)
+        writer.close()
+    return n
+
+
+def npy_to_csv(in_dir: str, csv_path: str) -> int:
+    meta = read_npy_meta(in_dir)
+    header = [CSV_TS_COLUMN, *meta["columns"][1:]]
+    writer = CsvBatchWriter(csv_path, header)
+    n = 0
+    for chunk in iter_npy_chunks(in_dir):
+        cols = []
+        for c in meta["columns"]:
+            arr = chunk[c]
+            if c in meta["categories"]:
+                cats = meta["categories"][c]
+                cols.append([cats[k] for k in arr.tolist()])
+            elif c == TS_COLUMN:
+                cols.append(arr.tolist())
+            else:
+                # astype(str) נותן את הייצוג הקצר של float32 (ולא 0.30000001192...); NaN => תא ריק
+                cols.append(["" if v == "nan" else v for v in arr.astype(str).tolist()])
+        rows = [list(r) for r in zip(*cols)]
+        writer.write_rows(rows)
+        n += len(rows)
+    writer.close()
+    return n
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 3 or argv[0] not in ("to-npy", "to-csv"):
+        print("usage: python -m utils.readers to-npy|to-csv <src> <dst>")
+        return 2
+    cmd, src, dst = argv
+    n = csv_to_npy(src, dst) if cmd == "to-npy" else npy_to_csv(src, dst)
+    print(f"Converted {n} rows: {src} -> {dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+# src/utils/streams.py
+"""
+רישום דקלרטיבי של זרמי הטלמטריה שהלוגר יודע לרשום, ופרופילים שבוחרים מהם.
+
+כל StreamSpec מגדיר: מאיזה plugin/מתודה לקרוא, אילו עמודות הוא תורם לשורה,
+ואיך לחלץ אותן מדגימה. פרופיל = {stream: קצב דגימה ב-Hz}; זרם שלא בפרופיל לא נרשם בכלל.
+"""
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class StreamSpec:
+    name: str                                  # מפתח ברישום
+    columns: Tuple[str, ...]                   # העמודות שהזרם תורם ל-CSV
+    extract: Callable[[object], Tuple]         # דגימה -> ערכים (באותו סדר כמו columns)
+    plugin: str = "telemetry"                  # drone.<plugin>.<method>()
+    method: Optional[str] = None               # ברירת מחדל: name
+    set_rate: Optional[str] = None             # telemetry.set_rate_* (אם קיים)
+
+    @property
+    def stream_method(self) -> str:
+        return self.method or self.name
+
+
+def _enum_name(v):
+    return getattr(v, "name", str(v))
+
+
+def _velocity(v) -> Tuple:
+    # מהירות קרקע = נורמה אופקית (ground_speed_ned לא קיים ב-MAVSDK 2.x)
+    return (v.north_m_s, v.east_m_s, v.down_m_s, math.hypot(v.north_m_s, v.east_m_s))
+
+
+def _position_velocity(pv) -> Tuple:
+    p, v = pv.position, pv.velocity
+    return (p.north_m, p.east_m, p.down_m, v.north_m_s, v.east_m_s, v.down_m_s)
+
+
+def _health(h) -> Tuple:
+    return (int(h.is_global_position_ok), int(h.is_home_position_ok), int(h.is_armable))
+
+
+REGISTRY: Dict[str, StreamSpec] = {s.name: s for s in (
+    StreamSpec("flight_mode", ("flight_mode",), lambda fm: (_enum_name(fm),)),
+    StreamSpec("position", ("lat_deg", "lon_deg", "abs_alt_m", "rel_alt_m"),
+               lambda p: (p.latitude_deg, p.longitude_deg, p.absolute_altitude_m, p.relative_altitude_m),
+               set_rate="set_rate_position"),
+    StreamSpec("velocity_ned", ("vx_ms", "vy_ms", "vz_ms", "ground_speed_ms"), _velocity,
+               set_rate="set_rate_velocity_ned"),
+    StreamSpec("battery", ("battery_percent",), lambda b: (b.remaining_percent,),
+               set_rate="set_rate_battery"),
+    StreamSpec("attitude_euler", ("roll_deg", "pitch_deg", "yaw_deg"),
+               lambda a: (a.roll_deg, a.pitch_deg, a.yaw_deg), set_rate="set_rate_attitude_euler"),
+    StreamSpec("heading", ("heading_deg",), lambda h: (h.heading_deg,)),
+    StreamSpec("gps_info", ("gps_num_sats", "gps_fix_type"),
+               lambda g: (g.num_satellites, getattr(g.fix_type, "value", g.fix_type)),
+               set_rate="set_rate_gps_info"),
+    StreamSpec("health", ("health_gpos_ok", "health_home_ok", "health_armable"), _health),
+    StreamSpec("armed", ("armed",), lambda a: (int(a),)),
+    StreamSpec("in_air", ("in_air",), lambda a: (int(a),), set_rate="set_rate_in_air"),
+    StreamSpec("landed_state", ("landed_state",), lambda s: (getattr(s, "value", s),),
+               set_rate="set_rate_landed_state"),
+    StreamSpec("position_velocity_ned", ("pn_m", "pe_m", "pd_m", "pvn_ms", "pve_ms", "pvd_ms"),
+               _position_velocity, set_rate="set_rate_position_velocity_ned"),
+    StreamSpec("home", ("home_lat_deg", "home_lon_deg", "home_abs_alt_m"),
+               lambda h: (h.latitude_deg, h.longitude_deg, h.absolute_altitude_m), set_rate="set_rate_home"),
+    StreamSpec("rc_status", ("rc_available", "rc_signal_percent"),
+               lambda r: (int(r.is_available), r.signal_strength_percent), set_rate="set_rate_rc_status"),
+    StreamSpec("mission_progress", ("mission_current", "mission_total"),
+               lambda m: (m.current, m.total), plugin="mission"),
+)}
+
+# profile -> {stream: Hz}. "default" שומר בדיוק על עמודות ה-CSV ההיסטוריות.
+PROFILES: Dict[str, Dict[str, float]] = {
+    "minimal": {"flight_mode": 1.0, "position": 1.0, "battery": 0.2},
+    "default": {"flight_mode": 2.0, "position": 5.0, "velocity_ned": 5.0, "battery": 1.0},
+    "nav": {"flight_mode": 2.0, "position": 10.0, "velocity_ned": 10.0, "attitude_euler": 10.0,
+            "heading": 5.0, "in_air": 1.0, "mission_progress": 1.0, "battery": 1.0},
+    "full": {"flight_mode": 5.0, "position": 20.0, "velocity_ned": 20.0, "battery": 1.0,
+             "attitude_euler": 20.0, "heading": 10.0, "gps_info": 1.0, "health": 1.0, "armed": 1.0,
+             "in_air": 2.0, "landed_state": 2.0, "position_velocity_ned": 20.0, "home": 0.2,
+             "rc_status": 1.0, "mission_progress": 2.0},
+}
+
+Profile = Union[str, Mapping[str, float]]
+
+
+def resolve_profile(profile: Profile) -> Dict[str, float]:
+    """שם פרופיל או dict {stream: Hz} -> dict מאומת (זרם לא מוכר => ValueError)."""
+    if isinstance(profile, str):
+        try:
+            rates = PROFILES[profile]
+        except KeyError:
+            raise ValueError(f"Unknown telemetry profile '{profile}' (choose from {sorted(PROFILES)})") from None
+    else:
+        rates = profile
+    unknown = [s for s in rates if s not in REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown telemetry streams: {unknown}")
+    return {s: float(hz) for s, hz in rates.items()}
+
+
+def profile_columns(rates: Mapping[str, float]) -> List[str]:
+    cols = ["ts_iso"]
+    for name in rates:
+        cols.extend(REGISTRY[name].columns)
+    return cols
@@ -0,0 +1,199 @@
+# src/utils/writers.py
+import abc
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# עמודות מיוחדות בפורמט הבינארי: זמן epoch (float64) ומצב טיסה קטגוריאלי (uint8 + טבלת שמות)
+TS_COLUMN = "ts"
+CATEGORICAL_COLUMNS = ("flight_mode",)
+# float32 נותן ~0.5 מ' רזולוציה ב-lat/lon — לכן הקואורדינטות נשמרות ב-float64
+FLOAT64_COLUMNS = ("lat_deg", "lon_deg")
+NPY_META = "meta.json"
+
+
+class _BatchedWriter(abc.ABC):
+    """
+    באפר משותף ל-backends: שורות נצברות בזיכרון ונכתבות במנות.
+    מנה "בשלה" לפי מספר שורות, גודל משוער בבתים או זמן מאז ה-flush האחרון.
+
+    append()/due()/take() זולים ונקראים מה-event loop;
+    write_rows()/close() חוסמים ומיועדים ל-thread executor (worker יחיד שומר על סדר).
+    העמודה הראשונה בכל שורה היא epoch float.
+    """
+    def __init__(self, path: str, header: Sequence[str],
+                 max_rows: int = 200, max_bytes: int = 64 * 1024, max_interval_s: float = 1.0):
+        self._path = Path(path)
+        self._header = list(header)
+        self._max_rows = max(1, int(max_rows))
+        self._max_bytes = max(1, int(max_bytes))
+        self._max_interval_s = max(0.0, float(max_interval_s))
+        self._rows: List[list] = []
+        self._avg_row_bytes = 16.0 * len(self._header)  # יתעדכן אחרי ה-flush הראשון
+        self._last_flush = time.monotonic()
+
+    def append(self, row: list):
+        self._rows.append(row)
+
+    def due(self) -> bool:
+        n = len(self._rows)
+        if n == 0:
+            return False
+        return (n >= self._max_rows
+                or n * self._avg_row_bytes >= self._max_bytes
+                or time.monotonic() - self._last_flush >= self._max_interval_s)
+
+    def take(self) -> List[list]:
+        """מחליף את הבאפר ומחזיר את המנה לכתיבה."""
+        rows, self._rows = self._rows, []
+        self._last_flush = time.monotonic()
+        return rows
+
+    @abc.abstractmethod
+    def write_rows(self, rows: List[list]):
+        """חוסם: כותב מנה אחת (נקרא מה-thread executor)."""
+
+    @abc.abstractmethod
+    def close(self):
+        """חוסם: כותב את מה שנשאר וסוגר את הקבצים."""
+
+
+class CsvBatchWriter(_BatchedWriter):
+    """CSV: הקובץ נשאר פתוח; epoch מפורמט ל-ISO בתוך ה-thread."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fh: Optional[io.TextIOWrapper] = None
+
+    def _open(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self._path.exists() or self._path.stat().st_size == 0
+        self._fh = self._path.open("a", newline="", encoding="utf-8")
+        if new_file:
+            csv.writer(self._fh).writerow(self._header)
+
+    def write_rows(self, rows: List[list]):
+        """חוסם: פורמט + write אחד לכל המנה."""
+        if self._fh is None:
+            self._open()
+        if not rows:
+            return
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for row in rows:
+            ts = row[0]
+            if isinstance(ts, float):
+                ts = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+            w.writerow([ts, *row[1:]])
+        text = buf.getvalue()
+        self._fh.write(text)
+        self._fh.flush()
+        self._avg_row_bytes = len(text) / len(rows)
+
+    def close(self):
+        if self._fh is None:
+            self._open()
+        self._fh.close()
+        self._fh = None
+
+
+class NpyChunkWriter(_BatchedWriter):
+    """
+    פורמט עמודתי בינארי: תיקייה עם קובץ .npy לכל עמודה בכל מנה (<col>.<chunk>.npy) + meta.json.
+    ts נשמר כ-float64 epoch, flight_mode כקוד uint8 (השמות ב-meta), lat/lon כ-float64
+    ושאר הערכים float32 (None => NaN).
+    כל chunk ניתן לטעינה ב-np.load(mmap_mode="r") — ראו utils.readers.
+    """
+    def __init__(self, path: str, header: Sequence[str],
+                 max_rows: int = 2000, max_bytes: int = 256 * 1024, max_interval_s: float = 5.0):
+        super().__init__(path, header, max_rows=max_rows, max_bytes=max_bytes, max_interval_s=max_interval_s)
+        self._columns = [TS_COLUMN, *self._header[1:]]
+        self._categories: Dict[str, List[str]] = {c: [""] for c in self._columns if c in CATEGORICAL_COLUMNS}
+        self._chunks = 0
+        self._loaded = False
+
+    def _load_meta(self):
+        self._path.mkdir(parents=True, exist_ok=True)
+        meta_path = self._path / NPY_META
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["columns"] != self._columns:
+                raise ValueError(f"{self._path}: existing log has columns {meta['columns']}")
+            self._chunks = int(meta["chunks"])
+            self._categories = {k: list(v) for k, v in meta["categories"].items()}
+        self._loaded = True
+
+    def _save_meta(self):
+        dtypes = {c: self._dtype(c).__name__ for c in self._columns}
+        meta = {"version": 1, "columns": self._columns, "dtypes": dtypes,
+                "categories": self._categories, "chunks": self._chunks}
+        tmp = self._path / (NPY_META + ".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._path / NPY_META)  # אטומי: קורא לא יראה meta חלקי
+
+    def _dtype(self, name: str):
+        if name == TS_COLUMN or name in FLOAT64_COLUMNS:
+            return np.float64
+        if name in self._categories:
+            return np.uint8
+        return np.float32
+
+    def _encode(self, name: str, values) -> np.ndarray:
+        cats = self._categories[name]
+        index = {c: i for i, c in enumerate(cats)}
+        codes = np.empty(len(values), dtype=np.uint8)
+        for i, v in enumerate(values):
+            v = "" if v is None else str(v)
+            code = index.get(v)
+            if code is None:
+                if len(cats) >= 256:
+                    raise ValueError(f"Too many categories for column '{name}'")
+                code = index[v] = len(cats)
+                cats.append(v)
+            codes[i] = code
+        return codes
+
+    def write_rows(self, rows: List[list]):
+        if not self._loaded:
+            self._load_meta()
+        if not rows:
+            return
+        cols = list(zip(*rows))
+        nbytes = 0
+        for name, values in zip(self._columns, cols):
+            if name in self._categories:
+                arr = self._encode(name, values)
+            else:
+                arr = np.array([np.nan if v is None else v for v in values], dtype=self._dtype(name))
+            np.save(self._path / f"{name}.{self._chunks:05d}.npy", arr)
+            nbytes += arr.nbytes
+        self._chunks += 1
+        self._save_meta()
+        self._avg_row_bytes = nbytes / len(rows)
+
+    def close(self):
+        if not self._loaded:
+            self._load_meta()
+        self._save_meta()
+
+
+BACKENDS = {"csv": CsvBatchWriter, "npy": NpyChunkWriter}
+
+
+def make_writer(path: str, header: Sequence[str], backend: Optional[str] = None, **kwargs) -> _BatchedWriter:
+    """
+    בוחר backend לפי שם או לפי הסיומת: .csv => CSV, כל השאר (למשל logs/flight.tlm) => תיקיית npy.
+    """
+    if backend is None:
+        backend = "csv" if str(path).lower().endswith(".csv") else "npy"
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown telemetry backend '{backend}' (choose from {sorted(BACKENDS)})") from None
+    return cls(path, header, **kwargs)
@@ -0,0 +1,147 @@
+# src/vision/bench_detector.py
+# Benchmark: legacy per-colour detector (inRange + open + findContours for every colour,
+# bounds/kernel rebuilt each frame) vs the single-pass HSVColorClassifier,
+# and full-resolution vs coarse-to-fine (pyramid ROI) detection with accuracy against full-res.
+# Synthetic frames: low-saturation noisy background + coloured blobs of every colour.
+# Usage: python src/vision/bench_detector.py [--frames 30] [--colors 6,12,16] [--scale 0.25] [--targets 3,12]
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from detector import ColorTargetDetector, HSVColorClassifier
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def legacy_detect(frame, color_ranges, min_area=400):
+    # The original ColorTargetDetector.detect loop, without drawing
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    detections = []
+    for color, (lower, upper) in color_ranges.items():
+        lower = np.array(lower, np.uint8)
+        upper = np.array(upper, np.uint8)
+        mask = cv2.inRange(hsv, lower, upper)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for c in contours:
+            if cv2.contourArea(c) > min_area:
+                detections.append({"color": color, "bbox": cv2.boundingRect(c)})
+    return detections
+
+
+def hue_bands(n):
+    """n disjoint hue bands covering 0..179 — stands in for a larger colour palette."""
+    edges = np.linspace(0, 180, n + 1).astype(int)
+    return {f"h{i}": ([int(edges[i]), 80, 80], [int(edges[i + 1]) - 1, 255, 255]) for i in range(n)}
+
+
+def make_frame(size, color_ranges, blobs=12, seed=0):
+    w, h = size
+    rng = np.random.default_rng(seed)
+    hsv = np.empty((h, w, 3), np.uint8)
+    hsv[..., 0] = rng.integers(0, 180, (h, w))
+    hsv[..., 1] = rng.integers(0, 40, (h, w))      # below every saturation threshold
+    hsv[..., 2] = rng.integers(60, 200, (h, w))
+    truth = []
+    ranges = list(color_ranges.items())
+    for k in range(blobs):
+        name, (lo, hi) = ranges[k % len(ranges)]
+        bw, bh = (int(v) for v in rng.integers(h // 20, h // 6, 2))
+        x, y = int(rng.integers(0, w - bw)), int(rng.integers(0, h - bh))
+        color = ((lo[0] + hi[0]) // 2, (lo[1] + hi[1]) // 2 + 20, (lo[2] + hi[2]) // 2 + 20)
+        cv2.ellipse(hsv, (x + bw // 2, y + bh // 2), (bw // 2, bh // 2), 0, 0, 360,
+                    tuple(int(min(c, 255)) for c in color), -1)
+        truth.append((name, (x, y, bw, bh)))
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR), truth
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter or 1)
+
+
+def timed(fn, frames):
+    t = []
+    for f in frames:
+        t0 = time.perf_counter()
+        out = fn(f)
+        t.append(time.perf_counter() - t0)
+    return 1e3 * float(np.median(t)), out
+
+
+def agreement(old, new):
+    """Fraction of legacy blobs that the new detector finds (IoU > 0.8, same colour)."""
+    if not old:
+        return 1.0
+    hit = sum(any(d["color"] == o["color"] and iou(d["bbox"], o["bbox"]) > 0.8 for d in new) for o in old)
+    return hit / len(old)
+
+
+def moving_sequence(size, color_ranges, n, blobs=12, step_px=6, seed=0):
+    """The same scene panning by step_px per frame (like a camera over the ground)."""
+    frame, _ = make_frame(size, color_ranges, blobs=blobs, seed=seed)
+    return [np.roll(frame, (k * step_px // 2, k * step_px), axis=(0, 1)) for k in range(n)]
+
+
+def pyramid_accuracy(ref, test):
+    """(recall, mean IoU of matches, extra detections) of test vs full-res ref, same colour, IoU > 0.5."""
+    ious, extra = [], 0
+    for r_dets, t_dets in zip(ref, test):
+        for r in r_dets:
+            best = max((iou(r["bbox"], t["bbox"]) for t in t_dets if t["color"] == r["color"]), default=0.0)
+            if best > 0.5:
+                ious.append(best)
+        extra += max(0, len(t_dets) - len(r_dets))
+    total = sum(len(r) for r in ref) or 1
+    return len(ious) / total, float(np.mean(ious)) if ious else 0.0, extra
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=30)
+    ap.add_argument("--colors", default="6,12,16",
+                    help="palette sizes, at most 16 (6 = the detector's COLOR_RANGES)")
+    ap.add_argument("--scale", type=float, default=0.25, help="coarse scale for the pyramid mode")
+    ap.add_argument("--targets", default="3,12", help="blobs per scene for the pyramid mode")
+    args = ap.parse_args()
+    cv2.setNumThreads(1)   # compare algorithms, not thread pools
+
+    print(f"{'res':>6} {'colors':>6} {'legacy ms':>10} {'single ms':>10} {'speedup':>8} {'agree':>6}")
+    for res, size in RESOLUTIONS.items():
+        for n in (int(c) for c in args.colors.split(",")):
+            ranges = ColorTargetDetector.COLOR_RANGES if n == 6 else hue_bands(n)
+            clf = HSVColorClassifier(ranges)
+            frames = [make_frame(size, ranges, seed=s)[0] for s in range(min(args.frames, 5))]
+            frames = (frames * (args.frames // len(frames) + 1))[:args.frames]
+            t_old, old = timed(lambda f: legacy_detect(f, ranges), frames)
+            t_new, new = timed(lambda f: clf.detect(f, 400), frames)
+            print(f"{res:>6} {n:>6} {t_old:>10.2f} {t_new:>10.2f} {t_old / t_new:>7.1f}x "
+                  f"{agreement(old, new):>6.2f}")
+
+    print(f"\ncoarse-to-fine at scale {args.scale} (previous frame's detections seed the ROIs)")
+    print(f"{'res':>6} {'targets':>7} {'full ms':>8} {'pyramid ms':>11} {'speedup':>8} {'recall':>7} "
+          f"{'mean IoU':>9} {'extra':>6}")
+    for res, size, n in ((r, s, int(n)) for r, s in RESOLUTIONS.items() for n in args.targets.split(",")):
+        frames = moving_sequence(size, ColorTargetDetector.COLOR_RANGES, args.frames, blobs=n)
+        full, pyr = ColorTargetDetector(), ColorTargetDetector(pyramid_scale=args.scale)
+        ref, test, t_full, t_pyr = [], [], [], []
+        for f in frames:
+            t0 = time.perf_counter()
+            ref.append(full.detect_all(f))
+            t1 = time.perf_counter()
+            test.append(pyr.detect_all(f))
+            t_pyr.append(time.perf_counter() - t1)
+            t_full.append(t1 - t0)
+        a, b = 1e3 * float(np.median(t_full)), 1e3 * float(np.median(t_pyr))
+        recall, mean_iou, extra = pyramid_accuracy(ref, test)
+        print(f"{res:>6} {n:>7} {a:>8.2f} {b:>11.2f} {a / b:>7.1f}x {recall:>7.2f} {mean_iou:>9.3f} {extra:>6}")
+
+
+if __name__ == "__main__":
+    main()
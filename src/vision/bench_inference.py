@@ -0,0 +1,47 @@
+# src/vision/bench_inference.py
+# Benchmark: YOLO inference one frame per call (the old YOLODetector path) vs batched
+# YOLOEngine.infer, per backend. Models are exported once with Ultralytics, e.g.
+#   yolo export model=yolov8n.pt format=onnx imgsz=640 dynamic=True
+#   yolo export model=yolov8n.pt format=openvino imgsz=640
+# Usage: python src/vision/bench_inference.py --model yolov8n.onnx [--backend auto] [--batch 1,2,4,8]
+import argparse
+import time
+
+import numpy as np
+
+from inference import YOLOEngine
+
+
+def make_frames(n, size=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    return [rng.integers(0, 255, (h, w, 3), np.uint8) for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--backend", default="auto")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--batch", default="1,2,4,8", help="batch sizes (streams served per forward pass)")
+    ap.add_argument("--frames", type=int, default=32)
+    ap.add_argument("--threads", type=int, default=None)
+    args = ap.parse_args()
+    frames = make_frames(args.frames)
+
+    print(f"{'backend':>12} {'batch':>5} {'load+warm s':>11} {'ms/frame':>9} {'fps':>7} {'speedup':>8}")
+    base = None
+    for b in (int(x) for x in args.batch.split(",")):
+        t0 = time.perf_counter()
+        eng = YOLOEngine(args.model, backend=args.backend, imgsz=args.imgsz, batch=b, threads=args.threads)
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for i in range(0, len(frames), b):
+            eng.infer(frames[i:i + b])
+        ms = 1e3 * (time.perf_counter() - t0) / len(frames)
+        base = base or ms
+        print(f"{eng.backend:>12} {b:>5} {load_s:>11.2f} {ms:>9.2f} {1e3 / ms:>7.1f} {base / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,168 @@
 import cv2
 import numpy as np
 
-# Try importing YOLO
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
+from inference import YOLO_AVAILABLE, YOLOEngine  # noqa: F401 (YOLO_AVAILABLE re-exported)
+from tracker import MultiObjectTracker, detections_to_arrays
+
+
+# ============================================================
+# 🎨 SINGLE-PASS HSV CLASSIFIER
+# ============================================================
+class HSVColorClassifier:
+    """
+    Classifies every pixel against all colour ranges at once.
+
+    Each HSV channel goes through a 256-entry lookup table whose bit i is set
+    when the value lies inside colour i's range, so AND-ing the three lookups
+    gives exactly what cv2.inRange would for every colour. Bounds, tables and
+    the morphology kernel are built once; per frame there is one lookup per
+    channel, one opening and one contour pass no matter how many colours.
+
+    Masks stay at most 16 bits wide: cv2.LUT into a 32-bit table is roughly twice as
+    slow as into a 16-bit one, and two 16-bit passes cost about the same, so palettes
+    larger than 16 colours are rejected instead of silently taking the slow path.
+    """
+
+    MAX_COLORS = 16
+
+    def __init__(self, color_ranges, kernel_size=5):
+        self.colors = list(color_ranges)
+        n = len(self.colors)
+        if n > self.MAX_COLORS:
+            raise ValueError(f"HSVColorClassifier supports at most {self.MAX_COLORS} colours, got {n}")
+        dtype = np.uint8 if n <= 8 else np.uint16
+        values = np.arange(256)
+        lut = np.zeros((256, 3), dtype)
+        for i, (lower, upper) in enumerate(color_ranges.values()):
+            for ch in range(3):
+                lut[(values >= lower[ch]) & (values <= upper[ch]), ch] |= 1 << i
+        self.luts = [np.ascontiguousarray(lut[:, ch]) for ch in range(3)]
+        self.kernel_size = kernel_size
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+        self._shifts = np.arange(n, dtype=dtype)
+
+    def bitmask(self, hsv):
+        """Per-pixel colour membership bits (bit i = inside colour i's range)."""
+        # three single-channel LUTs are several times faster than one 3-channel LUT
+        h, s, v = (cv2.LUT(c, lut) for c, lut in zip(cv2.split(hsv), self.luts))
+        return cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+
+    def detect(self, frame, min_area=400, hsv=None, kernel=None):
+        """
+        Returns [{"color", "bbox", "area"}] for every blob larger than min_area,
+        labelled with the colour most of its pixels fall into.
+        """
+        if hsv is None:
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        kernel = self.kernel if kernel is None else kernel
+        bits = self.bitmask(hsv)
+        mask = cv2.morphologyEx(cv2.compare(bits, 0, cv2.CMP_NE), cv2.MORPH_OPEN, kernel)
+
+        detections = []
+        for (x, y, w, h), area, blob in self._blobs(mask, min_area):
+            roi = bits[y:y + h, x:x + w]
+            pixels = roi[blob != 0]
+            if np.bitwise_and.reduce(pixels) != 0:
+                detections.append(self._labelled(pixels, (x, y, w, h), area))
+                continue
+            # blobs of unrelated colours touch: split them the way separate per-colour masks would
+            sub = cv2.morphologyEx(self._cut_seams(roi, blob), cv2.MORPH_OPEN, kernel)
+            for (sx, sy, sw, sh), sub_area, sub_blob in self._blobs(sub, min_area):
+                pixels = roi[sy:sy + sh, sx:sx + sw][sub_blob != 0]
+                detections.append(self._labelled(pixels, (x + sx, y + sy, sw, sh), sub_area))
+        return detections
+
+    def detect_coarse_to_fine(self, frame, min_area=400, scale=0.25, seeds=(), pad_px=8):
+        """
+        Same output as detect(), but only candidate regions are processed at full resolution.
+
+        The frame is first classified downscaled by `scale` with a proportionally smaller
+        kernel and a looser area threshold; every coarse blob, padded, becomes an ROI.
+        `seeds` (bboxes tracked in the previous frame) that no coarse blob covers add ROIs
+        grown by half their size, so a target that blurs away at the coarse scale is still
+        refined. Overlapping ROIs are merged, then each is classified at full resolution.
+        """
+        fh, fw = frame.shape[:2]
+        # INTER_LINEAR is ~7x cheaper than INTER_AREA; blobs above min_area still span several coarse pixels
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+        k = max(1, int(round(self.kernel_size * scale)))
+        coarse = self.detect(small, 0.5 * min_area * scale * scale,
+                             kernel=cv2.getStructuringElement(cv2.MORPH_RECT, (k, k)))
+
+        pad = pad_px + int(np.ceil(1.0 / scale))
+        rois = [(x / scale - pad, y / scale - pad, (x + w) / scale + pad, (y + h) / scale + pad)
+                for x, y, w, h in (d["bbox"] for d in coarse)]
+        for x, y, w, h in seeds:
+            if any(x < r[2] and r[0] < x + w and y < r[3] and r[1] < y + h for r in rois[:len(coarse)]):
+                continue   # already covered by a coarse blob
+            g = pad + max(w, h) // 2
+            rois.append((x - g, y - g, x + w + g, y + h + g))
+
+        detections = []
+        for x0, y0, x1, y1 in merge_rois(rois, fw, fh):
+            for d in self.detect(frame[y0:y1, x0:x1], min_area):
+                x, y, w, h = d["bbox"]
+                d["bbox"] = (x + x0, y + y0, w, h)
+                detections.append(d)
+        return detections
+
+    def _labelled(self, pixels, bbox, area):
+        # count each distinct bit pattern once, then spread the counts over its colours
+        counts = np.bincount(pixels)
+        values = np.nonzero(counts)[0]
+        counts = counts[values]
+        votes = ((values[:, None] >> self._shifts) & 1).T @ counts
+        return {"color": self.colors[int(np.argmax(votes))], "bbox": bbox, "area": area}
+
+    @staticmethod
+    def _blobs(mask, min_area):
+        """(bbox, area, blob) per external contour above min_area; blob = the bbox crop of mask inside it."""
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for c in contours:
+            area = cv2.contourArea(c)
+            if area <= min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(c)
+            blob = np.zeros((h, w), np.uint8)
+            cv2.drawContours(blob, [c], -1, 255, cv2.FILLED, offset=(-x, -y))
+            yield (x, y, w, h), area, cv2.bitwise_and(blob, mask[y:y + h, x:x + w])
+
+    @staticmethod
+    def _cut_seams(bits, mask):
+        """Clears mask where an 8-neighbour has no colour in common, so each colour keeps its own blob."""
+        mask = mask.copy()
+        for a, b in (np.s_[:, :-1], np.s_[:, 1:]), (np.s_[:-1], np.s_[1:]), \
+                    (np.s_[:-1, :-1], np.s_[1:, 1:]), (np.s_[:-1, 1:], np.s_[1:, :-1]):
+            seam = cv2.bitwise_and(cv2.compare(cv2.bitwise_and(bits[a], bits[b]), 0, cv2.CMP_EQ), mask[a])
+            np.bitwise_and(mask[b], cv2.bitwise_not(seam), out=mask[b])
+        return mask
+
+
+def merge_rois(rois, width, height):
+    """Clips (x0, y0, x1, y1) boxes to the frame and merges overlapping ones until none overlap."""
+    boxes = [[max(0, int(x0)), max(0, int(y0)), min(width, int(np.ceil(x1))), min(height, int(np.ceil(y1)))]
+             for x0, y0, x1, y1 in rois]
+    boxes = [b for b in boxes if b[2] > b[0] and b[3] > b[1]]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [tuple(b) for b in boxes]
+
+
+def _draw_detection(frame, det, bgr=(0, 255, 255)):
+    x, y, w, h = det["bbox"]
+    cv2.rectangle(frame, (x, y), (x + w, y + h), bgr, 2)
+    cv2.putText(frame, det["color"], (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, bgr, 2)
 
 
 # ============================================================
@@ -22,140 +178,122 @@ class ColorTargetDetector:
         "orange": ([10, 100, 100], [25, 255, 255]),
     }
 
-    def __init__(self, min_area=400):
+    def __init__(self, min_area=400, color_ranges=None, pyramid_scale=None):
         self.min_area = min_area
+        self.classifier = HSVColorClassifier(color_ranges or self.COLOR_RANGES)
+        # coarse-to-fine mode: detect at pyramid_scale (e.g. 0.25), refine ROIs at full resolution
+        self.pyramid_scale = pyramid_scale
+        self.seeds = []
 
-    def detect(self, frame):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        detections = []
-
-        for color, (lower, upper) in self.COLOR_RANGES.items():
-            lower = np.array(lower, np.uint8)
-            upper = np.array(upper, np.uint8)
-            mask = cv2.inRange(hsv, lower, upper)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            for c in contours:
-                if cv2.contourArea(c) > self.min_area:
-                    x, y, w, h = cv2.boundingRect(c)
-                    detections.append({"color": color, "bbox": (x, y, w, h)})
+    def detect_all(self, frame):
+        """All blobs above min_area as [{"color", "bbox", "area"}] (no drawing)."""
+        if not self.pyramid_scale:
+            return self.classifier.detect(frame, self.min_area)
+        detections = self.classifier.detect_coarse_to_fine(frame, self.min_area, self.pyramid_scale, self.seeds)
+        self.seeds = [d["bbox"] for d in detections]
+        return detections
 
+    def detect(self, frame):
+        detections = self.detect_all(frame)
         if not detections:
             return None
 
         det = max(detections, key=lambda d: d["bbox"][2] * d["bbox"][3])
-        x, y, w, h = det["bbox"]
-        color = det["color"]
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
-        cv2.putText(frame, color, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        _draw_detection(frame, det)
         return det["bbox"]
 
 
 # ============================================================
 # 🟡 QUIET COLOR DETECTOR (Enhanced)
 # ============================================================
-class QuietColorDetector:
+class QuietColorDetector(ColorTargetDetector):
     """
-    Improved color detector that only prints when detection changes.
-    Tracks previous detection to reduce console spam.
+    Improved color detector that only prints when the tracked objects change.
+    Detections feed a MultiObjectTracker: one message when a track is confirmed
+    (new object, stable ID) and one when it is dropped, instead of every frame.
+    In pyramid mode the live tracks, coasting ones included, seed the ROIs.
     """
 
-    COLOR_RANGES = ColorTargetDetector.COLOR_RANGES
-
-    def __init__(self, min_area=400, sensitivity_px=10):
-        self.min_area = min_area
-        self.prev_bbox = None
-        self.prev_color = None
-        self.sensitivity_px = sensitivity_px
+    def __init__(self, min_area=400, color_ranges=None, pyramid_scale=None, tracker=None):
+        super().__init__(min_area, color_ranges, pyramid_scale)
+        self.tracker = tracker or MultiObjectTracker()
 
     def detect(self, frame):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        detections = []
-
-        for color, (lower, upper) in self.COLOR_RANGES.items():
-            lower = np.array(lower, np.uint8)
-            upper = np.array(upper, np.uint8)
-            mask = cv2.inRange(hsv, lower, upper)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            for c in contours:
-                if cv2.contourArea(c) > self.min_area:
-                    x, y, w, h = cv2.boundingRect(c)
-                    detections.append({"color": color, "bbox": (x, y, w, h)})
+        detections = self.detect_all(frame)
+        boxes, labels, _ = detections_to_arrays(detections)
+        tracks = self.tracker.update(boxes, labels=labels)
+        for tr in tracks:
+            if tr.id in self.tracker.new_ids:
+                print(f"[DETECT] New {tr.label} object #{tr.id} at {tr.bbox}")
+        for track_id in self.tracker.lost_ids:
+            print(f"[DETECT] Lost object #{track_id}")
+        if self.pyramid_scale:
+            self.seeds = [tr.bbox for tr in tracks]
 
         if not detections:
-            self._handle_no_detection()
             return None
-
         det = max(detections, key=lambda d: d["bbox"][2] * d["bbox"][3])
-        bbox = det["bbox"]
-        color = det["color"]
-
-        # Draw
-        x, y, w, h = bbox
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
-        cv2.putText(frame, color, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        _draw_detection(frame, det)
+        return det["bbox"]
 
-        if self._is_new_detection(color, bbox):
-            print(f"[DETECT] New {color} object at {bbox}")
-            self.prev_bbox = bbox
-            self.prev_color = color
 
-        return bbox
+# ============================================================
+# 🔵 YOLO DETECTOR
+# ============================================================
+class YOLODetector:
+    """
+    YOLO through a YOLOEngine: the model is loaded and warmed up once, and detect_batch()
+    runs frames from several cameras in one forward pass. Pass engine= to share one engine
+    between detectors; backend/imgsz/batch are forwarded to YOLOEngine otherwise.
+    """
 
-    def _is_new_detection(self, color, bbox):
-        """Check if detection changed significantly."""
-        if self.prev_bbox is None or color != self.prev_color:
-            return True
+    def __init__(self, model_path="yolov8n.pt", conf=0.4, backend="auto", imgsz=640, batch=1, engine=None):
+        self.engine = engine or YOLOEngine(model_path, backend=backend, imgsz=imgsz, conf=conf, batch=batch)
+        self.conf = self.engine.conf
 
-        px, py, pw, ph = self.prev_bbox
-        x, y, w, h = bbox
-        dx, dy, dw, dh = abs(x - px), abs(y - py), abs(w - pw), abs(h - ph)
-        return (dx + dy + dw + dh) > self.sensitivity_px
+    def _to_dicts(self, det):
+        return [{"label": self.engine.label(c), "bbox": (int(x1), int(y1), int(x2 - x1), int(y2 - y1)),
+                 "conf": float(s)} for x1, y1, x2, y2, s, c in det]
 
-    def _handle_no_detection(self):
-        if self.prev_bbox is not None:
-            print("[DETECT] Lost object")
-        self.prev_bbox = None
-        self.prev_color = None
+    def detect_arrays(self, frames):
+        """One (N, 6) float32 array [x1, y1, x2, y2, conf, cls] per frame, sorted by confidence."""
+        return self.engine.infer(frames)
 
+    def detect_batch(self, frames):
+        """detect_all() for several frames in one forward pass."""
+        return [self._to_dicts(det) for det in self.engine.infer(frames)]
 
-# ============================================================
-# 🔵 YOLO DETECTOR
-# ============================================================
-class YOLODetector:
-    def __init__(self, model_path="yolov8n.pt", conf=0.4):
-        if not YOLO_AVAILABLE:
-            raise RuntimeError("Ultralytics YOLO not installed. Run: pip install ultralytics")
-        self.model = YOLO(model_path)
-        self.conf = conf
+    def detect_all(self, frame):
+        """All boxes as [{"label", "bbox", "conf"}], most confident first (no drawing)."""
+        return self._to_dicts(self.engine.infer([frame])[0])
 
     def detect(self, frame):
-        results = self.model.predict(frame, conf=self.conf, verbose=False)
-        if not results or not results[0].boxes:
+        detections = self.detect_all(frame)
+        if not detections:
             return None
-        box = results[0].boxes[0]
-        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-        label = self.model.names[int(box.cls[0])]
-        conf = float(box.conf[0])
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(frame, f"{label} {conf:.2f}", (x1, y1 - 5),
+        det = detections[0]
+        x, y, w, h = det["bbox"]
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(frame, f"{det['label']} {det['conf']:.2f}", (x, y - 5),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        return (x1, y1, x2 - x1, y2 - y1)
+        return det["bbox"]
 
 
 # ============================================================
 # ⚙️ DETECTOR FACTORY
 # ============================================================
-def create_detector(mode="color"):
+def create_detector(mode="color", pyramid_scale=None, model_path="yolov8n.pt", backend="auto"):
     """
     Returns detector instance by mode:
       - "color"  → basic HSV detection
       - "quiet"  → quiet mode (prints only when changes)
       - "yolo"   → YOLOv8 detector
+    pyramid_scale (color/quiet only) enables coarse-to-fine detection, e.g. 0.25.
+    model_path/backend (yolo only): .pt, .onnx or OpenVINO model; backend "auto", "ultralytics",
+    "onnxruntime" or "openvino".
     """
     if mode == "yolo":
-        return YOLODetector()
+        return YOLODetector(model_path, backend=backend)
     elif mode == "quiet":
-        return QuietColorDetector()
-    return ColorTargetDetector()
+        return QuietColorDetector(pyramid_scale=pyramid_scale)
+    return ColorTargetDetector(pyramid_scale=pyramid_scale)
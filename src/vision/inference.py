@@ -0,0 +1,319 @@
+import ast
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Sequence
+
+import cv2
+import numpy as np
+
+# Optional backends
+try:
+    from ultralytics import YOLO
+    YOLO_AVAILABLE = True
+except ImportError:
+    YOLO_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import openvino as ov
+except ImportError:
+    ov = None
+
+BACKENDS = ("ultralytics", "onnxruntime", "openvino")
+PAD_VALUE = 114
+
+
+# ============================================================
+# 🖼️ PRE / POST PROCESSING
+# ============================================================
+def letterbox(image, size):
+    """Resizes keeping aspect ratio and pads to size x size. Returns (image, scale, (pad_x, pad_y))."""
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    nw, nh = int(round(w * scale)), int(round(h * scale))
+    if (nw, nh) != (w, h):
+        image = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    px, py = (size - nw) // 2, (size - nh) // 2
+    image = cv2.copyMakeBorder(image, py, size - nh - py, px, size - nw - px, cv2.BORDER_CONSTANT,
+                               value=(PAD_VALUE,) * 3)
+    return image, scale, (px, py)
+
+
+def decode_yolo(pred, conf=0.25, iou=0.45, classes=None, max_det=300):
+    """
+    Raw output of one image -> (N, 6) [x1, y1, x2, y2, conf, cls] in network-input pixels.
+    Accepts the YOLOv8/11 layout (4 + nc, anchors) and the YOLOv5 layout (anchors, 5 + nc).
+    """
+    pred = np.asarray(pred, np.float32)
+    if pred.shape[0] < pred.shape[1]:
+        pred = pred.T                       # v8: (4 + nc, A) -> (A, 4 + nc)
+        cls_scores = pred[:, 4:]
+    else:
+        cls_scores = pred[:, 5:] * pred[:, 4:5]   # v5: objectness * class probability
+    cls = cls_scores.argmax(1)
+    score = cls_scores[np.arange(len(cls)), cls]
+    keep = score >= conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    boxes, score, cls = pred[keep, :4], score[keep], cls[keep]
+    if len(boxes) == 0:
+        return np.zeros((0, 6), np.float32)
+    xywh = np.column_stack([boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2, boxes[:, 2], boxes[:, 3]])
+    idx = np.asarray(cv2.dnn.NMSBoxesBatched(xywh.astype(np.float64), score, cls.astype(np.int32), conf, iou),
+                     int).reshape(-1)
+    idx = idx[np.argsort(-score[idx], kind="stable")][:max_det]
+    x1y1 = xywh[idx, :2]
+    return np.column_stack([x1y1, x1y1 + xywh[idx, 2:], score[idx], cls[idx]]).astype(np.float32)
+
+
+def unletterbox(det, scale, pad, shape):
+    """Maps (N, 6) boxes from network input back to the original frame and clips them."""
+    det = det.copy()
+    det[:, [0, 2]] = np.clip((det[:, [0, 2]] - pad[0]) / scale, 0, shape[1])
+    det[:, [1, 3]] = np.clip((det[:, [1, 3]] - pad[1]) / scale, 0, shape[0])
+    return det
+
+
+# ============================================================
+# ⚙️ BACKENDS
+# ============================================================
+class _OnnxRuntimeBackend:
+    def __init__(self, path, threads=None):
+        if ort is None:
+            raise RuntimeError("onnxruntime not installed. Run: pip install onnxruntime")
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.fixed_batch = inp.shape[0] if isinstance(inp.shape[0], int) else None
+        self.fixed_size = inp.shape[2] if isinstance(inp.shape[2], int) else None
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else None
+
+    def run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class _OpenVINOBackend:
+    def __init__(self, path, imgsz, batch, threads=None):
+        if ov is None:
+            raise RuntimeError("OpenVINO not installed. Run: pip install openvino")
+        core = ov.Core()
+        if os.path.isdir(path):
+            path = next(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".xml"))
+        model = core.read_model(path)
+        # static shape: CPU plugin compiles one kernel set for exactly this input
+        model.reshape({model.input(0).get_any_name(): [batch, 3, imgsz, imgsz]})
+        config = {"PERFORMANCE_HINT": "THROUGHPUT" if batch > 1 else "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = int(threads)
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+        self.fixed_batch, self.fixed_size = batch, imgsz
+        self.names = None
+
+    def run(self, blob):
+        return self.compiled([blob])[self.output]
+
+
+# ============================================================
+# 🚀 INFERENCE ENGINE
+# ============================================================
+class YOLOEngine:
+    """
+    Loads a YOLO model once, warms it up, and runs batched inference.
+
+    Backends:
+      - "ultralytics": .pt through Ultralytics (batched predict with a fixed imgsz)
+      - "onnxruntime": exported .onnx on the CPU execution provider
+      - "openvino": .xml / *_openvino_model dir (or .onnx), compiled for CPU with a static
+        [batch, 3, imgsz, imgsz] input
+    "auto" picks by file type. For ONNX Runtime / OpenVINO, frames are letterboxed to
+    imgsz, stacked into one NCHW blob (padded to the fixed batch if the model has one; an
+    ONNX model's static batch overrides batch=),
+    decoded and NMS-ed here, and mapped back to frame coordinates.
+
+    infer(frames) returns one (N, 6) float32 array per frame: x1, y1, x2, y2, conf, cls,
+    sorted by confidence.
+    """
+
+    def __init__(self, model_path, backend="auto", imgsz=640, conf=0.4, iou=0.45, batch=4,
+                 classes=None, threads=None, names=None, warmup=2):
+        self.model_path = model_path
+        self.backend = self._pick_backend(model_path) if backend == "auto" else backend
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (choose from {BACKENDS} or 'auto')")
+        self.imgsz, self.conf, self.iou = int(imgsz), conf, iou
+        self.batch = max(1, int(batch))
+        self.classes = classes
+        self.model = None
+        self._rt = None
+        if self.backend == "ultralytics":
+            if not YOLO_AVAILABLE:
+                raise RuntimeError("Ultralytics YOLO not installed. Run: pip install ultralytics")
+            self.model = YOLO(model_path)
+            model_names = self.model.names
+        elif self.backend == "onnxruntime":
+            self._rt = _OnnxRuntimeBackend(model_path, threads)
+            self.imgsz = self._rt.fixed_size or self.imgsz
+            # a model exported with a static batch takes exactly that many images per run
+            self.batch = self._rt.fixed_batch or self.batch
+            model_names = self._rt.names
+        else:
+            self._rt = _OpenVINOBackend(model_path, self.imgsz, self.batch, threads)
+            model_names = None
+        self.names = names if names is not None else (model_names or {})
+        self.frames = 0
+        self.busy_s = 0.0
+        # one forward pass at a time: backends already use every core, and Ultralytics is not thread-safe
+        self._lock = threading.Lock()
+        for _ in range(max(0, int(warmup))):
+            self.infer([np.zeros((self.imgsz, self.imgsz, 3), np.uint8)] * self.batch)
+        self.frames, self.busy_s = 0, 0.0
+
+    @staticmethod
+    def _pick_backend(path):
+        p = str(path).lower()
+        if p.endswith(".pt"):
+            return "ultralytics"
+        if p.endswith(".xml") or p.rstrip("/\\").endswith("_openvino_model"):
+            return "openvino"
+        if p.endswith(".onnx"):
+            return "onnxruntime" if ort is not None else "openvino"
+        return "ultralytics"
+
+    @property
+    def fps(self) -> float:
+        """Frames per second of busy inference time (excludes warm-up)."""
+        return self.frames / self.busy_s if self.busy_s else 0.0
+
+    def label(self, cls) -> str:
+        return self.names.get(int(cls), str(int(cls))) if isinstance(self.names, dict) else str(int(cls))
+
+    def infer(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        out: List[np.ndarray] = []
+        with self._lock:
+            t0 = time.perf_counter()
+            for i in range(0, len(frames), self.batch):
+                chunk = list(frames[i:i + self.batch])
+                out.extend(self._infer_ultralytics(chunk) if self.model is not None else self._infer_raw(chunk))
+            self.busy_s += time.perf_counter() - t0
+            self.frames += len(frames)
+        return out
+
+    def _infer_ultralytics(self, frames):
+        results = self.model.predict(frames, imgsz=self.imgsz, conf=self.conf, iou=self.iou,
+                                     classes=self.classes, verbose=False)
+        out = []
+        for r in results:
+            b = r.boxes
+            if b is None or len(b) == 0:
+                out.append(np.zeros((0, 6), np.float32))
+                continue
+            det = np.column_stack([b.xyxy.cpu().numpy(), b.conf.cpu().numpy(), b.cls.cpu().numpy()])
+            out.append(det[np.argsort(-det[:, 4], kind="stable")].astype(np.float32))
+        return out
+
+    def _infer_raw(self, frames):
+        boxed = [letterbox(f, self.imgsz) for f in frames]
+        imgs = [b[0] for b in boxed]
+        fixed = self._rt.fixed_batch
+        if fixed and len(imgs) < fixed:
+            imgs += [np.full_like(imgs[0], PAD_VALUE)] * (fixed - len(imgs))
+        blob = cv2.dnn.blobFromImages(imgs, 1.0 / 255.0, swapRB=True)
+        raw = self._rt.run(blob)
+        return [unletterbox(decode_yolo(raw[k], self.conf, self.iou, self.classes), scale, pad, f.shape)
+                for k, (f, (_, scale, pad)) in enumerate(zip(frames, boxed))]
+
+
+# ============================================================
+# 📡 CROSS-STREAM BATCHING
+# ============================================================
+class BatchingServer:
+    """
+    One engine shared by several cameras / vehicles: submit() from any thread returns a
+    Future for that frame's (N, 6) array. A worker thread takes the first waiting frame,
+    collects more for up to max_wait_s (or until the engine's batch is full) and runs them
+    in one forward pass, which is what makes batching pay off on a CPU ground station.
+    After close(), submit() raises and frames still waiting get a RuntimeError.
+    """
+
+    def __init__(self, engine: YOLOEngine, max_wait_s: float = 0.01):
+        self.engine = engine
+        self.max_wait_s = max_wait_s
+        self.batches = 0
+        self.served = 0
+        self._q: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def mean_batch(self) -> float:
+        return self.served / self.batches if self.batches else 0.0
+
+    def submit(self, frame) -> Future:
+        fut: Future = Future()
+        with self._submit_lock:
+            if self._stop.is_set():
+                raise RuntimeError("BatchingServer closed")
+            self._q.put((frame, fut))
+        return fut
+
+    async def infer_async(self, frame) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(frame))
+
+    def close(self, timeout: float = 2.0):
+        with self._submit_lock:
+            self._stop.set()
+        self._thread.join(timeout)
+        # frames the worker never picked up: fail them instead of leaving their awaiters hanging
+        while True:
+            try:
+                _, fut = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if fut.set_running_or_notify_cancel():
+                fut.set_exception(RuntimeError("BatchingServer closed"))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                items = [self._q.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.max_wait_s
+            while len(items) < self.engine.batch:
+                try:
+                    items.append(self._q.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            # awaiters cancelled meanwhile (wait_for, task.cancel) cancel their Future: skip those frames;
+            # the rest are marked running, so a later cancel can no longer race the setters below
+            items = [(f, fut) for f, fut in items if fut.set_running_or_notify_cancel()]
+            if not items:
+                continue
+            try:
+                results = self.engine.infer([f for f, _ in items])
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.served += len(items)
+            for (_, fut), det in zip(items, results):
+                if not fut.done():
+                    fut.set_result(det)
@@ -0,0 +1,254 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# ============================================================
+# 📦 BOX HELPERS
+# ============================================================
+def iou_matrix(a, b):
+    """IoU of every pair of (x, y, w, h) boxes: a (N, 4), b (M, 4) -> (N, M)."""
+    a = np.asarray(a, np.float64).reshape(-1, 4)
+    b = np.asarray(b, np.float64).reshape(-1, 4)
+    ax0, ay0, ax1, ay1 = a[:, 0:1], a[:, 1:2], a[:, 0:1] + a[:, 2:3], a[:, 1:2] + a[:, 3:4]
+    bx0, by0, bx1, by1 = b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax1, bx1) - np.maximum(ax0, bx0), 0, None)
+    ih = np.clip(np.minimum(ay1, by1) - np.maximum(ay0, by0), 0, None)
+    inter = iw * ih
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_assignment(cost):
+    """Pairs (row, col) taken cheapest-first from a cost matrix; inf entries are never matched."""
+    rows, cols = [], []
+    if cost.size == 0:
+        return np.array(rows, int), np.array(cols, int)
+    used_r, used_c = set(), set()
+    for k in np.argsort(cost, axis=None):
+        r, c = divmod(int(k), cost.shape[1])
+        if not np.isfinite(cost[r, c]):
+            break
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        rows.append(r)
+        cols.append(c)
+    return np.array(rows, int), np.array(cols, int)
+
+
+# ============================================================
+# 🎯 MULTI-OBJECT TRACKER
+# ============================================================
+@dataclass
+class Track:
+    id: int
+    bbox: Tuple[int, int, int, int]
+    label: Optional[str]
+    confidence: float           # EWMA of "detected when the detector ran", 0..1
+    hits: int
+    misses: int                 # consecutive detector runs without a match
+    confirmed: bool
+    velocity: Tuple[float, float]   # box centre, px/s
+    score: Optional[float] = None   # last detector score, if the detector gives one
+
+
+# state: cx, cy, w, h and their rates (per second); measurement: cx, cy, w, h
+_H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+
+class MultiObjectTracker:
+    """
+    Multi-target tracker with stable IDs (SORT-style), vectorized over all tracks.
+
+    Every track is a constant-velocity Kalman filter on the box centre and size, with
+    time-based prediction, so tracks coast through frames where the detector did not
+    run and can be queried at any time with predict(). On update() the predicted boxes
+    are matched to detections in one go: an IoU matrix over all track/detection pairs,
+    with a centroid-distance gate as fallback for small or fast targets, then a greedy
+    cheapest-first assignment. Labels, when given, must agree.
+
+    A track is confirmed after min_hits matches. Unconfirmed tracks die on their first
+    miss; confirmed ones after max_misses detector runs without a match or max_age_s
+    without a hit. new_ids / lost_ids hold the confirmations and losses of the last update.
+    """
+
+    def __init__(self, iou_min=0.1, gate=1.5, min_hits=3, max_misses=5, max_age_s=3.0,
+                 conf_alpha=0.3, accel_frac=2.0, meas_frac=0.05):
+        self.iou_min = iou_min
+        self.gate = gate
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.max_age_s = max_age_s
+        self.conf_alpha = conf_alpha
+        self.accel_frac = accel_frac    # process noise: box heights per s^2
+        self.meas_frac = meas_frac      # measurement noise: fraction of the box height
+        self.new_ids: List[int] = []
+        self.lost_ids: List[int] = []
+        self._next_id = 1
+        self._t: Optional[float] = None
+        self._x = np.zeros((0, 8))
+        self._P = np.zeros((0, 8, 8))
+        self._ids = np.zeros(0, int)
+        self._hits = np.zeros(0, int)
+        self._misses = np.zeros(0, int)
+        self._conf = np.zeros(0)
+        self._last_hit = np.zeros(0)
+        self._labels = np.zeros(0, object)
+        self._scores = np.zeros(0, object)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---------- public ----------
+    def predict(self, t=None) -> List[Track]:
+        """Advances all tracks to time t (time.monotonic() by default) and returns them."""
+        self._advance(time.monotonic() if t is None else t)
+        return self.tracks()
+
+    def update(self, boxes, t=None, labels=None, scores=None) -> List[Track]:
+        """
+        One detector run at time t: boxes (N, 4) as (x, y, w, h), optional labels/scores per box.
+        Returns the live tracks after the update.
+        """
+        t = time.monotonic() if t is None else t
+        boxes = np.asarray(boxes, np.float64).reshape(-1, 4)
+        labels = [None] * len(boxes) if labels is None else list(labels)
+        scores = [None] * len(boxes) if scores is None else list(scores)
+        self._advance(t)
+        was_confirmed = set(self._ids[self._hits >= self.min_hits].tolist())
+
+        rows, cols = greedy_assignment(self._cost(boxes, labels))
+        if len(rows):
+            self._correct(rows, boxes[cols])
+            self._hits[rows] += 1
+            self._misses[rows] = 0
+            self._last_hit[rows] = t
+            self._scores[rows] = [scores[c] for c in cols]
+        missed = np.setdiff1d(np.arange(len(self._ids)), rows)
+        self._misses[missed] += 1
+        hit = np.zeros(len(self._ids), bool)
+        hit[rows] = True
+        self._conf += self.conf_alpha * (hit - self._conf)
+
+        # drop dead tracks before adding new ones
+        dead = ((self._hits < self.min_hits) & (self._misses > 0)) | (self._misses > self.max_misses) \
+            | (t - self._last_hit > self.max_age_s)
+        self.lost_ids = [i for i in self._ids[dead].tolist() if i in was_confirmed]
+        self._keep(~dead)
+
+        new = np.setdiff1d(np.arange(len(boxes)), cols)
+        self._spawn(boxes[new], [labels[i] for i in new], [scores[i] for i in new], t)
+        self.new_ids = [i for i in self._ids[self._hits == self.min_hits].tolist() if i not in was_confirmed]
+        return self.tracks()
+
+    def tracks(self, confirmed_only=False) -> List[Track]:
+        out = []
+        for k in range(len(self._ids)):
+            confirmed = bool(self._hits[k] >= self.min_hits)
+            if confirmed_only and not confirmed:
+                continue
+            cx, cy, w, h, vx, vy = self._x[k, :6]
+            bbox = tuple(int(round(v)) for v in (cx - w / 2, cy - h / 2, w, h))
+            out.append(Track(int(self._ids[k]), bbox, self._labels[k], float(self._conf[k]), int(self._hits[k]),
+                             int(self._misses[k]), confirmed, (float(vx), float(vy)), self._scores[k]))
+        return out
+
+    def best(self) -> Optional[Track]:
+        """The most confident confirmed track, if any."""
+        confirmed = self.tracks(confirmed_only=True)
+        return max(confirmed, key=lambda tr: tr.confidence) if confirmed else None
+
+    # ---------- internals ----------
+    def _boxes(self):
+        cx, cy, w, h = self._x[:, 0], self._x[:, 1], self._x[:, 2], self._x[:, 3]
+        return np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+
+    def _cost(self, boxes, labels):
+        n, m = len(self._ids), len(boxes)
+        if n == 0 or m == 0:
+            return np.zeros((n, m))
+        iou = iou_matrix(self._boxes(), boxes)
+        # centroid gate, in units of the larger box side: matches targets that moved past IoU overlap
+        d = np.hypot(self._x[:, None, 0] - (boxes[None, :, 0] + boxes[None, :, 2] / 2),
+                     self._x[:, None, 1] - (boxes[None, :, 1] + boxes[None, :, 3] / 2))
+        size = np.maximum(np.maximum(self._x[:, None, 2], self._x[:, None, 3]),
+                          np.maximum(boxes[None, :, 2], boxes[None, :, 3]))
+        dn = d / np.maximum(size, 1.0)
+        cost = np.where(iou >= self.iou_min, 1.0 - iou, np.where(dn <= self.gate, 1.0 + dn, np.inf))
+        if any(lb is not None for lb in labels):
+            tl = self._labels[:, None]
+            dl = np.array(labels, object)[None, :]
+            clash = (tl != dl) & (tl != None) & (dl != None)   # noqa: E711 (elementwise)
+            cost = np.where(clash, np.inf, cost)
+        return cost
+
+    def _advance(self, t):
+        if self._t is None:
+            self._t = t
+        dt = max(0.0, t - self._t)
+        self._t = max(self._t, t)
+        if dt == 0.0 or len(self._ids) == 0:
+            return
+        F = np.eye(8)
+        F[:4, 4:] = dt * np.eye(4)
+        # white-noise acceleration, scaled by box height
+        sa2 = (self.accel_frac * np.maximum(self._x[:, 3], 1.0)) ** 2
+        g = np.array([dt * dt / 2] * 4 + [dt] * 4)
+        G = np.zeros((8, 4))
+        G[:4] = np.eye(4) * g[:4]
+        G[4:] = np.eye(4) * g[4:]
+        Q = (G @ G.T)[None] * sa2[:, None, None]
+        self._x = self._x @ F.T
+        self._P = F @ self._P @ F.T + Q
+
+    def _correct(self, idx, z_boxes):
+        z = np.stack([z_boxes[:, 0] + z_boxes[:, 2] / 2, z_boxes[:, 1] + z_boxes[:, 3] / 2,
+                      z_boxes[:, 2], z_boxes[:, 3]], axis=1)
+        x, P = self._x[idx], self._P[idx]
+        r = (self.meas_frac * np.maximum(z[:, 3], 1.0)) ** 2
+        S = _H @ P @ _H.T + np.eye(4)[None] * r[:, None, None]
+        PHt = P @ _H.T
+        K = np.linalg.solve(S, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)
+        self._x[idx] = x + np.einsum("nij,nj->ni", K, z - x @ _H.T)
+        self._P[idx] = (np.eye(8)[None] - K @ _H) @ P
+
+    def _spawn(self, boxes, labels, scores, t):
+        m = len(boxes)
+        if m == 0:
+            return
+        x = np.zeros((m, 8))
+        x[:, 0] = boxes[:, 0] + boxes[:, 2] / 2
+        x[:, 1] = boxes[:, 1] + boxes[:, 3] / 2
+        x[:, 2:4] = boxes[:, 2:4]
+        h = np.maximum(boxes[:, 3], 1.0)
+        # position known to the measurement noise, velocity unknown (about one box height per second)
+        std = np.stack([self.meas_frac * h] * 4 + [h] * 4, axis=1)
+        P = np.zeros((m, 8, 8))
+        P[:, np.arange(8), np.arange(8)] = std ** 2
+        ids = np.arange(self._next_id, self._next_id + m)
+        self._next_id += m
+        self._x = np.vstack([self._x, x])
+        self._P = np.concatenate([self._P, P])
+        self._ids = np.concatenate([self._ids, ids])
+        self._hits = np.concatenate([self._hits, np.ones(m, int)])
+        self._misses = np.concatenate([self._misses, np.zeros(m, int)])
+        self._conf = np.concatenate([self._conf, np.full(m, self.conf_alpha)])
+        self._last_hit = np.concatenate([self._last_hit, np.full(m, float(t))])
+        self._labels = np.concatenate([self._labels, np.array(labels + [None], object)[:-1]])
+        self._scores = np.concatenate([self._scores, np.array(scores + [None], object)[:-1]])
+
+    def _keep(self, mask):
+        for name in ("_x", "_P", "_ids", "_hits", "_misses", "_conf", "_last_hit", "_labels", "_scores"):
+            setattr(self, name, getattr(self, name)[mask])
+
+
+def detections_to_arrays(detections: Sequence[dict]):
+    """[{"bbox", "color"/"label", "conf"?}] from detect_all() -> (boxes, labels, scores) for update()."""
+    boxes = [d["bbox"] for d in detections]
+    labels = [d.get("label", d.get("color")) for d in detections]
+    scores = [d.get("conf") for d in detections]
+    return boxes, labels, scores